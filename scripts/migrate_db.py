@@ -0,0 +1,46 @@
+"""
+Migration de la base de données
+
+Usage:
+    python scripts/migrate_db.py            # applique les migrations manquantes
+    python scripts/migrate_db.py --status   # affiche la version du schéma
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from dotenv import load_dotenv
+
+from core.database import DatabaseManager
+
+async def main(status_only: bool = False):
+    """Applique les migrations ou affiche l'état du schéma"""
+    load_dotenv()
+    shards = os.getenv("DB_SHARDS", "1").strip()
+    db = DatabaseManager(
+        os.getenv("DATABASE_URL", "sqlite:///data/bot.db"),
+        shards=int(shards) if shards.isdigit() else 1
+    )
+    
+    await db.backend.open()
+    try:
+        # Chaque shard a son propre schéma
+        for backend in db.backends:
+            async with backend.migration_runner() as runner:
+                if status_only:
+                    print(f"📦 {backend.name} ({db.dialect}) : version {await runner.current_version()}")
+                    for step in await runner.pending():
+                        print(f"  ⏳ {step.version} - {step.description}")
+                    continue
+                
+                applied = await runner.run()
+                print(f"✅ {backend.name} : {len(applied)} migration(s) appliquée(s)" if applied else f"✅ {backend.name} : schéma à jour")
+    finally:
+        await db.backend.close()
+
+if __name__ == "__main__":
+    asyncio.run(main(status_only="--status" in sys.argv))
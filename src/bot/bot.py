@@ -1,11 +1,14 @@
 """
 Bot principal avec architecture modulaire (cogs)
 """
+import asyncio
+
 import discord
 from discord.ext import commands
 from discord import app_commands  # IMPORTANT !
 from core.config import Config  # PAS de src.
 from core.database import DatabaseManager  # PAS de src.
+from core.leaderboards import LeaderboardService
 from core.logger import setup_logger  # PAS de src.
 
 logger = setup_logger("Bot")
@@ -24,8 +27,10 @@ class GuildGreeterBot(commands.Bot):
         )
         
         self.config = config
-        self.db = DatabaseManager(config.database_url)
+        self.db = DatabaseManager.from_config(config)
+        self.leaderboards = LeaderboardService()
         self.logger = logger
+        self._leaderboard_preload = None
         
         # Initialiser l'arbre de commandes slash
         if not hasattr(self, 'tree') or self.tree is None:
@@ -81,6 +86,13 @@ class GuildGreeterBot(commands.Bot):
         await self.change_presence(
             activity=discord.Game(name=f"{self.config.prefix}help")
         )
+        
+        # Classements XP chargés une fois, les plus grands serveurs d'abord
+        if self._leaderboard_preload is None:
+            guilds = sorted(self.guilds, key=lambda guild: guild.member_count or 0, reverse=True)
+            self._leaderboard_preload = asyncio.create_task(
+                self.db.leaderboard.preload([guild.id for guild in guilds])
+            )
     
     async def on_guild_join(self, guild: discord.Guild):
         """Événement quand le bot rejoint un serveur"""
@@ -88,22 +100,23 @@ class GuildGreeterBot(commands.Bot):
         
         # Créer l'entrée dans la DB
         try:
-            # Vérifier que la méthode existe
-            if hasattr(self.db, 'ensure_guild'):
-                await self.db.ensure_guild(guild.id)
-            else:
-                # Fallback : créer manuellement
-                await self.db.connect()
-                async with self.db.connection.cursor() as cursor:
-                    await cursor.execute(
-                        "INSERT OR IGNORE INTO guilds (guild_id) VALUES (?)",
-                        (guild.id,)
-                    )
-                    await self.db.connection.commit()
-                logger.info(f"✅ Serveur {guild.id} ajouté à la DB")
+            await self.db.ensure_guild(guild.id)
+            logger.info(f"✅ Serveur {guild.id} ajouté à la DB")
         except Exception as e:
             logger.error(f"❌ Erreur création guild DB: {e}")
     
+    async def on_guild_remove(self, guild: discord.Guild):
+        """Événement quand le bot quitte un serveur"""
+        self.leaderboards.members.forget(guild.id)
+    
+    async def on_member_join(self, member: discord.Member):
+        """Tient à jour les membres affichables dans les classements"""
+        self.leaderboards.members.member_joined(member.guild.id, member.id)
+    
+    async def on_member_remove(self, member: discord.Member):
+        """Retire des classements un membre qui quitte le serveur"""
+        self.leaderboards.members.member_left(member.guild.id, member.id)
+    
     async def on_command_error(self, ctx: commands.Context, error: Exception):
         """Gestion des erreurs de commandes"""
         if isinstance(error, commands.CommandNotFound):
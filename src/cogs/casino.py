@@ -8,6 +8,7 @@ import random
 import asyncio
 from datetime import datetime, timedelta
 from core.logger import setup_logger
+from models.economy import TransactionType
 
 logger = setup_logger("Casino")
 
@@ -35,13 +36,9 @@ class Casino(commands.Cog):
         if not economy:
             return False
         
-        account = await economy.get_balance(user_id, guild_id)
-        if not account or account["balance"] < amount:
-            return False
-        
-        new_balance = account["balance"] - amount
-        await economy.update_balance(user_id, guild_id, balance=new_balance)
-        return True
+        # Débit conditionnel en une requête : deux parties simultanées ne
+        # peuvent pas miser le même solde
+        return await economy.debit(user_id, guild_id, amount, TransactionType.CASINO_BET) is not None
     
     async def add_coins(self, user_id: int, guild_id: int, amount: int):
         """Ajoute des coins à un joueur"""
@@ -49,10 +46,15 @@ class Casino(commands.Cog):
         if not economy:
             return
         
-        account = await economy.get_balance(user_id, guild_id)
-        if account:
-            new_balance = account["balance"] + amount
-            await economy.update_balance(user_id, guild_id, balance=new_balance)
+        await economy.credit(user_id, guild_id, amount, TransactionType.CASINO_PAYOUT)
+    
+    async def pay_out(self, guild_id: int, payouts: list):
+        """Règle une partie : crédite tous les gains et remboursements en un seul commit"""
+        economy = await self.get_economy()
+        if not economy or not payouts:
+            return
+        
+        await economy.credit_many(guild_id, payouts, TransactionType.CASINO_PAYOUT)
     
     def format_coins(self, amount: int) -> str:
         """Formate un montant avec des espaces"""
@@ -238,16 +240,10 @@ class Casino(commands.Cog):
                     challenge = self.casino_cog.pending_challenges.pop(self.challenge_id)
                     
                     # Rembourser les deux joueurs
-                    await self.casino_cog.add_coins(
-                        challenge["challenger"].id, 
-                        interaction.guild_id, 
-                        challenge["bet"]
-                    )
-                    await self.casino_cog.add_coins(
-                        challenge["opponent"].id,
-                        interaction.guild_id,
-                        challenge["bet"]
-                    )
+                    await self.casino_cog.pay_out(interaction.guild_id, [
+                        (challenge["challenger"].id, challenge["bet"]),
+                        (challenge["opponent"].id, challenge["bet"])
+                    ])
                     
                     await interaction.response.send_message(
                         f"❌ {interaction.user.mention} a refusé le défi. Les mises ont été rendues."
@@ -319,14 +315,18 @@ class Casino(commands.Cog):
         else:
             # Les deux ont choisi la même chose = égalité
             winner = None
-            # Rembourser les deux
-            await self.add_coins(challenge["challenger"].id, interaction.guild_id, challenge["bet"])
-            await self.add_coins(challenge["opponent"].id, interaction.guild_id, challenge["bet"])
             result_text = f"ÉGALITÉ ! Les deux ont choisi {result.upper()}. Mises rendues."
         
-        # Donner les gains au gagnant
+        # Règlement de la partie en un seul commit
         if winner:
-            await self.add_coins(winner.id, interaction.guild_id, winner_gain)
+            # Donner les gains au gagnant
+            await self.pay_out(interaction.guild_id, [(winner.id, winner_gain)])
+        else:
+            # Rembourser les deux
+            await self.pay_out(interaction.guild_id, [
+                (challenge["challenger"].id, challenge["bet"]),
+                (challenge["opponent"].id, challenge["bet"])
+            ])
         
         # Embed résultat
         embed = discord.Embed(
@@ -616,19 +616,19 @@ class Casino(commands.Cog):
                 # Résultat
                 await asyncio.sleep(1)
                 
-                # Déterminer gagnant
+                # Déterminer gagnant et régler la partie en un seul commit
                 if game["player1_roll"] > game["player2_roll"]:
                     gain = bet * 2
-                    await self.add_coins(game["player1"].id, interaction.guild_id, gain)
+                    payouts = [(game["player1"].id, gain)]
                     result = f"🏆 {game['player1'].mention} gagne {self.format_coins(gain)} coins !"
                 elif game["player2_roll"] > game["player1_roll"]:
                     gain = bet * 2
-                    await self.add_coins(game["player2"].id, interaction.guild_id, gain)
+                    payouts = [(game["player2"].id, gain)]
                     result = f"🏆 {game['player2'].mention} gagne {self.format_coins(gain)} coins !"
                 else:
-                    await self.add_coins(game["player1"].id, interaction.guild_id, bet)
-                    await self.add_coins(game["player2"].id, interaction.guild_id, bet)
+                    payouts = [(game["player1"].id, bet), (game["player2"].id, bet)]
                     result = "🤝 Égalité ! Mises rendues."
+                await self.pay_out(interaction.guild_id, payouts)
                 
                 # Afficher résultat
                 result_embed = discord.Embed(
@@ -1051,28 +1051,28 @@ class Casino(commands.Cog):
             await interaction.response.send_message("❌ Aucune partie en cours.", ephemeral=True)
             return
         
-        # Annuler et rembourser
-        refund_total = 0
+        # Annuler et rembourser (un seul commit pour tous les remboursements)
+        refunds = []
         
         for game_id in games_to_cancel:
             if game_id in self.active_games:
                 game = self.active_games.pop(game_id)
                 # Rembourser selon le type de jeu
                 if game["type"] == "blackjack":
-                    await self.add_coins(game["player"].id, interaction.guild_id, game["bet"])
-                    refund_total += game["bet"]
+                    refunds.append((game["player"].id, game["bet"]))
                 elif game["type"] == "dice_pvp":
                     # Rembourser les deux joueurs
-                    await self.add_coins(game["player1"].id, interaction.guild_id, game["bet"])
-                    await self.add_coins(game["player2"].id, interaction.guild_id, game["bet"])
-                    refund_total += game["bet"] * 2
+                    refunds.append((game["player1"].id, game["bet"]))
+                    refunds.append((game["player2"].id, game["bet"]))
             
             elif game_id in self.pending_challenges:
                 challenge = self.pending_challenges.pop(game_id)
                 # Rembourser les deux
-                await self.add_coins(challenge["challenger"].id, interaction.guild_id, challenge["bet"])
-                await self.add_coins(challenge["opponent"].id, interaction.guild_id, challenge["bet"])
-                refund_total += challenge["bet"] * 2
+                refunds.append((challenge["challenger"].id, challenge["bet"]))
+                refunds.append((challenge["opponent"].id, challenge["bet"]))
+        
+        await self.pay_out(interaction.guild_id, refunds)
+        refund_total = sum(amount for _, amount in refunds)
         
         await interaction.response.send_message(
             f"✅ {len(games_to_cancel)} partie(s) annulée(s).\n"
@@ -6,8 +6,13 @@ from discord import app_commands
 from discord.ext import commands
 from datetime import datetime, timedelta
 import random
+from typing import List, Tuple
 from core.logger import setup_logger
 from core.embeds import Embeds
+from core.account_cache import AccountCache
+from core.leaderboards import LeaderboardPage, LeaderboardView
+from models.economy import TransactionType
+from utils.locks import StripedLocks
 
 logger = setup_logger("Economy")
 
@@ -16,74 +21,239 @@ class Economy(commands.Cog):
     
     def __init__(self, bot):
         self.bot = bot
+        # Comptes récemment lus, tenus à jour par debit/credit/move/to_bank après COMMIT
+        self.accounts = AccountCache(max_entries=10_000)
+        # Verrous par compte (guild_id, user_id) : pool fixe, ordre d'acquisition déterministe.
+        # Ordre global : verrous de comptes d'abord, transaction ensuite
+        self.locks = StripedLocks(stripes=256)
+    
+    def _lock(self, guild_id: int, *user_ids: int):
+        """
+        Verrous des comptes, à prendre hors de toute transaction
+        
+        Une transaction SQLite garde la connexion d'écriture : attendre un
+        verrou de compte depuis l'intérieur bloquerait son détenteur, qui
+        attend lui-même cette connexion. Les règlements à plusieurs comptes
+        passent par credit_many, qui ouvre la transaction sous les verrous.
+        
+        Raises:
+            RuntimeError: Si une transaction est active dans la tâche courante
+        """
+        if self.bot.db.in_transaction:
+            raise RuntimeError("Verrous de comptes demandés dans une transaction (prendre les verrous d'abord)")
+        return self.locks.acquire(*((guild_id, user_id) for user_id in user_ids))
     
     async def get_balance(self, user_id: int, guild_id: int):
         """Récupère ou crée le compte économique d'un utilisateur"""
         try:
-            await self.bot.db.connect()
-            
-            async with self.bot.db.connection.cursor() as cursor:
-                # Vérifier si l'utilisateur a un compte
-                await cursor.execute(
-                    """SELECT balance, bank, daily_claimed FROM economy 
-                    WHERE user_id = ? AND guild_id = ?""",
-                    (user_id, guild_id)
-                )
-                result = await cursor.fetchone()
-                
-                if result:
-                    return {
-                        "balance": result[0],
-                        "bank": result[1],
-                        "daily_claimed": result[2]
-                    }
-                else:
-                    # Créer un nouveau compte
-                    await cursor.execute(
-                        """INSERT INTO economy (user_id, guild_id, balance, bank, daily_claimed)
-                        VALUES (?, ?, ?, ?, ?)""",
-                        (user_id, guild_id, 100, 0, None)
-                    )
-                    await self.bot.db.connection.commit()
-                    
-                    return {
-                        "balance": 100,
-                        "bank": 0,
-                        "daily_claimed": None
-                    }
+            account = await self.accounts.get_or_load(
+                guild_id,
+                user_id,
+                lambda: self.bot.db.economy.get_or_create(guild_id, user_id)
+            )
+            return {
+                "balance": account.balance,
+                "bank": account.bank,
+                "daily_claimed": account.daily_claimed
+            }
                     
         except Exception as e:
             logger.error(f"Erreur get_balance: {e}")
             return None
     
-    async def update_balance(self, user_id: int, guild_id: int, balance=None, bank=None, daily_claimed=None):
-        """Met à jour le solde d'un utilisateur"""
-        try:
-            await self.bot.db.connect()
-            
-            async with self.bot.db.connection.cursor() as cursor:
-                if balance is not None:
-                    await cursor.execute(
-                        "UPDATE economy SET balance = ? WHERE user_id = ? AND guild_id = ?",
-                        (balance, user_id, guild_id)
-                    )
-                
-                if bank is not None:
-                    await cursor.execute(
-                        "UPDATE economy SET bank = ? WHERE user_id = ? AND guild_id = ?",
-                        (bank, user_id, guild_id)
-                    )
-                
-                if daily_claimed is not None:
-                    await cursor.execute(
-                        "UPDATE economy SET daily_claimed = ? WHERE user_id = ? AND guild_id = ?",
-                        (daily_claimed, user_id, guild_id)
-                    )
-                
-                await self.bot.db.connection.commit()
+    async def update_balance(
+        self,
+        user_id: int,
+        guild_id: int,
+        balance=None,
+        bank=None,
+        daily_claimed=None,
+        reference: str = None
+    ) -> bool:
+        """
+        Modifie un compte à la main (édition par un administrateur)
+        
+        L'écart de portefeuille passe par un débit ou un crédit inscrit au
+        journal (ADMIN_ADJUST) : /ledgeraudit ne voit pas de dérive. Le
+        compte est oublié du cache après le COMMIT.
+        
+        Returns:
+            True si la modification a été enregistrée
+        """
+        async with self._lock(guild_id, user_id):
+            try:
+                async with self.bot.db.transaction(guild_id):
+                    account = await self.bot.db.economy.get_or_create(guild_id, user_id)
+                    if balance is not None and balance > account.balance:
+                        await self._credit(
+                            user_id, guild_id, balance - account.balance, TransactionType.ADMIN_ADJUST, reference
+                        )
+                    elif balance is not None and balance < account.balance:
+                        await self._debit(
+                            user_id, guild_id, account.balance - balance, TransactionType.ADMIN_ADJUST, reference
+                        )
+                    await self.bot.db.economy.update(guild_id, user_id, bank=bank, daily_claimed=daily_claimed)
+                    self.bot.db.after_commit(lambda: self.invalidate_accounts(guild_id, user_id), guild_id=guild_id)
+                return True
                 
-        except Exception as e:
-            logger.error(f"Erreur update_balance: {e}")
+            except Exception as e:
+                logger.error(f"Erreur update_balance: {e}")
+                self.accounts.invalidate(guild_id, user_id)
+                return False
+    
+    def _cache(self, guild_id: int, user_id: int, **values):
+        """
+        Reporte une écriture dans le cache des comptes
+        
+        Dans une transaction, le report attend son COMMIT : un ROLLBACK ne
+        laisse pas en cache un solde absent de la base.
+        """
+        self.bot.db.after_commit(lambda: self.accounts.update(guild_id, user_id, **values), guild_id=guild_id)
+    
+    def invalidate_accounts(self, guild_id: int, user_id: int = None):
+        """
+        Oublie les comptes en cache d'un serveur, ou d'un seul membre
+        
+        À appeler après toute modification de la table economy faite hors
+        de ce cog (édition par un administrateur, import...).
+        """
+        self.accounts.invalidate(guild_id, user_id)
+    
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.accounts.invalidate(guild.id)
+    
+    async def debit(
+        self,
+        user_id: int,
+        guild_id: int,
+        amount: int,
+        kind: TransactionType,
+        reference: str = None
+    ):
+        """
+        Débite le portefeuille en une requête conditionnelle et l'inscrit au journal
+        
+        Returns:
+            Nouveau solde, ou None si le solde est insuffisant
+        """
+        async with self._lock(guild_id, user_id):
+            return await self._debit(user_id, guild_id, amount, kind, reference)
+    
+    async def _debit(self, user_id: int, guild_id: int, amount: int, kind: TransactionType, reference: str = None):
+        """debit, verrou du compte déjà tenu"""
+        balance = await self.bot.db.economy.debit(guild_id, user_id, amount)
+        if balance is None:
+            # Refus : le solde en cache, s'il permettait le débit, est périmé
+            self.accounts.invalidate(guild_id, user_id)
+            return None
+        
+        self._cache(guild_id, user_id, balance=balance)
+        self.bot.db.ledger.record(guild_id, user_id, kind.value, -amount, balance, reference=reference)
+        return balance
+    
+    async def credit(
+        self,
+        user_id: int,
+        guild_id: int,
+        amount: int,
+        kind: TransactionType,
+        reference: str = None
+    ) -> int:
+        """Crédite le portefeuille en une requête, l'inscrit au journal et retourne le nouveau solde"""
+        async with self._lock(guild_id, user_id):
+            return await self._credit(user_id, guild_id, amount, kind, reference)
+    
+    async def _credit(self, user_id: int, guild_id: int, amount: int, kind: TransactionType, reference: str = None) -> int:
+        """credit, verrou du compte déjà tenu"""
+        balance = await self.bot.db.economy.credit(guild_id, user_id, amount)
+        self._cache(guild_id, user_id, balance=balance)
+        self.bot.db.ledger.record(guild_id, user_id, kind.value, amount, balance, reference=reference)
+        return balance
+    
+    async def claim_daily(self, user_id: int, guild_id: int, amount: int):
+        """
+        Récompense quotidienne en une requête conditionnelle : le crédit et la
+        date de réclamation sont écrits ensemble, ou pas du tout
+        
+        Returns:
+            Nouveau solde, ou None si la récompense a déjà été réclamée
+        """
+        now = datetime.utcnow()
+        async with self._lock(guild_id, user_id):
+            balance = await self.bot.db.economy.claim_daily(guild_id, user_id, amount, now)
+            if balance is None:
+                self.accounts.invalidate(guild_id, user_id)
+                return None
+            
+            self._cache(guild_id, user_id, balance=balance, daily_claimed=now)
+            self.bot.db.ledger.record(guild_id, user_id, TransactionType.DAILY.value, amount, balance)
+        return balance
+    
+    async def credit_many(
+        self,
+        guild_id: int,
+        credits: List[Tuple[int, int]],
+        kind: TransactionType,
+        reference: str = None
+    ) -> List[int]:
+        """
+        Crédite plusieurs portefeuilles en un seul COMMIT (règlement d'une partie)
+        
+        Les verrous de tous les comptes sont pris avant d'ouvrir la
+        transaction, jamais l'inverse (voir _lock).
+        
+        Args:
+            credits: Paires (user_id, montant), un même membre pouvant revenir
+        
+        Returns:
+            Nouveaux soldes, dans l'ordre de ``credits``
+        """
+        async with self._lock(guild_id, *(user_id for user_id, _ in credits)):
+            async with self.bot.db.transaction(guild_id):
+                return [
+                    await self._credit(user_id, guild_id, amount, kind, reference)
+                    for user_id, amount in credits
+                ]
+    
+    async def move(self, sender_id: int, receiver_id: int, guild_id: int, amount: int):
+        """
+        Transfère des coins entre deux portefeuilles
+        
+        Returns:
+            (solde expéditeur, solde destinataire), ou None si le solde est insuffisant
+        """
+        # Les deux comptes, toujours verrouillés dans le même ordre
+        async with self._lock(guild_id, sender_id, receiver_id):
+            balances = await self.bot.db.economy.move(guild_id, sender_id, receiver_id, amount)
+            if balances is None:
+                self.accounts.invalidate(guild_id, sender_id)
+                return None
+            
+            self._cache(guild_id, sender_id, balance=balances[0])
+            self._cache(guild_id, receiver_id, balance=balances[1])
+            ledger = self.bot.db.ledger
+            ledger.record(guild_id, sender_id, TransactionType.TRANSFER_OUT.value, -amount, balances[0], receiver_id)
+            ledger.record(guild_id, receiver_id, TransactionType.TRANSFER_IN.value, amount, balances[1], sender_id)
+        return balances
+    
+    async def to_bank(self, user_id: int, guild_id: int, amount: int):
+        """
+        Dépose (montant positif) ou retire (montant négatif) en une requête
+        
+        Returns:
+            (portefeuille, banque), ou None si les fonds sont insuffisants
+        """
+        async with self._lock(guild_id, user_id):
+            balances = await self.bot.db.economy.to_bank(guild_id, user_id, amount)
+            if balances is None:
+                self.accounts.invalidate(guild_id, user_id)
+                return None
+            
+            self._cache(guild_id, user_id, balance=balances[0], bank=balances[1])
+            kind = TransactionType.DEPOSIT if amount > 0 else TransactionType.WITHDRAW
+            self.bot.db.ledger.record(guild_id, user_id, kind.value, -amount, balances[0])
+        return balances
     
     def format_coins(self, amount: int) -> str:
         """Formate un montant avec des espaces pour les milliers"""
@@ -196,57 +366,18 @@ class Economy(commands.Cog):
     @app_commands.command(name="daily", description="Récupère ta récompense quotidienne")
     async def daily(self, interaction: discord.Interaction):
         """Récompense quotidienne"""
-        account = await self.get_balance(interaction.user.id, interaction.guild_id)
-        
-        if not account:
-            embed = Embeds.error(
-                "Erreur",
-                "Impossible de récupérer ton compte. Réessaye plus tard."
-            )
-            await interaction.response.send_message(embed=embed, ephemeral=True)
-            return
-        
-        now = datetime.utcnow()
-        
-        # Vérifier si la récompense a déjà été réclamée aujourd'hui
-        if account["daily_claimed"]:
-            try:
-                # Convertir en datetime si c'est une string
-                if isinstance(account["daily_claimed"], str):
-                    last_claimed = datetime.fromisoformat(account["daily_claimed"].replace('Z', '+00:00'))
-                else:
-                    last_claimed = account["daily_claimed"]
-                
-                time_since = now - last_claimed
-                
-                if time_since < timedelta(hours=24):
-                    remaining = timedelta(hours=24) - time_since
-                    hours = int(remaining.total_seconds() // 3600)
-                    minutes = int((remaining.total_seconds() % 3600) // 60)
-                    
-                    embed = Embeds.warning(
-                        "Déjà réclamé",
-                        f"Tu as déjà récupéré ta récompense quotidienne !\n\n"
-                        f"⏰ Reviens dans **{hours}h {minutes}m**."
-                    )
-                    await interaction.response.send_message(embed=embed, ephemeral=True)
-                    return
-            except Exception as e:
-                logger.error(f"Erreur conversion date: {e}")
-        
         # Calculer la récompense (avec bonus aléatoire)
         base_reward = random.randint(100, 500)
         bonus = random.randint(0, 100) if random.random() < 0.3 else 0  # 30% de chance de bonus
         reward = base_reward + bonus
         
-        new_balance = account["balance"] + reward
+        # Disponibilité vérifiée par la requête elle-même : deux /daily
+        # simultanées ne peuvent pas toucher deux fois la récompense
+        new_balance = await self.claim_daily(interaction.user.id, interaction.guild_id, reward)
         
-        await self.update_balance(
-            interaction.user.id,
-            interaction.guild_id,
-            balance=new_balance,
-            daily_claimed=now
-        )
+        if new_balance is None:
+            await interaction.response.send_message(embed=await self.daily_refusal(interaction), ephemeral=True)
+            return
         
         # Créer l'embed avec bonus si applicable
         embed = self.create_daily_embed(reward, new_balance, is_streak=bonus > 0)
@@ -260,6 +391,35 @@ class Economy(commands.Cog):
         
         await interaction.response.send_message(embed=embed)
     
+    async def daily_refusal(self, interaction: discord.Interaction) -> discord.Embed:
+        """Embed indiquant quand la prochaine récompense quotidienne sera disponible"""
+        account = await self.get_balance(interaction.user.id, interaction.guild_id)
+        if not account or not account["daily_claimed"]:
+            return Embeds.error(
+                "Erreur",
+                "Impossible de récupérer ton compte. Réessaye plus tard."
+            )
+        
+        try:
+            # Convertir en datetime si c'est une string
+            if isinstance(account["daily_claimed"], str):
+                last_claimed = datetime.fromisoformat(account["daily_claimed"].replace('Z', '+00:00'))
+            else:
+                last_claimed = account["daily_claimed"]
+            
+            remaining = max(timedelta(hours=24) - (datetime.utcnow() - last_claimed), timedelta(0))
+        except Exception as e:
+            logger.error(f"Erreur conversion date: {e}")
+            remaining = timedelta(0)
+        
+        hours = int(remaining.total_seconds() // 3600)
+        minutes = int((remaining.total_seconds() % 3600) // 60)
+        return Embeds.warning(
+            "Déjà réclamé",
+            f"Tu as déjà récupéré ta récompense quotidienne !\n\n"
+            f"⏰ Reviens dans **{hours}h {minutes}m**."
+        )
+    
     @app_commands.command(name="deposit", description="Dépose de l'argent à la banque")
     @app_commands.describe(amount="Montant à déposer (ou 'all' pour tout déposer)")
     async def deposit(self, interaction: discord.Interaction, amount: str):
@@ -307,16 +467,13 @@ class Economy(commands.Cog):
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
         
-        # Effectuer la transaction
-        new_balance = account["balance"] - amount_to_deposit
-        new_bank = account["bank"] + amount_to_deposit
-        
-        await self.update_balance(
-            interaction.user.id,
-            interaction.guild_id,
-            balance=new_balance,
-            bank=new_bank
-        )
+        # Effectuer la transaction (le solde a pu changer depuis la lecture)
+        balances = await self.to_bank(interaction.user.id, interaction.guild_id, amount_to_deposit)
+        if balances is None:
+            embed = Embeds.warning("Fonds insuffisants", "Ton portefeuille a changé entre-temps, réessaye.")
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        new_balance, new_bank = balances
         
         embed = self.create_transaction_embed("deposit", amount_to_deposit, new_balance, new_bank)
         await interaction.response.send_message(embed=embed)
@@ -368,16 +525,13 @@ class Economy(commands.Cog):
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
         
-        # Effectuer la transaction
-        new_bank = account["bank"] - amount_to_withdraw
-        new_balance = account["balance"] + amount_to_withdraw
-        
-        await self.update_balance(
-            interaction.user.id,
-            interaction.guild_id,
-            balance=new_balance,
-            bank=new_bank
-        )
+        # Effectuer la transaction (le solde a pu changer depuis la lecture)
+        balances = await self.to_bank(interaction.user.id, interaction.guild_id, -amount_to_withdraw)
+        if balances is None:
+            embed = Embeds.warning("Fonds insuffisants", "Ta banque a changé entre-temps, réessaye.")
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        new_balance, new_bank = balances
         
         embed = self.create_transaction_embed("withdraw", amount_to_withdraw, new_balance, new_bank)
         await interaction.response.send_message(embed=embed)
@@ -415,11 +569,11 @@ class Economy(commands.Cog):
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
         
-        # Récupérer les comptes
-        sender_account = await self.get_balance(interaction.user.id, interaction.guild_id)
-        receiver_account = await self.get_balance(user.id, interaction.guild_id)
-        
-        if not sender_account or not receiver_account:
+        # Débit conditionnel et crédit dans une seule transaction (un seul commit)
+        try:
+            balances = await self.move(interaction.user.id, user.id, interaction.guild_id, amount)
+        except Exception as e:
+            logger.error(f"Erreur transfert: {e}")
             embed = Embeds.error(
                 "Erreur",
                 "Impossible de récupérer les comptes. Réessaye plus tard."
@@ -428,30 +582,17 @@ class Economy(commands.Cog):
             return
         
         # Vérifier le solde
-        if sender_account["balance"] < amount:
+        if balances is None:
+            sender = await self.get_balance(interaction.user.id, interaction.guild_id)
+            sender_balance = sender["balance"] if sender else 0
             embed = Embeds.warning(
                 "Fonds insuffisants",
-                f"Tu n'as que **{self.format_coins(sender_account['balance'])}** coins dans ton portefeuille.\n\n"
+                f"Tu n'as que **{self.format_coins(sender_balance)}** coins dans ton portefeuille.\n\n"
                 f"Tu essaies de transférer **{self.format_coins(amount)}** coins."
             )
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
-        
-        # Effectuer le transfert
-        new_sender_balance = sender_account["balance"] - amount
-        new_receiver_balance = receiver_account["balance"] + amount
-        
-        await self.update_balance(
-            interaction.user.id,
-            interaction.guild_id,
-            balance=new_sender_balance
-        )
-        
-        await self.update_balance(
-            user.id,
-            interaction.guild_id,
-            balance=new_receiver_balance
-        )
+        new_sender_balance, new_receiver_balance = balances
         
         # Confirmation
         embed = Embeds.success(
@@ -487,6 +628,156 @@ class Economy(commands.Cog):
         except discord.Forbidden:
             pass  # L'utilisateur a désactivé les DM
     
+    TRANSACTION_LABELS = {
+        TransactionType.DAILY: "🎁 Récompense quotidienne",
+        TransactionType.DEPOSIT: "🏦 Dépôt",
+        TransactionType.WITHDRAW: "🏦 Retrait",
+        TransactionType.TRANSFER_IN: "📥 Transfert reçu",
+        TransactionType.TRANSFER_OUT: "📤 Transfert envoyé",
+        TransactionType.SHOP_PURCHASE: "🛒 Achat",
+        TransactionType.SHOP_REFUND: "↩️ Remboursement",
+        TransactionType.LOOTBOX: "🎁 Boîte mystère",
+        TransactionType.CASINO_BET: "🎰 Mise",
+        TransactionType.CASINO_PAYOUT: "🎰 Gain",
+        TransactionType.ADMIN_ADJUST: "🛠️ Ajustement",
+    }
+    
+    def format_entry(self, entry) -> str:
+        """Ligne d'historique d'un mouvement du journal"""
+        created_at = entry.created_at
+        if isinstance(created_at, str):
+            created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+        
+        label = self.TRANSACTION_LABELS.get(TransactionType(entry.kind), entry.kind)
+        if entry.counterparty_id:
+            label += f" (<@{entry.counterparty_id}>)"
+        sign = "+" if entry.amount > 0 else "-"
+        return (
+            f"<t:{int(created_at.timestamp())}:R> {label}\n"
+            f"**{sign}{self.format_coins(abs(entry.amount))}** coins → {self.format_coins(entry.balance_after)}"
+        )
+    
+    @app_commands.command(name="history", description="Affiche l'historique de ton portefeuille")
+    async def history(self, interaction: discord.Interaction):
+        """Historique des mouvements, du plus récent au plus ancien"""
+        per_page = 10
+        cog = self
+        # Les mouvements en attente d'écriture font partie de l'historique
+        await self.bot.db.ledger.flush()
+        
+        class HistoryView(discord.ui.View):
+            def __init__(self):
+                super().__init__(timeout=120)
+                # entry_id de départ de chaque page vue (None = plus récent)
+                self.starts = [None]
+                self.entries = []
+                self.has_more = False
+            
+            async def load(self):
+                entries = await cog.bot.db.ledger_entries.history(
+                    interaction.guild_id, interaction.user.id, self.starts[-1], per_page + 1
+                )
+                self.has_more = len(entries) > per_page
+                self.entries = entries[:per_page]
+                self.previous_page.disabled = len(self.starts) == 1
+                self.next_page.disabled = not self.has_more
+            
+            def embed(self) -> discord.Embed:
+                embed = Embeds.create_base_embed(
+                    title=f"📜 Historique de {interaction.user.display_name}",
+                    description="\n\n".join(cog.format_entry(entry) for entry in self.entries)
+                    or "Aucun mouvement enregistré.",
+                    color=0xFFD700  # Or
+                )
+                embed.set_footer(text=f"Page {len(self.starts)}")
+                return embed
+            
+            async def interaction_check(self, button_interaction: discord.Interaction) -> bool:
+                if button_interaction.user.id != interaction.user.id:
+                    await button_interaction.response.send_message("❌ Ce n'est pas ton historique.", ephemeral=True)
+                    return False
+                return True
+            
+            @discord.ui.button(label="Précédent", style=discord.ButtonStyle.secondary, emoji="◀️")
+            async def previous_page(self, button_interaction: discord.Interaction, button: discord.ui.Button):
+                if len(self.starts) > 1:
+                    self.starts.pop()
+                await self.load()
+                await button_interaction.response.edit_message(embed=self.embed(), view=self)
+            
+            @discord.ui.button(label="Suivant", style=discord.ButtonStyle.secondary, emoji="▶️")
+            async def next_page(self, button_interaction: discord.Interaction, button: discord.ui.Button):
+                if self.has_more:
+                    # Page suivante : entrées plus anciennes que la dernière affichée
+                    self.starts.append(self.entries[-1].entry_id)
+                await self.load()
+                await button_interaction.response.edit_message(embed=self.embed(), view=self)
+            
+            async def on_timeout(self):
+                for item in self.children:
+                    item.disabled = True
+                try:
+                    await interaction.edit_original_response(view=self)
+                except discord.HTTPException:
+                    pass
+        
+        try:
+            view = HistoryView()
+            await view.load()
+        except Exception as e:
+            logger.error(f"Erreur historique: {e}")
+            embed = Embeds.error("Erreur", "Impossible de récupérer ton historique. Réessaye plus tard.")
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        
+        await interaction.response.send_message(embed=view.embed(), view=view, ephemeral=True)
+    
+    @app_commands.command(name="ledgeraudit", description="[ADMIN] Compare le solde d'un membre à son journal")
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.describe(user="Membre à vérifier")
+    async def ledgeraudit(self, interaction: discord.Interaction, user: discord.Member):
+        """Recalcule le portefeuille depuis le dernier instantané et le journal"""
+        await self.bot.db.ledger.flush()
+        rebuilt = await self.bot.db.ledger_entries.rebuild(interaction.guild_id, user.id)
+        account = await self.bot.db.economy.get(interaction.guild_id, user.id)
+        actual = account.balance if account else self.bot.db.economy.STARTING_BALANCE
+        
+        if rebuilt == actual:
+            embed = Embeds.success(
+                "Journal cohérent",
+                f"Le portefeuille de {user.mention} (**{self.format_coins(actual)}** coins) correspond au journal."
+            )
+        else:
+            embed = Embeds.warning(
+                "Écart détecté",
+                f"**Portefeuille:** {self.format_coins(actual)} coins\n"
+                f"**Journal:** {self.format_coins(rebuilt)} coins\n"
+                f"**Écart:** {self.format_coins(actual - rebuilt)} coins"
+            )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+    
+    @app_commands.command(name="setbalance", description="[ADMIN] Fixe le portefeuille d'un membre")
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.describe(user="Membre à modifier", amount="Nouveau solde du portefeuille")
+    async def setbalance(self, interaction: discord.Interaction, user: discord.Member, amount: int):
+        """Fixe le portefeuille d'un membre, l'écart étant inscrit au journal"""
+        if amount < 0:
+            embed = Embeds.error(
+                "Montant invalide",
+                "Le solde ne peut pas être négatif."
+            )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        
+        if await self.update_balance(user.id, interaction.guild_id, balance=amount, reference=f"admin:{interaction.user.id}"):
+            embed = Embeds.success(
+                "Solde modifié",
+                f"Le portefeuille de {user.mention} est maintenant de **{self.format_coins(amount)}** coins."
+            )
+        else:
+            embed = Embeds.error("Erreur", "Impossible de modifier ce solde. Réessaye plus tard.")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+    
     @app_commands.command(name="richest", description="Affiche le classement des plus riches")
     @app_commands.describe(page="Numéro de page (10 utilisateurs par page)")
     async def richest(self, interaction: discord.Interaction, page: int = 1):
@@ -495,27 +786,57 @@ class Economy(commands.Cog):
         if page < 1:
             page = 1
         
+        # Position de l'utilisateur actuel, affichée sur chaque page
+        footer = None
         try:
-            await self.bot.db.connect()
+            # Compte ouvert avant le calcul du rang : un membre sans compte serait vu #1
+            account = await self.get_balance(interaction.user.id, interaction.guild_id)
+            user_rank = await self.bot.db.economy.rank_of(interaction.guild_id, interaction.user.id)
+            total_users = await self.bot.db.economy.count(interaction.guild_id)
             
-            async with self.bot.db.connection.cursor() as cursor:
-                # Récupérer tous les comptes du serveur triés par richesse totale
-                await cursor.execute(
-                    """SELECT user_id, balance, bank 
-                    FROM economy 
-                    WHERE guild_id = ? 
-                    ORDER BY (balance + bank) DESC 
-                    LIMIT ? OFFSET ?""",
-                    (interaction.guild_id, 10, (page - 1) * 10)
+            if account:
+                user_total = account["balance"] + account["bank"]
+                position = f"#{user_rank}" if user_rank else "non classé"
+                footer = (
+                    f"Ta position: {position} • {self.format_coins(user_total)} coins • "
+                    f"Total: {total_users} utilisateurs"
                 )
-                results = await cursor.fetchall()
-                
-                # Compter le nombre total d'utilisateurs
-                await cursor.execute(
-                    "SELECT COUNT(*) FROM economy WHERE guild_id = ?",
-                    (interaction.guild_id,)
-                )
-                total_users = (await cursor.fetchone())[0]
+        except Exception as e:
+            logger.error(f"Erreur position utilisateur: {e}")
+        
+        def render(guild: discord.Guild, current: LeaderboardPage, start_rank: int) -> discord.Embed:
+            embed = Embeds.create_base_embed(
+                title="🏆 CLASSEMENT ÉCONOMIQUE",
+                description=f"Les plus riches du serveur • Page {view.index + 1}",
+                color=0xFFD700  # Or
+            )
+            
+            medals = {0: "🥇", 1: "🥈", 2: "🥉"}
+            leaderboard_text = ""
+            for rank, (member, row) in enumerate(current.rows, start_rank):
+                # Médaille pour le top 3
+                medal = medals.get(rank - 1, f"**{rank}.**")
+                leaderboard_text += f"{medal} {member.display_name} • **{self.format_coins(row.total)}** coins\n"
+            
+            embed.add_field(
+                name="💰 Classement",
+                value=leaderboard_text or "Aucun utilisateur",
+                inline=False
+            )
+            if footer:
+                embed.set_footer(text=footer)
+            return embed
+        
+        try:
+            # Comptes triés par richesse totale, membres partis exclus
+            view = LeaderboardView(
+                self.bot.leaderboards,
+                interaction,
+                fetch=self.bot.db.economy.richest_after,
+                key=lambda row: (row.total, row.user_id),
+                render=render
+            )
+            current = await view.skip_to(page)
                 
         except Exception as e:
             logger.error(f"Erreur leaderboard: {e}")
@@ -526,7 +847,7 @@ class Economy(commands.Cog):
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
         
-        if not results:
+        if not current.rows:
             embed = Embeds.info(
                 "Classement vide",
                 "Aucun utilisateur trouvé sur cette page."
@@ -534,61 +855,7 @@ class Economy(commands.Cog):
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
         
-        # Créer l'embed du leaderboard
-        embed = Embeds.create_base_embed(
-            title="🏆 CLASSEMENT ÉCONOMIQUE",
-            description=f"Les plus riches du serveur • Page {page}",
-            color=0xFFD700  # Or
-        )
-        
-        leaderboard_text = ""
-        start_rank = (page - 1) * 10 + 1
-        
-        medals = {0: "🥇", 1: "🥈", 2: "🥉"}
-        
-        for idx, (user_id, balance, bank) in enumerate(results):
-            rank = start_rank + idx
-            total = balance + bank
-            
-            # Récupérer le membre
-            member = interaction.guild.get_member(user_id)
-            username = member.display_name if member else f"Utilisateur {user_id}"
-            
-            # Médaille pour le top 3
-            medal = medals.get(rank - 1, f"**{rank}.**")
-            
-            leaderboard_text += f"{medal} {username} • **{self.format_coins(total)}** coins\n"
-        
-        embed.add_field(
-            name="💰 Classement",
-            value=leaderboard_text or "Aucun utilisateur",
-            inline=False
-        )
-        
-        # Afficher la position de l'utilisateur actuel
-        try:
-            async with self.bot.db.connection.cursor() as cursor:
-                await cursor.execute(
-                    """SELECT COUNT(*) FROM economy 
-                    WHERE guild_id = ? AND (balance + bank) > (
-                        SELECT (balance + bank) FROM economy 
-                        WHERE user_id = ? AND guild_id = ?
-                    )""",
-                    (interaction.guild_id, interaction.user.id, interaction.guild_id)
-                )
-                user_rank = (await cursor.fetchone())[0] + 1
-                
-                account = await self.get_balance(interaction.user.id, interaction.guild_id)
-                if account:
-                    user_total = account["balance"] + account["bank"]
-                    embed.set_footer(
-                        text=f"Ta position: #{user_rank} • {self.format_coins(user_total)} coins • "
-                        f"Total: {total_users} utilisateurs"
-                    )
-        except Exception as e:
-            logger.error(f"Erreur position utilisateur: {e}")
-        
-        await interaction.response.send_message(embed=embed)
+        await interaction.response.send_message(embed=view.embed(), view=view)
 
 async def setup(bot):
     await bot.add_cog(Economy(bot))
\ No newline at end of file
@@ -45,6 +45,82 @@ class Help(commands.Cog):
         
         await ctx.send(embed=embed)
     
+    @commands.command(name="dbstats")
+    @commands.is_owner()
+    async def db_stats(self, ctx, sort: str = "total_ms"):
+        """Requêtes SQL les plus coûteuses (réservé au propriétaire)"""
+        
+        db = self.bot.db
+        report = db.query_report(limit=8, sort=sort)
+        
+        embed = Embeds.info(
+            "Statistiques base de données",
+            f"**Backend :** {db.dialect}\n"
+            f"**Empreintes suivies :** {len(db.metrics.queries)}\n"
+            f"**Requêtes lentes :** {db.metrics.slow_queries} "
+            f"(> {db.metrics.slow_threshold * 1000:.0f} ms)"
+        )
+        
+        for entry in report:
+            sql = entry["sql"] if len(entry["sql"]) <= 200 else entry["sql"][:197] + "..."
+            embed.add_field(
+                name=f"{entry['count']} appels • {entry['total_ms']} ms au total",
+                value=(
+                    f"p50 {entry['p50_ms']} • p95 {entry['p95_ms']} • p99 {entry['p99_ms']} ms • "
+                    f"{entry['avg_rows']} lignes/appel\n```sql\n{sql}\n```"
+                ),
+                inline=False
+            )
+        
+        if not report:
+            embed.add_field(name="📭 Aucune requête", value="Rien n'a encore été mesuré.", inline=False)
+        
+        economy = self.bot.get_cog("Economy")
+        if economy:
+            cache = economy.accounts.stats()
+            embed.add_field(
+                name="💰 Cache des comptes",
+                value=(
+                    f"{cache['entries']}/{cache['max_entries']} comptes • "
+                    f"succès {cache['hit_rate'] * 100:.1f} % • {cache['evicted']} évincés"
+                ),
+                inline=False
+            )
+            locks = economy.locks.stats()
+            embed.add_field(
+                name="🔒 Verrous des comptes",
+                value=(
+                    f"{locks['stripes']} verrous • {locks['acquisitions']} acquisitions • "
+                    f"attente {locks['contention_rate'] * 100:.1f} % "
+                    f"(moy. {locks['avg_wait_ms']} ms, max {locks['max_wait_ms']} ms)"
+                ),
+                inline=False
+            )
+        
+        pool = db.pool_stats()
+        if pool:
+            embed.set_footer(text=" • ".join(f"{key}: {value}" for key, value in pool.items() if not isinstance(value, dict)))
+        
+        await ctx.send(embed=embed)
+    
+    @commands.command(name="dbbackup")
+    @commands.is_owner()
+    async def db_backup(self, ctx):
+        """Lance une sauvegarde à chaud de la base (réservé au propriétaire)"""
+        
+        try:
+            files = await self.bot.db.backup()
+        except Exception as e:
+            await ctx.send(embed=Embeds.error("Sauvegarde échouée", str(e)))
+            return
+        
+        if not files:
+            await ctx.send(embed=Embeds.warning("Sauvegarde", "Aucun fichier SQLite à sauvegarder."))
+            return
+        
+        listing = "\n".join(f"`{path.name}` ({path.stat().st_size // 1024} Kio)" for path in files)
+        await ctx.send(embed=Embeds.success("Sauvegarde terminée", f"Vérifiée et compressée :\n{listing}"))
+    
     @commands.command(name='testcommands')
     async def test_commands(self, ctx):
         """Affiche toutes les commandes détectées par le bot"""
@@ -5,8 +5,20 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 from datetime import datetime, timedelta
+import asyncio
+import functools
+import io
 import random
+from typing import Dict, Optional
+from core.embeds import Embeds
+from core.leaderboards import LeaderboardPage, LeaderboardView
+from core.rank_cards import RankCardRenderer
+from core.repositories import SeasonRow, XPRollupRepo
+from core.role_sync import RoleChange, RoleUpdateQueue, diff_member_roles, manageable_roles
 from core.logger import setup_logger
+from utils.cooldowns import CooldownStore
+from models.leveling import LevelConfig, LevelReward
+from utils.level_curves import DEFAULT_CURVE, LevelCurve, parse_curve
 
 logger = setup_logger("Leveling")
 
@@ -15,15 +27,131 @@ class Leveling(commands.Cog):
     
     def __init__(self, bot):
         self.bot = bot
-        self.xp_cooldown = {}
+        # Cooldown de 5 secondes entre chaque gain d'XP, par (membre, serveur)
+        self.xp_cooldown = CooldownStore(5)
+        # Courbe de niveaux compilée de chaque serveur
+        self.curves: Dict[int, LevelCurve] = {}
+        # Cartes de rang (Pillow, processus séparés) et leurs caches
+        self.cards = RankCardRenderer()
+        # Échantillonnage périodique des salons vocaux
+        self.voice_task: Optional[asyncio.Task] = None
+        # Rôles récompenses de chaque serveur et file d'attribution
+        self.rewards: Dict[int, LevelConfig] = {}
+        self.role_queue = RoleUpdateQueue()
+        self.reconcile_task: Optional[asyncio.Task] = None
     
-    def calculate_level(self, xp: int) -> int:
-        """Calcule le niveau en fonction de l'XP"""
-        return int((xp / 100) ** 0.5)
+    async def cog_load(self):
+        """Démarre l'échantillonnage de l'XP vocale et la file des rôles"""
+        if self.bot.config.voice_xp_interval > 0:
+            self.voice_task = asyncio.create_task(self._voice_loop())
+        self.role_queue.start()
+        self.reconcile_task = asyncio.create_task(self._reconcile_on_startup())
     
-    def xp_for_level(self, level: int) -> int:
-        """Calcule l'XP nécessaire pour un niveau"""
-        return (level ** 2) * 100
+    async def cog_unload(self):
+        """Arrête les tâches, les processus de rendu et la session HTTP des avatars"""
+        for task in (self.voice_task, self.reconcile_task):
+            if task:
+                task.cancel()
+        self.voice_task = self.reconcile_task = None
+        await self.role_queue.close()
+        await self.cards.close()
+    
+    async def _voice_loop(self):
+        """Un échantillon de tous les salons vocaux par intervalle"""
+        await self.bot.wait_until_ready()
+        while True:
+            await asyncio.sleep(self.bot.config.voice_xp_interval)
+            for guild in self.bot.guilds:
+                try:
+                    await self.award_voice_xp(guild)
+                except Exception as e:
+                    logger.error(f"Erreur XP vocale ({guild.id}): {e}")
+    
+    @staticmethod
+    def voice_eligible(guild: discord.Guild) -> Dict[int, discord.VoiceChannel]:
+        """
+        Membres qui gagnent de l'XP vocale, avec leur salon
+        
+        Exclus : salon AFK, bots, membres muets ou sourds (eux-mêmes ou par
+        un modérateur) et membres seuls avec personne d'éligible.
+        """
+        eligible: Dict[int, discord.VoiceChannel] = {}
+        for channel in guild.voice_channels:
+            if channel == guild.afk_channel:
+                continue
+            
+            speakers = [
+                member for member in channel.members
+                if not member.bot and member.voice
+                and not (member.voice.self_mute or member.voice.mute
+                         or member.voice.self_deaf or member.voice.deaf)
+            ]
+            if len(speakers) < 2:
+                continue
+            for member in speakers:
+                eligible[member.id] = channel
+        return eligible
+    
+    async def award_voice_xp(self, guild: discord.Guild):
+        """Crédite l'XP vocale d'un serveur en un seul ajout groupé"""
+        eligible = self.voice_eligible(guild)
+        if not eligible:
+            return
+        
+        # Écrit avec le prochain lot de XPBuffer (un executemany pour le serveur)
+        rows = await self.bot.db.xp.add_many(guild.id, list(eligible), self.bot.config.voice_xp_amount, datetime.utcnow())
+        
+        curve = await self.get_curve(guild.id)
+        for user in rows:
+            new_level = curve.level_for(user.xp)
+            if new_level > user.level:
+                member = guild.get_member(user.user_id)
+                if member:
+                    await self.level_up(member, user.level, new_level, eligible[user.user_id])
+                else:
+                    self.bot.db.xp.set_level(guild.id, user.user_id, new_level)
+    
+    async def get_curve(self, guild_id: int) -> LevelCurve:
+        """Courbe de niveaux du serveur (chargée une fois, puis en mémoire)"""
+        curve = self.curves.get(guild_id)
+        if curve is None:
+            config = await self.bot.db.guilds.get(guild_id)
+            try:
+                curve = parse_curve(config.level_curve if config else None)
+            except ValueError as e:
+                logger.warning(f"Courbe invalide pour {guild_id} ({e}), courbe par défaut utilisée")
+                curve = parse_curve(DEFAULT_CURVE)
+            self.curves[guild_id] = curve
+        return curve
+    
+    async def end_season(self, guild: discord.Guild) -> SeasonRow:
+        """
+        Archive les totaux du serveur dans une nouvelle saison et remet
+        l'XP et les niveaux à zéro (deux requêtes ensemblistes)
+        """
+        # Gains en attente écrits avant l'archivage, aucun lot pendant la
+        # remise à zéro, totaux d'avant la saison oubliés ensuite
+        async with self.bot.db.xp.exclusive(guild.id):
+            season = await self.bot.db.seasons.end(guild.id, datetime.utcnow())
+        self.bot.db.leaderboard.invalidate(guild.id)
+        
+        # Niveaux à zéro : retirer les rôles récompenses
+        await self.reconcile_rewards(guild)
+        return season
+    
+    async def recompute_levels(self, guild_id: int, curve: LevelCurve) -> int:
+        """
+        Recalcule le niveau de tous les membres après un changement de courbe
+        
+        Returns:
+            int: Nombre de membres dont le niveau a changé
+        """
+        # Gains en attente écrits avant la mise à jour ensembliste ; ceux
+        # arrivés pendant perdent leur niveau, calculé sur l'ancienne courbe
+        async with self.bot.db.xp.exclusive(guild_id):
+            changed = await self.bot.db.users.recompute_levels(guild_id, curve)
+        self.bot.db.leaderboard.invalidate(guild_id)
+        return changed
     
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
@@ -31,100 +159,101 @@ class Leveling(commands.Cog):
         if message.author.bot or not message.guild:
             return
         
-        # Cooldown de 5 secondes entre chaque gain d'XP
-        user_key = f"{message.author.id}_{message.guild.id}"
-        now = datetime.utcnow()
-        
-        if user_key in self.xp_cooldown:
-            if now - self.xp_cooldown[user_key] < timedelta(seconds=5):
-                return
+        if not self.xp_cooldown.try_acquire((message.author.id, message.guild.id)):
+            return
         
-        self.xp_cooldown[user_key] = now
+        now = datetime.utcnow()
         
         # Gain d'XP aléatoire entre 10 et 20
         xp_gain = random.randint(10, 20)
         
         try:
-            await self.bot.db.connect()
+            # Gain agrégé en mémoire, écrit avec le prochain lot
+            user = await self.bot.db.xp.add(message.guild.id, message.author.id, xp_gain, now)
             
-            async with self.bot.db.connection.cursor() as cursor:
-                # Vérifier si l'utilisateur existe déjà
-                await cursor.execute(
-                    "SELECT xp, level, messages FROM users WHERE user_id = ? AND guild_id = ?",
-                    (message.author.id, message.guild.id)
-                )
-                result = await cursor.fetchone()
-                
-                if not result:
-                    # Créer un nouvel utilisateur
-                    await cursor.execute(
-                        """INSERT INTO users 
-                        (user_id, guild_id, xp, level, messages, created_at) 
-                        VALUES (?, ?, ?, ?, ?, ?)""",
-                        (message.author.id, message.guild.id, xp_gain, 0, 1, now)
-                    )
-                    old_level = 0
-                    new_xp = xp_gain
-                    messages_count = 1
-                else:
-                    old_xp, old_level, messages_count = result
-                    new_xp = old_xp + xp_gain
-                    messages_count += 1
-                    
-                    # Mettre à jour l'utilisateur
-                    await cursor.execute(
-                        """UPDATE users 
-                        SET xp = ?, messages = ?, last_message = ? 
-                        WHERE user_id = ? AND guild_id = ?""",
-                        (new_xp, messages_count, now, message.author.id, message.guild.id)
-                    )
-                
-                # Vérifier si le niveau a augmenté
-                new_level = self.calculate_level(new_xp)
-                if new_level > old_level:
-                    # Mettre à jour le niveau
-                    await cursor.execute(
-                        "UPDATE users SET level = ? WHERE user_id = ? AND guild_id = ?",
-                        (new_level, message.author.id, message.guild.id)
-                    )
-                    
-                    # Envoyer le message de level up
-                    await self.send_levelup_message(message, new_level)
-                
-                await self.bot.db.connection.commit()
-                
+            # Vérifier si le niveau a augmenté (sur les totaux en mémoire)
+            curve = await self.get_curve(message.guild.id)
+            new_level = curve.level_for(user.xp)
+            if new_level > user.level:
+                await self.level_up(message.author, user.level, new_level, message.channel)
+        
         except Exception as e:
             logger.error(f"Erreur lors du traitement du message pour l'XP: {e}")
     
-    async def send_levelup_message(self, message: discord.Message, level: int):
+    async def level_up(self, member: discord.Member, old_level: int, new_level: int, channel: discord.abc.Messageable):
+        """Enregistre un passage de niveau, donne les rôles débloqués et l'annonce"""
+        self.bot.db.xp.set_level(member.guild.id, member.id, new_level)
+        
+        # Rôles des seuils franchis (recherche dichotomique dans la config)
+        config = await self.get_rewards(member.guild.id)
+        unlocked = set(config.roles_between(old_level, new_level)) & manageable_roles(member.guild, config)
+        if unlocked:
+            self.role_queue.submit(RoleChange(member, add=unlocked))
+        
+        await self.send_levelup_message(member, new_level, channel)
+    
+    async def get_rewards(self, guild_id: int) -> LevelConfig:
+        """Rôles récompenses du serveur (chargés une fois, puis en mémoire)"""
+        config = self.rewards.get(guild_id)
+        if config is None:
+            rows = await self.bot.db.level_rewards.list(guild_id)
+            config = LevelConfig(guild_id, [LevelReward(guild_id, level, role_id) for level, role_id in rows])
+            self.rewards[guild_id] = config
+        return config
+    
+    async def reconcile_rewards(self, guild: discord.Guild) -> int:
+        """
+        Compare les rôles attendus aux rôles réels de tous les membres et
+        met en file uniquement les écarts
+        
+        Returns:
+            int: Nombre de membres à corriger
+        """
+        config = await self.get_rewards(guild.id)
+        if not config:
+            return 0
+        
+        # Niveaux à jour : écrire d'abord les gains en attente
+        await self.bot.db.xp.flush()
+        levels = {user_id: level for user_id, _, level in await self.bot.db.users.xp_totals(guild.id)}
+        
+        changes = diff_member_roles(guild.members, levels, config, manageable_roles(guild, config))
+        for change in changes:
+            self.role_queue.submit(change)
+        return len(changes)
+    
+    async def _reconcile_on_startup(self):
+        """Réconcilie les rôles récompenses de chaque serveur au démarrage"""
+        await self.bot.wait_until_ready()
+        for guild in self.bot.guilds:
+            try:
+                changed = await self.reconcile_rewards(guild)
+                if changed:
+                    logger.info(f"🎖️ {changed} membres à corriger sur {guild.name}")
+            except Exception as e:
+                logger.error(f"Erreur réconciliation des récompenses ({guild.id}): {e}")
+    
+    async def send_levelup_message(self, member: discord.Member, level: int, channel: discord.abc.Messageable):
         """Envoie un message de montée de niveau"""
         try:
-            await self.bot.db.connect()
+            # Chercher un canal personnalisé pour les level up
+            guild_config = await self.bot.db.guilds.get(member.guild.id)
             
-            async with self.bot.db.connection.cursor() as cursor:
-                # Chercher un canal personnalisé pour les level up
-                await cursor.execute(
-                    "SELECT level_up_channel_id FROM guilds WHERE guild_id = ?",
-                    (message.guild.id,)
-                )
-                result = await cursor.fetchone()
-                
-                embed = discord.Embed(
-                    title="🎉 Level Up!",
-                    description=f"{message.author.mention} vient d'atteindre le **niveau {level}** !",
-                    color=discord.Color.gold()
-                )
-                embed.set_thumbnail(url=message.author.display_avatar.url)
-                
-                # Canal personnalisé ou canal actuel
-                channel = message.channel
-                if result and result[0]:  # level_up_channel_id
-                    custom_channel = message.guild.get_channel(result[0])
-                    if custom_channel:
-                        channel = custom_channel
-                
-                await channel.send(embed=embed)
-                
+            embed = discord.Embed(
+                title="🎉 Level Up!",
+                description=f"{member.mention} vient d'atteindre le **niveau {level}** !",
+                color=discord.Color.gold()
+            )
+            embed.set_thumbnail(url=member.display_avatar.url)
+            
+            # Canal personnalisé ou canal de l'activité
+            if guild_config and guild_config.level_up_channel_id:
+                custom_channel = member.guild.get_channel(guild_config.level_up_channel_id)
+                if custom_channel:
+                    channel = custom_channel
+            
+            await channel.send(embed=embed)
+        
         except Exception as e:
             logger.error(f"Erreur lors de l'envoi du message de level up: {e}")
     
@@ -135,56 +264,82 @@ class Leveling(commands.Cog):
         target = user or interaction.user
         
         try:
-            await self.bot.db.connect()
+            result = await self.bot.db.xp.get(interaction.guild_id, target.id)
             
-            async with self.bot.db.connection.cursor() as cursor:
-                await cursor.execute(
-                    "SELECT xp, level, messages FROM users WHERE user_id = ? AND guild_id = ?",
-                    (target.id, interaction.guild_id)
-                )
-                result = await cursor.fetchone()
-                
-                if not result:
-                    await interaction.response.send_message(
-                        f"{target.mention} n'a pas encore d'XP sur ce serveur.",
-                        ephemeral=True
-                    )
-                    return
-                
-                xp, level, messages = result
-                
-                current_level_xp = self.xp_for_level(level)
-                next_level_xp = self.xp_for_level(level + 1)
-                xp_needed = next_level_xp - xp if xp < next_level_xp else 0
-                
-                if next_level_xp - current_level_xp > 0:
-                    progress = ((xp - current_level_xp) / (next_level_xp - current_level_xp)) * 100
-                    progress = min(progress, 100)
-                else:
-                    progress = 100
-                
-                # Barre de progression
-                filled = int(progress // 5)
-                empty = 20 - filled
-                progress_bar = "█" * filled + "░" * empty
-                
-                embed = discord.Embed(
-                    title=f"📊 Niveau de {target.display_name}",
-                    color=discord.Color.blue()
+            if not result:
+                await interaction.response.send_message(
+                    f"{target.mention} n'a pas encore d'XP sur ce serveur.",
+                    ephemeral=True
                 )
-                embed.set_thumbnail(url=target.display_avatar.url)
-                embed.add_field(name="Niveau", value=f"**{level}**", inline=True)
-                embed.add_field(name="XP Total", value=f"**{xp:,}**", inline=True)
-                embed.add_field(name="Messages", value=f"**{messages:,}**", inline=True)
+                return
+            
+            xp, level, messages = result.xp, result.level, result.messages
+            
+            curve = await self.get_curve(interaction.guild_id)
+            current_level_xp = curve.xp_for(level)
+            next_level_xp = curve.xp_for(level + 1)
+            xp_needed = next_level_xp - xp if xp < next_level_xp else 0
+            
+            if next_level_xp - current_level_xp > 0:
+                progress = ((xp - current_level_xp) / (next_level_xp - current_level_xp)) * 100
+                progress = min(progress, 100)
+            else:
+                progress = 100
+            
+            # Barre de progression
+            filled = int(progress // 5)
+            empty = 20 - filled
+            progress_bar = "█" * filled + "░" * empty
+            
+            embed = discord.Embed(
+                title=f"📊 Niveau de {target.display_name}",
+                color=discord.Color.blue()
+            )
+            embed.set_thumbnail(url=target.display_avatar.url)
+            embed.add_field(name="Niveau", value=f"**{level}**", inline=True)
+            embed.add_field(name="XP Total", value=f"**{xp:,}**", inline=True)
+            embed.add_field(name="Messages", value=f"**{messages:,}**", inline=True)
+            
+            # Position dans le classement en mémoire (à jour au dernier lot écrit)
+            position, ranked = await self.bot.db.leaderboard.rank_of(interaction.guild_id, target.id)
+            if position:
+                embed.add_field(name="Classement", value=f"**#{position}** sur {ranked:,}", inline=True)
+            
+            if not self.cards.available:
                 embed.add_field(
                     name="Progression",
                     value=f"{progress_bar} {progress:.1f}%\n"
                           f"**{xp_needed:,}** XP jusqu'au niveau {level + 1}",
                     inline=False
                 )
-                
                 await interaction.response.send_message(embed=embed)
-                
+                return
+            
+            # Carte de rang dessinée hors de la boucle d'événements (ou servie par le cache)
+            await interaction.response.defer()
+            embed.add_field(
+                name="Progression",
+                value=f"**{xp_needed:,}** XP jusqu'au niveau {level + 1}",
+                inline=False
+            )
+            try:
+                card = await self.cards.render(interaction.guild_id, target, level, progress / 100, position)
+            except Exception as e:
+                logger.error(f"Erreur rendu carte de rang: {e}")
+                embed.set_field_at(
+                    len(embed.fields) - 1,
+                    name="Progression",
+                    value=f"{progress_bar} {progress:.1f}%\n"
+                          f"**{xp_needed:,}** XP jusqu'au niveau {level + 1}",
+                    inline=False
+                )
+                await interaction.followup.send(embed=embed)
+                return
+            
+            embed.set_thumbnail(url=None)
+            embed.set_image(url="attachment://rank.png")
+            await interaction.followup.send(embed=embed, file=discord.File(io.BytesIO(card), filename="rank.png"))
+        
         except Exception as e:
             logger.error(f"Erreur rank command: {e}")
             await interaction.response.send_message(
@@ -193,51 +348,323 @@ class Leveling(commands.Cog):
             )
     
     @app_commands.command(name="leaderboard", description="Affiche le classement du serveur")
-    async def leaderboard(self, interaction: discord.Interaction):
-        """Affiche le top 10 des utilisateurs"""
+    @app_commands.describe(period="Période du classement (depuis toujours par défaut)")
+    @app_commands.choices(period=[
+        app_commands.Choice(name="Depuis toujours", value="all"),
+        app_commands.Choice(name="7 derniers jours", value="week"),
+        app_commands.Choice(name="Ce mois-ci", value="month"),
+    ])
+    async def leaderboard(self, interaction: discord.Interaction, period: str = "all"):
+        """Affiche le classement XP, 10 membres par page"""
+        try:
+            if period == "all":
+                fetch = self.bot.db.leaderboard.after
+            else:
+                # Somme des cumuls journaliers de la période (jamais l'historique brut)
+                today = datetime.utcnow().date()
+                start = today - timedelta(days=6) if period == "week" else today.replace(day=1)
+                since = XPRollupRepo.day_key(start)
+                
+                async def fetch(guild_id, cursor, limit):
+                    return await self.bot.db.xp_rollups.top_since(guild_id, since, cursor, limit)
+            
+            view = LeaderboardView(
+                self.bot.leaderboards,
+                interaction,
+                fetch=fetch,
+                key=lambda entry: (entry.xp, entry.user_id),
+                render=functools.partial(self.render_leaderboard, period)
+            )
+            page = await view.load()
+            
+            if not page.rows:
+                await interaction.response.send_message(
+                    "Aucun utilisateur n'a encore d'XP sur ce serveur."
+                    if period == "all" else "Aucun utilisateur n'a gagné d'XP sur cette période.",
+                    ephemeral=True
+                )
+                return
+            
+            await interaction.response.send_message(embed=view.embed(), view=view)
+        
+        except Exception as e:
+            logger.error(f"Erreur leaderboard command: {e}")
+            await interaction.response.send_message(
+                f"❌ Erreur: {str(e)[:100]}",
+                ephemeral=True
+            )
+    
+    def render_leaderboard(
+        self,
+        period: str,
+        guild: discord.Guild,
+        page: LeaderboardPage,
+        start_rank: int
+    ) -> discord.Embed:
+        """Embed d'une page du classement XP"""
+        titles = {"week": " (7 derniers jours)", "month": " (ce mois-ci)"}
+        embed = discord.Embed(
+            title=f"🏆 Classement de {guild.name}{titles.get(period, '')}",
+            color=discord.Color.gold()
+        )
+        
+        medals = ["🥇", "🥈", "🥉"]
+        for i, (member, entry) in enumerate(page.rows, start_rank):
+            medal = medals[i-1] if i <= 3 else f"#{i}"
+            if period == "all":
+                value = f"Niveau: **{entry.level}** | XP: **{entry.xp:,}**"
+            else:
+                value = f"XP gagnée: **{entry.xp:,}**"
+            embed.add_field(name=f"{medal} {member.display_name}", value=value, inline=False)
+        
+        if not page.rows:
+            embed.description = "Aucun membre sur cette page."
+        return embed
+    
+    @app_commands.command(name="levelcurve", description="[ADMIN] Change la courbe de niveaux du serveur")
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.describe(
+        curve="Forme de la courbe",
+        params="quadratic : facteur (100 par défaut) • table : XP cumulée des niveaux 1, 2, 3... (ex: 100,300,600)"
+    )
+    @app_commands.choices(curve=[
+        app_commands.Choice(name="Quadratique (100 × niveau²)", value="quadratic"),
+        app_commands.Choice(name="Style MEE6 (5n² + 50n + 100 par niveau)", value="mee6"),
+        app_commands.Choice(name="Table de seuils", value="table"),
+    ])
+    async def level_curve(self, interaction: discord.Interaction, curve: str, params: str = None):
+        """Change la courbe de niveaux et recalcule le niveau de tous les membres"""
+        spec = f"{curve}:{params}" if params else curve
+        try:
+            compiled = parse_curve(spec)
+        except ValueError as e:
+            embed = Embeds.error("Courbe invalide", str(e))
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        
+        await interaction.response.defer(ephemeral=True)
+        
+        try:
+            await self.bot.db.guilds.set(interaction.guild_id, "level_curve", compiled.spec)
+            self.curves[interaction.guild_id] = compiled
+            changed = await self.recompute_levels(interaction.guild_id, compiled)
+            if changed:
+                # Les niveaux ont bougé : aligner les rôles récompenses
+                await self.reconcile_rewards(interaction.guild)
+        except Exception as e:
+            logger.error(f"Erreur changement de courbe: {e}")
+            await interaction.followup.send(
+                embed=Embeds.error("Erreur", "Impossible de changer la courbe de niveaux."),
+                ephemeral=True
+            )
+            return
+        
+        examples = " • ".join(f"niv. {level} : {compiled.xp_for(level):,} XP" for level in (1, 5, 10, 25))
+        embed = Embeds.success(
+            "Courbe de niveaux mise à jour",
+            f"Courbe : `{compiled.spec}`\n{examples}\n\n**{changed:,}** membre(s) ont changé de niveau."
+        )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+    
+    @app_commands.command(name="levelreward", description="[ADMIN] Associe un rôle à un niveau (sans rôle : retire la récompense)")
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.describe(level="Niveau à atteindre", role="Rôle donné à ce niveau")
+    async def level_reward(self, interaction: discord.Interaction, level: app_commands.Range[int, 1, 1000], role: discord.Role = None):
+        """Ajoute, remplace ou retire le rôle récompense d'un niveau"""
+        guild = interaction.guild
+        
+        if role is not None and (role.managed or role >= guild.me.top_role):
+            embed = Embeds.error(
+                "Rôle impossible à attribuer",
+                f"{role.mention} est géré par une intégration ou placé au-dessus de mon rôle."
+            )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        
+        await interaction.response.defer(ephemeral=True)
+        
+        try:
+            if role is None:
+                removed = await self.bot.db.level_rewards.remove(guild.id, level)
+                embed = (
+                    Embeds.success("Récompense retirée", f"Plus de rôle au niveau **{level}**.")
+                    if removed else Embeds.warning("Aucune récompense", f"Aucun rôle n'est associé au niveau **{level}**.")
+                )
+            else:
+                await self.bot.db.level_rewards.set(guild.id, level, role.id)
+                embed = Embeds.success("Récompense enregistrée", f"{role.mention} sera donné au niveau **{level}**.")
+            
+            # Recharger la config puis aligner les membres déjà au-dessus du seuil
+            self.rewards.pop(guild.id, None)
+            changed = await self.reconcile_rewards(guild)
+            if changed:
+                embed.add_field(name="Synchronisation", value=f"{changed:,} membre(s) mis à jour", inline=False)
+        except Exception as e:
+            logger.error(f"Erreur configuration des récompenses: {e}")
+            embed = Embeds.error("Erreur", "Impossible d'enregistrer la récompense.")
+        
+        await interaction.followup.send(embed=embed, ephemeral=True)
+    
+    @app_commands.command(name="levelrewards", description="Liste les rôles donnés par niveau")
+    async def level_rewards(self, interaction: discord.Interaction):
+        """Affiche les rôles récompenses du serveur"""
+        config = await self.get_rewards(interaction.guild_id)
+        if not config:
+            embed = Embeds.info("Récompenses de niveau", "Aucun rôle n'est donné par niveau sur ce serveur.")
+        else:
+            lines = [
+                f"Niveau **{reward.level}** → <@&{reward.role_id}>"
+                for reward in config.rewards
+            ]
+            embed = Embeds.info("Récompenses de niveau", "\n".join(lines))
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+    
+    @app_commands.command(name="syncrewards", description="[ADMIN] Resynchronise les rôles récompenses de tous les membres")
+    @app_commands.default_permissions(administrator=True)
+    async def sync_rewards(self, interaction: discord.Interaction):
+        """Réconciliation à la demande des rôles récompenses"""
+        await interaction.response.defer(ephemeral=True)
         try:
-            await self.bot.db.connect()
-            
-            async with self.bot.db.connection.cursor() as cursor:
-                await cursor.execute(
-                    """SELECT user_id, xp, level 
-                    FROM users 
-                    WHERE guild_id = ? 
-                    ORDER BY xp DESC 
-                    LIMIT 10""",
-                    (interaction.guild_id,)
+            changed = await self.reconcile_rewards(interaction.guild)
+        except Exception as e:
+            logger.error(f"Erreur synchronisation des récompenses: {e}")
+            await interaction.followup.send(
+                embed=Embeds.error("Erreur", "Impossible de synchroniser les récompenses."),
+                ephemeral=True
+            )
+            return
+        
+        embed = Embeds.success(
+            "Synchronisation lancée",
+            f"**{changed:,}** membre(s) à corriger, traités progressivement."
+            if changed else "Tous les rôles récompenses sont déjà à jour."
+        )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+    
+    season = app_commands.Group(name="season", description="Saisons de niveaux")
+    
+    @staticmethod
+    def format_ended(ended_at) -> str:
+        """Date de fin en timestamp Discord (SQLite la renvoie en texte)"""
+        if isinstance(ended_at, str):
+            ended_at = datetime.fromisoformat(ended_at.replace('Z', '+00:00'))
+        return f"<t:{int(ended_at.timestamp())}:R>"
+    
+    @season.command(name="end", description="[ADMIN] Termine la saison : archive le classement et remet l'XP à zéro")
+    async def season_end(self, interaction: discord.Interaction):
+        """Termine la saison en cours après confirmation"""
+        if not interaction.user.guild_permissions.administrator:
+            embed = Embeds.error("Permission refusée", "Seuls les administrateurs peuvent terminer une saison.")
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        
+        cog = self
+        
+        class ConfirmView(discord.ui.View):
+            def __init__(self):
+                super().__init__(timeout=60)
+            
+            @discord.ui.button(label="Terminer la saison", style=discord.ButtonStyle.danger, emoji="🏁")
+            async def confirm(self, button_interaction: discord.Interaction, button: discord.ui.Button):
+                if button_interaction.user.id != interaction.user.id:
+                    await button_interaction.response.send_message("❌ Ce n'est pas ta commande.", ephemeral=True)
+                    return
+                self.stop()
+                await button_interaction.response.edit_message(
+                    embed=Embeds.info("Saison", "Archivage en cours..."),
+                    view=None
                 )
-                results = await cursor.fetchall()
                 
-                if not results:
-                    await interaction.response.send_message(
-                        "Aucun utilisateur n'a encore d'XP sur ce serveur.",
-                        ephemeral=True
+                try:
+                    season = await cog.end_season(interaction.guild)
+                except Exception as e:
+                    logger.error(f"Erreur fin de saison: {e}")
+                    await interaction.edit_original_response(
+                        embed=Embeds.error("Erreur", "Impossible de terminer la saison.")
                     )
                     return
                 
-                embed = discord.Embed(
-                    title=f"🏆 Classement de {interaction.guild.name}",
-                    color=discord.Color.gold()
+                await interaction.edit_original_response(embed=Embeds.success(
+                    f"Saison {season.number} terminée",
+                    f"**{season.members:,}** membre(s) archivés. L'XP et les niveaux repartent de zéro.\n"
+                    f"Classement : `/season leaderboard number:{season.number}`"
+                ))
+            
+            @discord.ui.button(label="Annuler", style=discord.ButtonStyle.secondary)
+            async def cancel(self, button_interaction: discord.Interaction, button: discord.ui.Button):
+                self.stop()
+                await button_interaction.response.edit_message(
+                    embed=Embeds.info("Saison", "Fin de saison annulée."),
+                    view=None
                 )
-                
-                medals = ["🥇", "🥈", "🥉"]
-                for i, row in enumerate(results, 1):
-                    user_id, xp, level = row
-                    member = interaction.guild.get_member(user_id)
-                    
-                    if member:
-                        medal = medals[i-1] if i <= 3 else f"#{i}"
-                        embed.add_field(
-                            name=f"{medal} {member.display_name}",
-                            value=f"Niveau: **{level}** | XP: **{xp:,}**",
-                            inline=False
-                        )
-                
-                await interaction.response.send_message(embed=embed)
-                
+        
+        embed = Embeds.warning(
+            "Terminer la saison ?",
+            "Le classement actuel sera archivé puis l'XP et les niveaux de tous les membres remis à zéro. "
+            "Les rôles récompenses seront retirés."
+        )
+        await interaction.response.send_message(embed=embed, view=ConfirmView(), ephemeral=True)
+    
+    @season.command(name="list", description="Liste les saisons terminées")
+    async def season_list(self, interaction: discord.Interaction):
+        """Affiche les dernières saisons du serveur"""
+        seasons = await self.bot.db.seasons.list(interaction.guild_id)
+        if not seasons:
+            embed = Embeds.info("Saisons", "Aucune saison n'a encore été terminée sur ce serveur.")
+        else:
+            lines = [
+                f"**Saison {season.number}** • terminée {self.format_ended(season.ended_at)} • {season.members:,} membres"
+                for season in seasons
+            ]
+            embed = Embeds.info("Saisons", "\n".join(lines))
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+    
+    @season.command(name="leaderboard", description="Classement archivé d'une saison")
+    @app_commands.describe(number="Numéro de la saison (la dernière par défaut)")
+    async def season_leaderboard(self, interaction: discord.Interaction, number: int = None):
+        """Affiche le classement d'une saison terminée"""
+        try:
+            if number is None:
+                latest = await self.bot.db.seasons.list(interaction.guild_id, limit=1)
+                season = latest[0] if latest else None
+            else:
+                season = await self.bot.db.seasons.get(interaction.guild_id, number)
+            
+            if season is None:
+                await interaction.response.send_message(
+                    embed=Embeds.error("Saison introuvable", "Aucune saison terminée ne correspond."),
+                    ephemeral=True
+                )
+                return
+            
+            async def fetch(guild_id, cursor, limit):
+                return await self.bot.db.seasons.top(guild_id, season.season_id, cursor, limit)
+            
+            def render(guild: discord.Guild, page: LeaderboardPage, start_rank: int) -> discord.Embed:
+                embed = self.render_leaderboard("all", guild, page, start_rank)
+                embed.title = f"🏆 {guild.name} • Saison {season.number}"
+                return embed
+            
+            view = LeaderboardView(
+                self.bot.leaderboards,
+                interaction,
+                fetch=fetch,
+                key=lambda entry: (entry.xp, entry.user_id),
+                render=render
+            )
+            page = await view.load()
+            
+            if not page.rows:
+                await interaction.response.send_message(
+                    "Aucun membre encore présent n'a participé à cette saison.",
+                    ephemeral=True
+                )
+                return
+            
+            await interaction.response.send_message(embed=view.embed(), view=view)
+        
         except Exception as e:
-            logger.error(f"Erreur leaderboard command: {e}")
+            logger.error(f"Erreur classement de saison: {e}")
             await interaction.response.send_message(
                 f"❌ Erreur: {str(e)[:100]}",
                 ephemeral=True
@@ -9,6 +9,7 @@ import asyncio
 from datetime import datetime, timedelta
 from core.logger import setup_logger
 from core.embeds import Embeds
+from models.economy import TransactionType
 
 logger = setup_logger("Shop")
 
@@ -354,9 +355,20 @@ class Shop(commands.Cog):
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
         
-        # Vérifier le solde
-        account = await economy.get_balance(interaction.user.id, interaction.guild_id)
-        if not account:
+        # Vérifier le solde et débiter en une seule requête conditionnelle
+        try:
+            new_balance = await economy.debit(
+                interaction.user.id,
+                interaction.guild_id,
+                item["price"],
+                TransactionType.SHOP_PURCHASE,
+                reference=item_id
+            )
+            if new_balance is None:
+                account = await economy.get_balance(interaction.user.id, interaction.guild_id)
+                balance = account["balance"] if account else 0
+        except Exception as e:
+            logger.error(f"Erreur débit achat: {e}")
             embed = Embeds.error(
                 "Compte introuvable",
                 "Ton compte économique n'a pas été trouvé."
@@ -364,23 +376,19 @@ class Shop(commands.Cog):
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
         
-        if account["balance"] < item["price"]:
-            missing = item["price"] - account["balance"]
+        if new_balance is None:
+            missing = item["price"] - balance
             embed = Embeds.warning(
                 "Fonds insuffisants",
                 f"**Prix:** {self.format_price(item['price'])} coins\n"
-                f"**Ton solde:** {self.format_price(account['balance'])} coins\n"
+                f"**Ton solde:** {self.format_price(balance)} coins\n"
                 f"**Il te manque:** {self.format_price(missing)} coins\n\n"
                 f"💡 **Astuce:** Utilise `/daily` pour gagner des coins !"
             )
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
         
-        # Débiter l'utilisateur
-        new_balance = account["balance"] - item["price"]
-        await economy.update_balance(interaction.user.id, interaction.guild_id, balance=new_balance)
-        
-        # Donner l'item
+        # Donner l'item (hors transaction : appels à Discord)
         success = await self.deliver_item(interaction, item_id, item)
         
         if success:
@@ -388,8 +396,14 @@ class Shop(commands.Cog):
             embed = self.create_purchase_success_embed(item, new_balance)
             await interaction.response.send_message(embed=embed)
         else:
-            # Erreur lors de la livraison - rembourser
-            await economy.update_balance(interaction.user.id, interaction.guild_id, balance=account["balance"])
+            # Erreur lors de la livraison - rembourser le prix payé
+            await self.credit(
+                interaction.guild_id,
+                interaction.user.id,
+                item["price"],
+                TransactionType.SHOP_REFUND,
+                reference=item_id
+            )
             
             embed = Embeds.error(
                 "Erreur de livraison",
@@ -398,6 +412,16 @@ class Shop(commands.Cog):
             )
             await interaction.response.send_message(embed=embed, ephemeral=True)
     
+    async def credit(self, guild_id: int, user_id: int, amount: int, kind: TransactionType, reference: str = None):
+        """Crédite le portefeuille d'un membre (une seule requête, inscrite au journal)"""
+        economy = await self.get_economy_cog()
+        if economy:
+            await economy.credit(user_id, guild_id, amount, kind, reference)
+            return
+        
+        balance = await self.bot.db.economy.credit(guild_id, user_id, amount)
+        self.bot.db.ledger.record(guild_id, user_id, kind.value, amount, balance, reference=reference)
+    
     # ==================== LIVRAISON DES ITEMS ====================
     
     async def deliver_item(self, interaction: discord.Interaction, item_id: str, item: dict) -> bool:
@@ -621,10 +645,7 @@ class Shop(commands.Cog):
             if reward_type == "coins":
                 coins = random.randint(100, 300)
                 if economy:
-                    account = await economy.get_balance(interaction.user.id, interaction.guild_id)
-                    if account:
-                        new_balance = account["balance"] + coins
-                        await economy.update_balance(interaction.user.id, interaction.guild_id, balance=new_balance)
+                    await self.credit(interaction.guild_id, interaction.user.id, coins, TransactionType.LOOTBOX, item_id)
                 
                 await interaction.channel.send(
                     f"🎉 {interaction.user.mention} a trouvé **{self.format_price(coins)} coins** dans la boîte !",
@@ -634,10 +655,7 @@ class Shop(commands.Cog):
             elif reward_type == "coins_big":
                 coins = random.randint(400, 500)
                 if economy:
-                    account = await economy.get_balance(interaction.user.id, interaction.guild_id)
-                    if account:
-                        new_balance = account["balance"] + coins
-                        await economy.update_balance(interaction.user.id, interaction.guild_id, balance=new_balance)
+                    await self.credit(interaction.guild_id, interaction.user.id, coins, TransactionType.LOOTBOX, item_id)
                 
                 await interaction.channel.send(
                     f"🎊 **JACKPOT** ! {interaction.user.mention} a trouvé **{self.format_price(coins)} coins** dans la boîte !",
@@ -47,92 +47,76 @@ class TicketModal(discord.ui.Modal, title="Créer un ticket"):
         bot = interaction.client
         
         try:
-            await bot.db.connect()
+            # Vérifier si l'utilisateur a déjà un ticket ouvert
+            existing_ticket = await bot.db.tickets.open_for_user(interaction.guild_id, interaction.user.id)
             
-            async with bot.db.connection.cursor() as cursor:
-                # Vérifier si l'utilisateur a déjà un ticket ouvert
-                await cursor.execute(
-                    """SELECT channel_id FROM tickets 
-                    WHERE guild_id = ? AND user_id = ? AND status = 'open'""",
-                    (interaction.guild_id, interaction.user.id)
-                )
-                existing_ticket = await cursor.fetchone()
-                
-                if existing_ticket:
-                    channel = interaction.guild.get_channel(existing_ticket[0])
-                    if channel:
-                        await interaction.followup.send(
-                            f"❌ Tu as déjà un ticket ouvert: {channel.mention}",
-                            ephemeral=True
-                        )
-                        return
-                
-                # Créer le canal du ticket
-                category = discord.utils.get(interaction.guild.categories, name="Tickets")
-                if not category:
-                    category = await interaction.guild.create_category("Tickets")
-                
-                overwrites = {
-                    interaction.guild.default_role: discord.PermissionOverwrite(read_messages=False),
-                    interaction.user: discord.PermissionOverwrite(read_messages=True, send_messages=True),
-                    interaction.guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True)
-                }
-                
-                # Ajouter les modérateurs
-                for role in interaction.guild.roles:
-                    if role.permissions.manage_messages:
-                        overwrites[role] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
-                
-                ticket_channel = await category.create_text_channel(
-                    name=f"ticket-{interaction.user.name}",
-                    overwrites=overwrites
-                )
-                
-                # Sauvegarder dans la base de données
-                now = datetime.utcnow()
-                await cursor.execute(
-                    """INSERT INTO tickets 
-                    (guild_id, channel_id, user_id, category, description, status, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                    (
-                        interaction.guild_id,
-                        ticket_channel.id,
-                        interaction.user.id,
-                        str(self.subject.value),
-                        str(self.description.value),
-                        "open",
-                        now
+            if existing_ticket:
+                channel = interaction.guild.get_channel(existing_ticket.channel_id)
+                if channel:
+                    await interaction.followup.send(
+                        f"❌ Tu as déjà un ticket ouvert: {channel.mention}",
+                        ephemeral=True
                     )
-                )
-                
-                await bot.db.connection.commit()
-                
-                # Créer l'embed du ticket
-                embed = discord.Embed(
-                    title=f"🎫 Ticket de {interaction.user.display_name}",
-                    color=discord.Color.green()
-                )
-                embed.add_field(name="Sujet", value=self.subject.value, inline=False)
-                embed.add_field(name="Description", value=self.description.value, inline=False)
-                embed.add_field(name="Créé le", value=f"<t:{int(now.timestamp())}:F>", inline=False)
-                embed.set_footer(text=f"ID: {interaction.user.id}")
-                
-                # Ajouter un bouton pour fermer le ticket
-                view = TicketControlView()
-                
-                await ticket_channel.send(
-                    content=f"{interaction.user.mention}",
-                    embed=embed,
-                    view=view
-                )
-                
-                await interaction.followup.send(
-                    f"✅ Ticket créé: {ticket_channel.mention}",
-                    ephemeral=True
-                )
-                
-                logger.info(f"Ticket créé par {interaction.user.name} dans {interaction.guild.name}")
-                
+                    return
+            
+            # Créer le canal du ticket
+            category = discord.utils.get(interaction.guild.categories, name="Tickets")
+            if not category:
+                category = await interaction.guild.create_category("Tickets")
+            
+            overwrites = {
+                interaction.guild.default_role: discord.PermissionOverwrite(read_messages=False),
+                interaction.user: discord.PermissionOverwrite(read_messages=True, send_messages=True),
+                interaction.guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True)
+            }
+            
+            # Ajouter les modérateurs
+            for role in interaction.guild.roles:
+                if role.permissions.manage_messages:
+                    overwrites[role] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
+            
+            ticket_channel = await category.create_text_channel(
+                name=f"ticket-{interaction.user.name}",
+                overwrites=overwrites
+            )
+            
+            # Sauvegarder dans la base de données
+            now = datetime.utcnow()
+            await bot.db.tickets.create(
+                interaction.guild_id,
+                ticket_channel.id,
+                interaction.user.id,
+                str(self.subject.value),
+                str(self.description.value),
+                now
+            )
+            
+            # Créer l'embed du ticket
+            embed = discord.Embed(
+                title=f"🎫 Ticket de {interaction.user.display_name}",
+                color=discord.Color.green()
+            )
+            embed.add_field(name="Sujet", value=self.subject.value, inline=False)
+            embed.add_field(name="Description", value=self.description.value, inline=False)
+            embed.add_field(name="Créé le", value=f"<t:{int(now.timestamp())}:F>", inline=False)
+            embed.set_footer(text=f"ID: {interaction.user.id}")
+            
+            # Ajouter un bouton pour fermer le ticket
+            view = TicketControlView()
+            
+            await ticket_channel.send(
+                content=f"{interaction.user.mention}",
+                embed=embed,
+                view=view
+            )
+            
+            await interaction.followup.send(
+                f"✅ Ticket créé: {ticket_channel.mention}",
+                ephemeral=True
+            )
+            
+            logger.info(f"Ticket créé par {interaction.user.name} dans {interaction.guild.name}")
+        
         except Exception as e:
             logger.error(f"Erreur création ticket: {e}")
             await interaction.followup.send(
@@ -157,53 +141,36 @@ class TicketControlView(discord.ui.View):
         bot = interaction.client
         
         try:
-            await bot.db.connect()
+            # Fermer le ticket (sans effet s'il est déjà fermé)
+            now = datetime.utcnow()
+            closed = await bot.db.tickets.close(interaction.guild_id, interaction.channel_id, interaction.user.id, now)
             
-            async with bot.db.connection.cursor() as cursor:
-                # Récupérer le ticket
-                await cursor.execute(
-                    "SELECT * FROM tickets WHERE channel_id = ? AND status = 'open'",
-                    (interaction.channel_id,)
-                )
-                ticket = await cursor.fetchone()
-                
-                if not ticket:
-                    await interaction.response.send_message(
-                        "❌ Ce ticket est déjà fermé ou introuvable.", 
-                        ephemeral=True
-                    )
-                    return
-                
-                # Mettre à jour le statut
-                now = datetime.utcnow()
-                await cursor.execute(
-                    """UPDATE tickets 
-                    SET status = 'closed', closed_at = ?, closed_by = ? 
-                    WHERE channel_id = ?""",
-                    (now, interaction.user.id, interaction.channel_id)
-                )
-                
-                await bot.db.connection.commit()
-                
-                embed = discord.Embed(
-                    title="🔒 Ticket fermé",
-                    description=f"Ce ticket a été fermé par {interaction.user.mention}.",
-                    color=discord.Color.red()
-                )
-                embed.add_field(
-                    name="⏱️ Actions",
-                    value="Ce canal sera supprimé dans 10 secondes.",
-                    inline=False
+            if not closed:
+                await interaction.response.send_message(
+                    "❌ Ce ticket est déjà fermé ou introuvable.", 
+                    ephemeral=True
                 )
-                embed.set_footer(text=f"Fermé le {now.strftime('%d/%m/%Y à %H:%M')}")
-                
-                await interaction.response.send_message(embed=embed)
-                
-                logger.info(f"Ticket {interaction.channel.name} fermé par {interaction.user.name}")
-                
-                # Attendre avant de supprimer
-                await interaction.channel.delete(delay=10)
-                
+                return
+            
+            embed = discord.Embed(
+                title="🔒 Ticket fermé",
+                description=f"Ce ticket a été fermé par {interaction.user.mention}.",
+                color=discord.Color.red()
+            )
+            embed.add_field(
+                name="⏱️ Actions",
+                value="Ce canal sera supprimé dans 10 secondes.",
+                inline=False
+            )
+            embed.set_footer(text=f"Fermé le {now.strftime('%d/%m/%Y à %H:%M')}")
+            
+            await interaction.response.send_message(embed=embed)
+            
+            logger.info(f"Ticket {interaction.channel.name} fermé par {interaction.user.name}")
+            
+            # Attendre avant de supprimer
+            await interaction.channel.delete(delay=10)
+        
         except discord.Forbidden:
             await interaction.response.send_message(
                 "❌ Je n'ai pas la permission de supprimer ce canal.",
@@ -276,7 +243,7 @@ class Tickets(commands.Cog):
                 )
             
             logger.info(f"Panel de tickets créé dans #{target_channel.name} par {interaction.user.name}")
-            
+        
         except discord.Forbidden:
             await interaction.response.send_message(
                 "❌ Je n'ai pas la permission d'envoyer des messages dans ce canal.",
@@ -294,56 +261,38 @@ class Tickets(commands.Cog):
     async def ticket_close(self, interaction: discord.Interaction, reason: str = None):
         """Ferme le ticket actuel"""
         try:
-            await self.bot.db.connect()
+            # Fermer le ticket s'il est ouvert dans ce canal
+            now = datetime.utcnow()
+            closed = await self.bot.db.tickets.close(interaction.guild_id, interaction.channel_id, interaction.user.id, now)
             
-            async with self.bot.db.connection.cursor() as cursor:
-                # Vérifier si c'est un ticket ouvert
-                await cursor.execute(
-                    """SELECT * FROM tickets 
-                    WHERE channel_id = ? AND status = 'open'""",
-                    (interaction.channel_id,)
-                )
-                ticket = await cursor.fetchone()
-                
-                if not ticket:
-                    await interaction.response.send_message(
-                        "❌ Ce canal n'est pas un ticket ou il est déjà fermé.",
-                        ephemeral=True
-                    )
-                    return
-                
-                # Fermer le ticket
-                now = datetime.utcnow()
-                await cursor.execute(
-                    """UPDATE tickets 
-                    SET status = 'closed', closed_at = ?, closed_by = ? 
-                    WHERE channel_id = ?""",
-                    (now, interaction.user.id, interaction.channel_id)
-                )
-                
-                await self.bot.db.connection.commit()
-                
-                embed = discord.Embed(
-                    title="🔒 Ticket fermé",
-                    description=f"Ce ticket a été fermé par {interaction.user.mention}.",
-                    color=discord.Color.red()
-                )
-                
-                if reason:
-                    embed.add_field(name="📝 Raison", value=reason, inline=False)
-                
-                embed.add_field(
-                    name="⏱️ Actions",
-                    value="Ce canal sera supprimé dans 10 secondes.",
-                    inline=False
+            if not closed:
+                await interaction.response.send_message(
+                    "❌ Ce canal n'est pas un ticket ou il est déjà fermé.",
+                    ephemeral=True
                 )
-                
-                await interaction.response.send_message(embed=embed)
-                
-                logger.info(f"Ticket {interaction.channel.name} fermé par {interaction.user.name}")
-                
-                await interaction.channel.delete(delay=10)
-                
+                return
+            
+            embed = discord.Embed(
+                title="🔒 Ticket fermé",
+                description=f"Ce ticket a été fermé par {interaction.user.mention}.",
+                color=discord.Color.red()
+            )
+            
+            if reason:
+                embed.add_field(name="📝 Raison", value=reason, inline=False)
+            
+            embed.add_field(
+                name="⏱️ Actions",
+                value="Ce canal sera supprimé dans 10 secondes.",
+                inline=False
+            )
+            
+            await interaction.response.send_message(embed=embed)
+            
+            logger.info(f"Ticket {interaction.channel.name} fermé par {interaction.user.name}")
+            
+            await interaction.channel.delete(delay=10)
+        
         except discord.Forbidden:
             await interaction.response.send_message(
                 "❌ Je n'ai pas la permission de supprimer ce canal.",
@@ -370,67 +319,53 @@ class Tickets(commands.Cog):
     ):
         """Liste tous les tickets du serveur"""
         try:
-            await self.bot.db.connect()
+            tickets = await self.bot.db.tickets.list(
+                interaction.guild_id,
+                status=status,
+                user_id=user.id if user else None
+            )
             
-            async with self.bot.db.connection.cursor() as cursor:
-                # Construire la requête
-                query = "SELECT * FROM tickets WHERE guild_id = ?"
-                params = [interaction.guild_id]
-                
-                if status:
-                    query += " AND status = ?"
-                    params.append(status)
-                
-                if user:
-                    query += " AND user_id = ?"
-                    params.append(user.id)
-                
-                query += " ORDER BY created_at DESC LIMIT 25"
-                
-                await cursor.execute(query, tuple(params))
-                tickets = await cursor.fetchall()
-                
-                if not tickets:
-                    await interaction.response.send_message(
-                        "📋 Aucun ticket trouvé.",
-                        ephemeral=True
-                    )
-                    return
-                
-                embed = discord.Embed(
-                    title=f"🎫 Tickets de {interaction.guild.name}",
-                    color=discord.Color.blue()
-                )
-                
-                open_tickets = [t for t in tickets if t[5] == "open"]  # status
-                closed_tickets = [t for t in tickets if t[5] == "closed"]
-                
-                embed.add_field(
-                    name="📊 Statistiques",
-                    value=f"**Ouverts:** {len(open_tickets)}\n**Fermés:** {len(closed_tickets)}\n**Total:** {len(tickets)}",
-                    inline=False
+            if not tickets:
+                await interaction.response.send_message(
+                    "📋 Aucun ticket trouvé.",
+                    ephemeral=True
                 )
-                
-                if open_tickets:
-                    tickets_text = []
-                    for t in open_tickets[:10]:
-                        channel = interaction.guild.get_channel(t[2])  # channel_id
-                        user_obj = interaction.guild.get_member(t[3])  # user_id
-                        
-                        if channel and user_obj:
-                            tickets_text.append(
-                                f"{channel.mention} - {user_obj.mention} - <t:{int(t[7].timestamp()) if isinstance(t[7], datetime) else 0}:R>"
-                            )
+                return
+            
+            embed = discord.Embed(
+                title=f"🎫 Tickets de {interaction.guild.name}",
+                color=discord.Color.blue()
+            )
+            
+            open_tickets = [t for t in tickets if t.status == "open"]
+            closed_tickets = [t for t in tickets if t.status == "closed"]
+            
+            embed.add_field(
+                name="📊 Statistiques",
+                value=f"**Ouverts:** {len(open_tickets)}\n**Fermés:** {len(closed_tickets)}\n**Total:** {len(tickets)}",
+                inline=False
+            )
+            
+            if open_tickets:
+                tickets_text = []
+                for t in open_tickets[:10]:
+                    channel = interaction.guild.get_channel(t.channel_id)
+                    user_obj = interaction.guild.get_member(t.user_id)
                     
-                    if tickets_text:
-                        embed.add_field(
-                            name="🟢 Tickets ouverts",
-                            value="\n".join(tickets_text),
-                            inline=False
+                    if channel and user_obj:
+                        tickets_text.append(
+                            f"{channel.mention} - {user_obj.mention} - <t:{int(t.created_at.timestamp()) if isinstance(t.created_at, datetime) else 0}:R>"
                         )
                 
-                await interaction.response.send_message(embed=embed, ephemeral=True)
-                
+                if tickets_text:
+                    embed.add_field(
+                        name="🟢 Tickets ouverts",
+                        value="\n".join(tickets_text),
+                        inline=False
+                    )
+            
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+        
         except Exception as e:
             logger.error(f"Erreur liste tickets: {e}")
             await interaction.response.send_message(
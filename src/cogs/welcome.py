@@ -19,46 +19,40 @@ class Welcome(commands.Cog):
     async def on_member_join(self, member: discord.Member):
         """Événement déclenché quand un membre rejoint le serveur"""
         try:
-            # S'assurer que la DB est connectée
-            await self.bot.db.connect()
-            
-            async with self.bot.db.connection.cursor() as cursor:
-                # Récupérer la configuration du serveur
-                await cursor.execute(
-                    "SELECT welcome_channel_id, welcome_message, auto_role_id FROM guilds WHERE guild_id = ?",
-                    (member.guild.id,)
-                )
-                result = await cursor.fetchone()
-                
-                if not result or not result[0]:  # welcome_channel_id
-                    return
-                
-                welcome_channel_id, welcome_message, auto_role_id = result
-                
-                # Trouver le canal
-                channel = member.guild.get_channel(welcome_channel_id)
-                if not channel:
-                    return
-                
-                # Préparer le message personnalisé
-                custom_message = None
-                if welcome_message:
-                    custom_message = welcome_message.replace("{user}", member.mention)
-                    custom_message = custom_message.replace("{server}", member.guild.name)
-                    custom_message = custom_message.replace("{count}", str(member.guild.member_count))
-                
-                # ← UTILISER L'EMBED STANDARDISÉ
-                embed = Embeds.welcome(member, member.guild, custom_message)
-                
-                await channel.send(embed=embed)
-                
-                # Auto-role si configuré
-                if auto_role_id:
-                    role = member.guild.get_role(auto_role_id)
-                    if role:
-                        await member.add_roles(role)
-                        logger.info(f"Rôle automatique donné à {member.name}")
-                        
+            # Récupérer la configuration du serveur
+            config = await self.bot.db.guilds.get(member.guild.id)
+            
+            if not config or not config.welcome_channel_id:
+                return
+            
+            welcome_channel_id, welcome_message, auto_role_id = (
+                config.welcome_channel_id, config.welcome_message, config.auto_role_id
+            )
+            
+            # Trouver le canal
+            channel = member.guild.get_channel(welcome_channel_id)
+            if not channel:
+                return
+            
+            # Préparer le message personnalisé
+            custom_message = None
+            if welcome_message:
+                custom_message = welcome_message.replace("{user}", member.mention)
+                custom_message = custom_message.replace("{server}", member.guild.name)
+                custom_message = custom_message.replace("{count}", str(member.guild.member_count))
+            
+            # ← UTILISER L'EMBED STANDARDISÉ
+            embed = Embeds.welcome(member, member.guild, custom_message)
+            
+            await channel.send(embed=embed)
+            
+            # Auto-role si configuré
+            if auto_role_id:
+                role = member.guild.get_role(auto_role_id)
+                if role:
+                    await member.add_roles(role)
+                    logger.info(f"Rôle automatique donné à {member.name}")
+        
         except Exception as e:
             logger.error(f"Erreur lors de l'envoi du message de bienvenue: {e}")
     
@@ -66,35 +60,28 @@ class Welcome(commands.Cog):
     async def on_member_remove(self, member: discord.Member):
         """Événement déclenché quand un membre quitte le serveur"""
         try:
-            await self.bot.db.connect()
-            
-            async with self.bot.db.connection.cursor() as cursor:
-                await cursor.execute(
-                    "SELECT welcome_channel_id, leave_message FROM guilds WHERE guild_id = ?",
-                    (member.guild.id,)
-                )
-                result = await cursor.fetchone()
-                
-                if not result or not result[0]:  # welcome_channel_id
-                    return
-                
-                welcome_channel_id, leave_message = result
-                
-                channel = member.guild.get_channel(welcome_channel_id)
-                if not channel:
-                    return
-                
-                # Préparer le message personnalisé
-                custom_message = None
-                if leave_message:
-                    custom_message = leave_message.replace("{user}", member.name)
-                    custom_message = custom_message.replace("{server}", member.guild.name)
-                
-                # ← UTILISER L'EMBED STANDARDISÉ
-                embed = Embeds.goodbye(member, member.guild, custom_message)
-                
-                await channel.send(embed=embed)
-                
+            config = await self.bot.db.guilds.get(member.guild.id)
+            
+            if not config or not config.welcome_channel_id:
+                return
+            
+            welcome_channel_id, leave_message = config.welcome_channel_id, config.leave_message
+            
+            channel = member.guild.get_channel(welcome_channel_id)
+            if not channel:
+                return
+            
+            # Préparer le message personnalisé
+            custom_message = None
+            if leave_message:
+                custom_message = leave_message.replace("{user}", member.name)
+                custom_message = custom_message.replace("{server}", member.guild.name)
+            
+            # ← UTILISER L'EMBED STANDARDISÉ
+            embed = Embeds.goodbye(member, member.guild, custom_message)
+            
+            await channel.send(embed=embed)
+        
         except Exception as e:
             logger.error(f"Erreur lors de l'envoi du message de départ: {e}")
     
@@ -104,27 +91,7 @@ class Welcome(commands.Cog):
     async def set_welcome(self, interaction: discord.Interaction, channel: discord.TextChannel):
         """Définit le canal de bienvenue"""
         try:
-            await self.bot.db.connect()
-            
-            async with self.bot.db.connection.cursor() as cursor:
-                # Vérifier si le serveur existe déjà
-                await cursor.execute("SELECT guild_id FROM guilds WHERE guild_id = ?", (interaction.guild_id,))
-                existing = await cursor.fetchone()
-                
-                if existing:
-                    # Mettre à jour
-                    await cursor.execute(
-                        "UPDATE guilds SET welcome_channel_id = ? WHERE guild_id = ?",
-                        (channel.id, interaction.guild_id)
-                    )
-                else:
-                    # Insérer nouveau
-                    await cursor.execute(
-                        "INSERT INTO guilds (guild_id, welcome_channel_id) VALUES (?, ?)",
-                        (interaction.guild_id, channel.id)
-                    )
-                
-                await self.bot.db.connection.commit()
+            await self.bot.db.guilds.set(interaction.guild_id, "welcome_channel_id", channel.id)
             
             # ← UTILISER L'EMBED STANDARDISÉ
             embed = Embeds.success(
@@ -132,7 +99,7 @@ class Welcome(commands.Cog):
                 f"Les messages de bienvenue seront envoyés dans {channel.mention}"
             )
             await interaction.response.send_message(embed=embed)
-            
+        
         except Exception as e:
             logger.error(f"Erreur set_welcome: {e}")
             # ← UTILISER L'EMBED STANDARDISÉ
@@ -148,27 +115,7 @@ class Welcome(commands.Cog):
     async def welcome_message(self, interaction: discord.Interaction, message: str):
         """Définit le message de bienvenue personnalisé"""
         try:
-            await self.bot.db.connect()
-            
-            async with self.bot.db.connection.cursor() as cursor:
-                # Vérifier si le serveur existe
-                await cursor.execute("SELECT guild_id FROM guilds WHERE guild_id = ?", (interaction.guild_id,))
-                existing = await cursor.fetchone()
-                
-                if existing:
-                    # Mettre à jour
-                    await cursor.execute(
-                        "UPDATE guilds SET welcome_message = ? WHERE guild_id = ?",
-                        (message, interaction.guild_id)
-                    )
-                else:
-                    # Insérer nouveau
-                    await cursor.execute(
-                        "INSERT INTO guilds (guild_id, welcome_message) VALUES (?, ?)",
-                        (interaction.guild_id, message)
-                    )
-                
-                await self.bot.db.connection.commit()
+            await self.bot.db.guilds.set(interaction.guild_id, "welcome_message", message)
             
             # Aperçu du message
             preview = message.replace("{user}", interaction.user.mention)
@@ -181,7 +128,7 @@ class Welcome(commands.Cog):
                 f"**Aperçu du message :**\n{preview}"
             )
             await interaction.response.send_message(embed=embed)
-            
+        
         except Exception as e:
             logger.error(f"Erreur welcome_message: {e}")
             # ← UTILISER L'EMBED STANDARDISÉ
@@ -197,24 +144,7 @@ class Welcome(commands.Cog):
     async def set_leave_message(self, interaction: discord.Interaction, message: str):
         """Définit le message de départ personnalisé"""
         try:
-            await self.bot.db.connect()
-            
-            async with self.bot.db.connection.cursor() as cursor:
-                await cursor.execute("SELECT guild_id FROM guilds WHERE guild_id = ?", (interaction.guild_id,))
-                existing = await cursor.fetchone()
-                
-                if existing:
-                    await cursor.execute(
-                        "UPDATE guilds SET leave_message = ? WHERE guild_id = ?",
-                        (message, interaction.guild_id)
-                    )
-                else:
-                    await cursor.execute(
-                        "INSERT INTO guilds (guild_id, leave_message) VALUES (?, ?)",
-                        (interaction.guild_id, message)
-                    )
-                
-                await self.bot.db.connection.commit()
+            await self.bot.db.guilds.set(interaction.guild_id, "leave_message", message)
             
             # Aperçu du message
             preview = message.replace("{user}", interaction.user.name)
@@ -226,7 +156,7 @@ class Welcome(commands.Cog):
                 f"**Aperçu du message :**\n{preview}"
             )
             await interaction.response.send_message(embed=embed)
-            
+        
         except Exception as e:
             logger.error(f"Erreur set_leave_message: {e}")
             # ← UTILISER L'EMBED STANDARDISÉ
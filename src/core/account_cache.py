@@ -0,0 +1,121 @@
+"""
+Cache LRU des comptes économiques, tenu à jour par les écritures
+"""
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from .repositories import EconomyRow
+
+Key = Tuple[int, int]
+
+
+class AccountCache:
+    """
+    Comptes économiques récemment lus, par (guild_id, user_id).
+    
+    Les débits et crédits réécrivent le solde renvoyé par leur RETURNING
+    dans l'entrée en cache (write-through) ; les modifications dont le
+    résultat n'est pas connu invalident l'entrée. Une lecture en cours
+    pendant une écriture du même compte n'est pas mise en cache, pour ne
+    pas y remettre un solde périmé.
+    """
+    
+    def __init__(self, max_entries: int = 10_000):
+        """
+        Args:
+            max_entries: Comptes gardés en mémoire au maximum
+        """
+        self.max_entries = max_entries
+        self._items: "OrderedDict[Key, EconomyRow]" = OrderedDict()
+        self._loading: Dict[Key, int] = {}
+        self._stale: Set[Key] = set()
+        
+        # Statistiques
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+    
+    def __len__(self) -> int:
+        return len(self._items)
+    
+    def get(self, guild_id: int, user_id: int) -> Optional[EconomyRow]:
+        """Compte en cache (None si absent)"""
+        key = (guild_id, user_id)
+        row = self._items.get(key)
+        if row is None:
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return row
+    
+    async def get_or_load(
+        self,
+        guild_id: int,
+        user_id: int,
+        loader: Callable[[], Awaitable[EconomyRow]]
+    ) -> EconomyRow:
+        """Compte en cache, ou lu par ``loader`` puis mis en cache"""
+        row = self.get(guild_id, user_id)
+        if row is not None:
+            return row
+        
+        key = (guild_id, user_id)
+        self._loading[key] = self._loading.get(key, 0) + 1
+        try:
+            row = await loader()
+        finally:
+            remaining = self._loading.pop(key) - 1
+            stale = key in self._stale
+            if remaining:
+                self._loading[key] = remaining
+            else:
+                self._stale.discard(key)
+        
+        if not stale:
+            self._put(key, row)
+        return row
+    
+    def _put(self, key: Key, row: EconomyRow):
+        self._items[key] = row
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+            self.evicted += 1
+    
+    def update(self, guild_id: int, user_id: int, **values):
+        """Reporte des colonnes écrites (balance, bank, daily_claimed) dans l'entrée en cache"""
+        key = (guild_id, user_id)
+        if key in self._loading:
+            self._stale.add(key)
+        
+        row = self._items.get(key)
+        if row is None:
+            return
+        for column, value in values.items():
+            if value is not None:
+                setattr(row, column, value)
+    
+    def invalidate(self, guild_id: int, user_id: Optional[int] = None):
+        """Oublie un compte, ou tous les comptes d'un serveur"""
+        if user_id is not None:
+            keys = [(guild_id, user_id)]
+        else:
+            keys = [key for key in self._items if key[0] == guild_id]
+            keys += [key for key in self._loading if key[0] == guild_id]
+        
+        for key in keys:
+            self._items.pop(key, None)
+            if key in self._loading:
+                self._stale.add(key)
+    
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._items),
+            "max_entries": self.max_entries,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evicted": self.evicted,
+        }
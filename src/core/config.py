@@ -16,10 +16,66 @@ class Config:
     log_level: str = "INFO"
     dev_guild_id: Optional[int] = None
     use_keep_alive: bool = False
+    db_pool_size: int = 4
+    
+    # Profil PRAGMA SQLite
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_cache_size: int = -20000  # Négatif = taille en KiB (~20 Mo)
+    sqlite_mmap_size: int = 268435456  # 256 Mo
+    sqlite_temp_store: str = "MEMORY"
+    sqlite_busy_timeout: int = 5000  # ms
+    sqlite_wal_autocheckpoint: int = 1000  # pages
+    db_maintenance_interval: int = 300  # secondes (0 = désactivé)
+    
+    # File d'écriture (commit groupé)
+    db_write_flush_ms: int = 10
+    db_write_batch_size: int = 200
+    
+    # Découpage SQLite : nombre de fichiers entre lesquels répartir les serveurs
+    db_shards: int = 1
+    
+    # Sauvegardes à chaud
+    db_backup_interval: int = 86400  # secondes (0 = désactivé)
+    db_backup_dir: str = "data/backups"
+    db_backup_keep: int = 7
+    
+    # Gains d'XP agrégés puis écrits par lots
+    xp_flush_interval: int = 5  # secondes
+    
+    # XP vocale : un échantillon de tous les salons vocaux par intervalle
+    voice_xp_interval: int = 60  # secondes (0 = désactivé)
+    voice_xp_amount: int = 10  # XP par intervalle passé en vocal
+    
+    # Instrumentation des requêtes
+    db_slow_query_ms: int = 100  # 0 = désactivé
+    
+    def sqlite_pragmas(self) -> dict:
+        """Retourne le profil PRAGMA à appliquer aux connexions SQLite"""
+        return {
+            "journal_mode": self.sqlite_journal_mode,
+            "synchronous": self.sqlite_synchronous,
+            "cache_size": self.sqlite_cache_size,
+            "mmap_size": self.sqlite_mmap_size,
+            "temp_store": self.sqlite_temp_store,
+            "busy_timeout": self.sqlite_busy_timeout,
+            "wal_autocheckpoint": self.sqlite_wal_autocheckpoint,
+        }
 
 # Alias pour compatibilité
 BotConfig = Config  # ← AJOUTEZ CETTE LIGNE
 
+def _env_int(name: str, default: int) -> int:
+    """Lit une variable d'environnement entière (valeur par défaut si invalide)"""
+    value = os.getenv(name, "").strip()
+    
+    if value.lstrip("-").isdigit():
+        return int(value)
+    
+    if value:
+        print(f"⚠️ {name} invalide: '{value}' - valeur par défaut {default}")
+    return default
+
 def load_config() -> Config:
     """
     Charge la configuration depuis .env
@@ -60,5 +116,24 @@ def load_config() -> Config:
         database_url=os.getenv('DATABASE_URL', 'sqlite:///data/bot.db'),
         log_level=os.getenv('LOG_LEVEL', 'INFO').upper(),
         dev_guild_id=dev_guild_id,
-        use_keep_alive=use_keep_alive
+        use_keep_alive=use_keep_alive,
+        db_pool_size=_env_int('DB_POOL_SIZE', 4),
+        sqlite_journal_mode=os.getenv('SQLITE_JOURNAL_MODE', 'WAL').upper(),
+        sqlite_synchronous=os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL').upper(),
+        sqlite_cache_size=_env_int('SQLITE_CACHE_SIZE', -20000),
+        sqlite_mmap_size=_env_int('SQLITE_MMAP_SIZE', 268435456),
+        sqlite_temp_store=os.getenv('SQLITE_TEMP_STORE', 'MEMORY').upper(),
+        sqlite_busy_timeout=_env_int('SQLITE_BUSY_TIMEOUT', 5000),
+        sqlite_wal_autocheckpoint=_env_int('SQLITE_WAL_AUTOCHECKPOINT', 1000),
+        db_maintenance_interval=_env_int('DB_MAINTENANCE_INTERVAL', 300),
+        db_write_flush_ms=_env_int('DB_WRITE_FLUSH_MS', 10),
+        db_write_batch_size=_env_int('DB_WRITE_BATCH_SIZE', 200),
+        db_shards=_env_int('DB_SHARDS', 1),
+        db_backup_interval=_env_int('DB_BACKUP_INTERVAL', 86400),
+        db_backup_dir=os.getenv('DB_BACKUP_DIR', 'data/backups'),
+        db_backup_keep=_env_int('DB_BACKUP_KEEP', 7),
+        xp_flush_interval=_env_int('XP_FLUSH_INTERVAL', 5),
+        voice_xp_interval=_env_int('VOICE_XP_INTERVAL', 60),
+        voice_xp_amount=_env_int('VOICE_XP_AMOUNT', 10),
+        db_slow_query_ms=_env_int('DB_SLOW_QUERY_MS', 100)
     )
\ No newline at end of file
@@ -1,67 +1,466 @@
 """
 Gestion de la base de données
 """
-import aiosqlite
-from pathlib import Path
-from typing import Optional
+import asyncio
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Awaitable, Callable, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .db_backends import create_backend, current_transaction
+from .db_backup import BackupManager
+from .db_metrics import QueryMetrics
+from .leaderboard_index import LeaderboardIndex
+from .ledger import LedgerBuffer
+from .repositories import (
+    EconomyRepo, GuildRepo, LedgerRepo, LevelRewardRepo, SeasonRepo, TicketRepo, UserRepo, XPRollupRepo
+)
+from .xp_buffer import XPBuffer
+from .logger import setup_logger
+
+logger = setup_logger("Database")
+
+
+def _one_row(row) -> int:
+    """Nombre de lignes d'un résultat fetchone"""
+    return 1 if row else 0
 
 class DatabaseManager:
-    """Gestionnaire de base de données SQLite"""
+    """Gestionnaire de base de données (SQLite ou PostgreSQL selon l'URL)"""
     
-    def __init__(self, database_url: str = "sqlite:///data/bot.db"):
+    def __init__(
+        self,
+        database_url: str = "sqlite:///data/bot.db",
+        pool_size: int = 4,
+        pragmas: Optional[dict] = None,
+        maintenance_interval: int = 300,
+        write_flush_ms: int = 10,
+        write_batch_size: int = 200,
+        slow_query_ms: int = 100,
+        shards: int = 1,
+        backup_interval: int = 0,
+        backup_dir: str = "data/backups",
+        backup_keep: int = 7,
+        xp_flush_interval: float = 5.0,
+        xp_daily_keep_days: int = 62
+    ):
         """
         Initialise le gestionnaire de base de données
         
         Args:
-            database_url: URL de la base de données
+            database_url: URL de la base de données (sqlite:///... ou postgresql://...)
+            pool_size: Nombre de connexions (lecteurs SQLite, pool PostgreSQL)
+            pragmas: Profil PRAGMA SQLite (journal_mode, synchronous...)
+            maintenance_interval: Secondes entre deux maintenances (0 = désactivé)
+            write_flush_ms: Délai maximal avant le commit groupé des écritures (SQLite)
+            write_batch_size: Nombre d'écritures déclenchant un commit immédiat (SQLite)
+            slow_query_ms: Seuil de journalisation des requêtes lentes (0 = désactivé)
+            shards: Nombre de fichiers SQLite entre lesquels répartir les serveurs
+            backup_interval: Secondes entre deux sauvegardes automatiques (0 = désactivé)
+            backup_dir: Dossier des sauvegardes
+            backup_keep: Nombre de sauvegardes conservées par fichier
+            xp_flush_interval: Secondes entre deux écritures des gains d'XP agrégés
+            xp_daily_keep_days: Jours d'XP journalière gardés avant repli en mois
         """
-        # Extraire le chemin du fichier depuis l'URL
-        self.db_path = database_url.replace("sqlite:///", "")
+        self.backend = create_backend(
+            database_url,
+            pool_size=pool_size,
+            pragmas=pragmas,
+            write_flush_ms=write_flush_ms,
+            write_batch_size=write_batch_size,
+            shards=shards
+        )
+        self.maintenance_interval = maintenance_interval
+        self._maintenance_task: Optional[asyncio.Task] = None
+        self.xp_daily_keep_days = xp_daily_keep_days
+        self._compacted_on: Optional[date] = None
+        self._snapshotted_on: Optional[date] = None
+        
+        # Sauvegardes à chaud (SQLite)
+        self.backups = BackupManager(backup_dir, keep=backup_keep)
+        self.backup_interval = backup_interval
+        self._backup_task: Optional[asyncio.Task] = None
+        
+        # Latences par requête et journal des requêtes lentes
+        self.metrics = QueryMetrics(slow_threshold_ms=slow_query_ms)
+        self._explain_tasks: Set[asyncio.Task] = set()
         
-        # Créer le dossier data s'il n'existe pas
-        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        # Repositories
+        self.guilds = GuildRepo(self)
+        self.users = UserRepo(self)
+        self.xp_rollups = XPRollupRepo(self)
+        self.level_rewards = LevelRewardRepo(self)
+        self.seasons = SeasonRepo(self)
+        self.economy = EconomyRepo(self)
+        self.ledger_entries = LedgerRepo(self)
+        self.tickets = TicketRepo(self)
+        
+        # Gains d'XP agrégés en mémoire
+        self.xp = XPBuffer(self, flush_interval=xp_flush_interval)
+        # Classements XP en mémoire, tenus à jour par self.xp
+        self.leaderboard = LeaderboardIndex(self)
+        # Mouvements de coins en attente d'insertion dans le journal
+        self.ledger = LedgerBuffer(self)
+    
+    @classmethod
+    def from_config(cls, config) -> "DatabaseManager":
+        """Crée le gestionnaire à partir de la configuration du bot"""
+        return cls(
+            config.database_url,
+            pool_size=config.db_pool_size,
+            pragmas=config.sqlite_pragmas(),
+            maintenance_interval=config.db_maintenance_interval,
+            write_flush_ms=config.db_write_flush_ms,
+            write_batch_size=config.db_write_batch_size,
+            slow_query_ms=config.db_slow_query_ms,
+            shards=config.db_shards,
+            backup_interval=config.db_backup_interval,
+            backup_dir=config.db_backup_dir,
+            backup_keep=config.db_backup_keep,
+            xp_flush_interval=config.xp_flush_interval
+        )
+    
+    @property
+    def dialect(self) -> str:
+        """Dialecte SQL du backend ("sqlite" ou "postgres")"""
+        return self.backend.dialect
+    
+    @property
+    def connection(self):
+        """
+        Connexion d'écriture SQLite (compatibilité avec l'ancien code)
         
-        self.connection: Optional[aiosqlite.Connection] = None
+        Raises:
+            RuntimeError: Si la base est découpée en shards ou n'est pas SQLite
+        """
+        if len(self.backends) > 1:
+            raise RuntimeError(
+                "db.connection n'existe pas avec DB_SHARDS > 1 : chaque serveur a son "
+                "shard, passer par les repositories ou db.transaction(guild_id)"
+            )
+        pool = getattr(self.backend, "pool", None)
+        if pool is None:
+            raise RuntimeError(f"db.connection n'existe qu'avec SQLite (backend {self.dialect})")
+        return pool.writer
+    
+    @property
+    def backends(self) -> list:
+        """Backends physiques (un par shard, un seul sans découpage)"""
+        return getattr(self.backend, "shards", [self.backend])
+    
+    def _route(self, guild_id: Optional[int]):
+        """Backend contenant les données d'un serveur"""
+        return self.backend.for_guild(guild_id)
     
     async def connect(self):
         """Établit la connexion à la base de données"""
-        if not self.connection:
-            self.connection = await aiosqlite.connect(self.db_path)
-            await self.create_tables()
-            print(f"✅ Base de données connectée : {self.db_path}")
+        if not self.backend.connected:
+            await self.backend.connect()
+            self.xp.start()
+            self.ledger.start()
+            
+            if self.maintenance_interval > 0:
+                self._maintenance_task = asyncio.create_task(self._maintenance_loop())
+            if self.backup_interval > 0 and self.backend.files():
+                self._backup_task = asyncio.create_task(self._backup_loop())
+            
+            print(f"✅ Base de données connectée : {self.backend.name}")
     
     async def close(self):
         """Ferme la connexion à la base de données"""
-        if self.connection:
-            await self.connection.close()
+        if self._maintenance_task:
+            self._maintenance_task.cancel()
+            self._maintenance_task = None
+        if self._backup_task:
+            self._backup_task.cancel()
+            self._backup_task = None
+        
+        if self.backend.connected:
+            await self.xp.close()
+            await self.ledger.close()
+            await self.backend.close()
             print("🔌 Base de données déconnectée")
     
-    async def create_tables(self):
-        """Crée les tables de base si elles n'existent pas"""
-        async with self.connection.cursor() as cursor:
-            # Table des guilds
-            await cursor.execute("""
-                CREATE TABLE IF NOT EXISTS guilds (
-                    guild_id INTEGER PRIMARY KEY,
-                    welcome_channel_id INTEGER,
-                    log_channel_id INTEGER,
-                    auto_role_id INTEGER,
-                    prefix TEXT DEFAULT '!',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
+    def transaction(self, guild_id: Optional[int] = None):
+        """
+        Unité de travail : toutes les requêtes du bloc sont validées en un
+        seul COMMIT, ou annulées ensemble si une exception s'échappe
+        
+        Les blocs imbriqués deviennent des SAVEPOINT. Éviter les appels à
+        Discord dans le bloc : avec SQLite, la connexion d'écriture reste
+        réservée jusqu'à la fin. Une transaction ne couvre qu'un serveur
+        (``guild_id`` choisit le shard quand la base est découpée).
+        
+        Usage:
+            async with db.transaction(guild_id):
+                account = await db.economy.get_or_create(guild_id, user_id)
+                await db.economy.update(guild_id, user_id, balance=account.balance - 50)
+        """
+        return self._route(guild_id).transaction()
+    
+    def after_commit(self, callback: Callable[[], None], guild_id: Optional[int] = None):
+        """
+        Applique un effet hors base (journal, cache) après le COMMIT de la
+        transaction active, ou tout de suite s'il n'y en a pas
+        
+        Si la transaction est annulée, l'effet n'est jamais appliqué.
+        """
+        transaction = current_transaction(self._route(guild_id))
+        if transaction is None:
+            callback()
+        else:
+            transaction.after_commit(callback)
+    
+    @property
+    def in_transaction(self) -> bool:
+        """Une transaction est-elle active dans la tâche courante ?"""
+        return any(current_transaction(backend) is not None for backend in self.backends)
+    
+    def acquire_read(self, guild_id: Optional[int] = None):
+        """
+        Emprunte une connexion de lecture
+        
+        Usage:
+            async with db.acquire_read(guild_id) as conn:
+                ...
+        """
+        return self._route(guild_id).acquire_read()
+    
+    def acquire_write(self, guild_id: Optional[int] = None):
+        """
+        Emprunte une connexion d'écriture
+        
+        Usage:
+            async with db.acquire_write(guild_id) as conn:
+                ...
+        """
+        return self._route(guild_id).acquire_write()
+    
+    async def _timed(
+        self,
+        backend,
+        operation: Callable[..., Awaitable[Any]],
+        sql: str,
+        params: Any,
+        count_rows: Callable[[Any], int]
+    ) -> Any:
+        """Exécute une opération du backend en mesurant sa latence"""
+        started = time.perf_counter()
+        try:
+            result = await operation(sql, params)
+        except Exception:
+            self.metrics.record(sql, time.perf_counter() - started, error=True)
+            raise
+        
+        if self.metrics.record(sql, time.perf_counter() - started, count_rows(result)):
+            self._explain_later(backend, sql, params)
+        return result
+    
+    def _explain_later(self, backend, sql: str, params: Any):
+        """Journalise en tâche de fond le plan d'une requête lente"""
+        task = asyncio.create_task(self._log_plan(backend, sql, params))
+        self._explain_tasks.add(task)
+        task.add_done_callback(self._explain_tasks.discard)
+    
+    async def _log_plan(self, backend, sql: str, params: Any):
+        """Récupère et journalise le plan d'exécution d'une requête"""
+        try:
+            plan = await backend.explain(sql, params)
+            self.metrics.log_plan(sql, plan)
+        except Exception as e:
+            logger.debug(f"EXPLAIN impossible: {e}")
+    
+    async def fetchone(self, sql: str, params: Sequence = (), guild_id: Optional[int] = None) -> Optional[tuple]:
+        """Exécute une lecture et retourne la première ligne"""
+        backend = self._route(guild_id)
+        return await self._timed(backend, backend.fetchone, sql, params, _one_row)
+    
+    async def fetchall(self, sql: str, params: Sequence = (), guild_id: Optional[int] = None) -> List[tuple]:
+        """Exécute une lecture et retourne toutes les lignes"""
+        backend = self._route(guild_id)
+        return await self._timed(backend, backend.fetchall, sql, params, len)
+    
+    async def fetchall_shards(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        """
+        Requête inter-serveurs : exécutée sur chaque shard en parallèle
+        
+        Les lignes sont concaténées shard par shard ; un ORDER BY ou un
+        LIMIT de la requête ne s'applique donc qu'à l'intérieur d'un shard.
+        """
+        results = await asyncio.gather(*(
+            self._timed(backend, backend.fetchall, sql, params, len)
+            for backend in self.backends
+        ))
+        return [row for rows in results for row in rows]
+    
+    async def execute_shards(self, statements: Sequence[Tuple[str, Sequence]]) -> List[int]:
+        """
+        Écritures inter-serveurs : les mêmes requêtes dans une transaction
+        par shard (tâches de maintenance)
+        
+        Returns:
+            List[int]: Lignes modifiées par chaque requête, tous shards confondus
+        """
+        async def run(backend) -> List[int]:
+            async with backend.transaction():
+                return [
+                    max(0, await self._timed(backend, backend.execute, sql, params, lambda count: max(0, count)))
+                    for sql, params in statements
+                ]
+        
+        results = await asyncio.gather(*(run(backend) for backend in self.backends))
+        return [sum(counts) for counts in zip(*results)] if results else [0] * len(statements)
+    
+    def write(self, sql: str, params: Sequence = (), guild_id: Optional[int] = None) -> asyncio.Future:
+        """
+        Lance une écriture sans attendre son commit
+        
+        Avec SQLite, l'écriture sera visible des lectures après le prochain
+        commit groupé (``write_flush_ms`` au plus). Attendre le futur
+        retourné garantit qu'elle est durable.
+        """
+        backend = self._route(guild_id)
+        started = time.perf_counter()
+        future = backend.write(sql, params)
+        
+        def record(done: asyncio.Future):
+            failed = done.cancelled() or done.exception() is not None
+            rows = 0 if failed else max(0, done.result())
+            if self.metrics.record(sql, time.perf_counter() - started, rows, error=failed):
+                self._explain_later(backend, sql, params)
+        
+        future.add_done_callback(record)
+        return future
+    
+    async def execute(self, sql: str, params: Sequence = (), guild_id: Optional[int] = None) -> int:
+        """
+        Exécute une écriture et attend son commit
+        
+        Returns:
+            int: Nombre de lignes modifiées
+        """
+        backend = self._route(guild_id)
+        return await self._timed(backend, backend.execute, sql, params, lambda count: max(0, count))
+    
+    async def execute_returning(
+        self,
+        sql: str,
+        params: Sequence = (),
+        guild_id: Optional[int] = None
+    ) -> Optional[tuple]:
+        """Exécute une écriture avec RETURNING et retourne la première ligne"""
+        backend = self._route(guild_id)
+        return await self._timed(backend, backend.execute_returning, sql, params, _one_row)
+    
+    async def executemany(self, sql: str, params: Iterable[Sequence], guild_id: Optional[int] = None):
+        """
+        Exécute la même écriture pour plusieurs jeux de paramètres
+        
+        Avec des shards, tous les jeux de paramètres doivent concerner le
+        serveur ``guild_id``.
+        """
+        backend = self._route(guild_id)
+        params = list(params)
+        await self._timed(backend, backend.executemany, sql, params, lambda _: len(params))
+    
+    async def ensure_guild(self, guild_id: int):
+        """Crée l'entrée d'un serveur si elle n'existe pas"""
+        await self.guilds.ensure(guild_id)
+    
+    def pool_stats(self) -> dict:
+        """Profondeur des files d'attente et temps d'attente du pool"""
+        return self.backend.stats()
+    
+    def query_report(self, limit: int = 10, sort: str = "total_ms") -> List[dict]:
+        """Requêtes les plus coûteuses (voir QueryMetrics.report)"""
+        return self.metrics.report(limit=limit, sort=sort)
+    
+    async def run_maintenance(self):
+        """Maintenance du backend (checkpoint WAL et PRAGMA optimize pour SQLite)"""
+        try:
+            await self.backend.run_maintenance()
+        except Exception as e:
+            logger.error(f"Erreur maintenance DB: {e}")
+    
+    async def compact_xp_rollups(self) -> int:
+        """
+        Replie en cumuls mensuels les mois entiers plus anciens que
+        ``xp_daily_keep_days`` jours (le mois en cours reste journalier)
+        
+        Returns:
+            int: Lignes journalières repliées
+        """
+        cutoff = (datetime.utcnow().date() - timedelta(days=self.xp_daily_keep_days)).replace(day=1)
+        folded = await self.xp_rollups.compact(XPRollupRepo.day_key(cutoff))
+        if folded:
+            logger.info(f"🗜️ {folded} cumuls d'XP journaliers repliés en mois (avant {cutoff})")
+        return folded
+    
+    async def snapshot_balances(self) -> int:
+        """
+        Instantané des soldes ayant bougé depuis le précédent, après
+        écriture des mouvements en attente
+        
+        Returns:
+            int: Membres photographiés
+        """
+        await self.ledger.flush()
+        taken = await self.ledger_entries.snapshot()
+        if taken:
+            logger.info(f"📸 Instantané de {taken} solde(s)")
+        return taken
+    
+    async def _maintenance_loop(self):
+        """Tâche périodique de maintenance"""
+        while True:
+            await asyncio.sleep(self.maintenance_interval)
+            await self.run_maintenance()
             
-            # Table des utilisateurs
-            await cursor.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    user_id INTEGER PRIMARY KEY,
-                    guild_id INTEGER,
-                    xp INTEGER DEFAULT 0,
-                    level INTEGER DEFAULT 0,
-                    coins INTEGER DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (guild_id) REFERENCES guilds(guild_id)
-                )
-            """)
+            # Repli des cumuls d'XP : une fois par jour suffit
+            today = datetime.utcnow().date()
+            if self._compacted_on != today:
+                try:
+                    await self.compact_xp_rollups()
+                    self._compacted_on = today
+                except Exception as e:
+                    logger.error(f"Erreur repli des cumuls d'XP: {e}")
             
-            await self.connection.commit()
\ No newline at end of file
+            if self._snapshotted_on != today:
+                try:
+                    await self.snapshot_balances()
+                    self._snapshotted_on = today
+                except Exception as e:
+                    logger.error(f"Erreur instantané des soldes: {e}")
+    
+    async def backup(self) -> list:
+        """
+        Sauvegarde à chaud de la base (tous les shards), compressée et vérifiée
+        
+        Returns:
+            list: Fichiers de sauvegarde créés (vide avec PostgreSQL)
+        """
+        files = self.backend.files()
+        if not files:
+            logger.warning("Aucun fichier SQLite à sauvegarder (utiliser pg_dump pour PostgreSQL)")
+            return []
+        return await self.backups.backup(files)
+    
+    async def _backup_loop(self):
+        """Tâche périodique de sauvegarde"""
+        while True:
+            await asyncio.sleep(self.backup_interval)
+            try:
+                await self.backup()
+            except Exception as e:
+                logger.error(f"Erreur sauvegarde DB: {e}")
+    
+    async def migrate(self):
+        """Applique les migrations de schéma manquantes (sur chaque shard)"""
+        for backend in self.backends:
+            async with backend.migration_runner() as runner:
+                applied = await runner.run()
+            if applied:
+                logger.info(f"📦 {backend.name} migré vers la version {applied[-1]}")
+    
+    async def create_tables(self):
+        """Crée les tables si elles n'existent pas (alias de migrate)"""
+        await self.migrate()
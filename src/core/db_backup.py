@@ -0,0 +1,190 @@
+"""
+Sauvegardes à chaud des fichiers SQLite (API de backup en ligne)
+"""
+import asyncio
+import gzip
+import shutil
+import sqlite3
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+import aiosqlite
+
+from .logger import setup_logger
+
+logger = setup_logger("DBBackup")
+
+
+class BackupError(Exception):
+    """Une sauvegarde n'a pas pu être créée ou vérifiée"""
+
+
+def verify_backup(path: Path):
+    """
+    Restaure une sauvegarde dans un fichier temporaire et vérifie son intégrité
+    
+    Raises:
+        BackupError: Si la sauvegarde est illisible ou corrompue
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        restored = Path(directory) / "restore.db"
+        if path.suffix == ".gz":
+            with gzip.open(path, "rb") as source, open(restored, "wb") as target:
+                shutil.copyfileobj(source, target)
+        else:
+            shutil.copyfile(path, restored)
+        
+        connection = sqlite3.connect(restored)
+        try:
+            result = connection.execute("PRAGMA integrity_check").fetchone()[0]
+            tables = connection.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table'"
+            ).fetchone()[0]
+        except sqlite3.DatabaseError as e:
+            raise BackupError(f"{path.name} illisible: {e}") from e
+        finally:
+            connection.close()
+    
+    if result != "ok":
+        raise BackupError(f"{path.name} corrompue: {result}")
+    if not tables:
+        raise BackupError(f"{path.name} ne contient aucune table")
+
+
+def compress_file(path: Path) -> Path:
+    """Compresse un fichier en .gz puis supprime l'original"""
+    compressed = path.with_name(path.name + ".gz")
+    with open(path, "rb") as source, gzip.open(compressed, "wb", compresslevel=6) as target:
+        shutil.copyfileobj(source, target)
+    path.unlink()
+    return compressed
+
+
+class BackupManager:
+    """
+    Sauvegarde les fichiers SQLite sans interrompre le bot.
+    
+    La copie passe par une connexion dédiée (son propre thread aiosqlite) :
+    ni l'écrivain ni les lecteurs du pool ne sont bloqués. Cette connexion
+    ouvre une transaction de lecture avant la copie ; en WAL, la sauvegarde
+    reflète donc un instantané cohérent, et les commits du bot pendant la
+    copie ne la font pas recommencer. Les pages sont copiées par lots de
+    ``pages_per_step`` avec une pause entre deux lots. Compression,
+    vérification et rotation s'exécutent dans un thread.
+    """
+    
+    def __init__(
+        self,
+        directory: str = "data/backups",
+        keep: int = 7,
+        compress: bool = True,
+        verify: bool = True,
+        pages_per_step: int = 256,
+        step_sleep: float = 0.005
+    ):
+        """
+        Args:
+            directory: Dossier des sauvegardes
+            keep: Nombre de sauvegardes conservées par fichier de base
+            compress: Compresser les sauvegardes (gzip)
+            verify: Restaurer et vérifier chaque sauvegarde après sa création
+            pages_per_step: Pages copiées entre deux pauses
+            step_sleep: Pause (secondes) entre deux lots de pages
+        """
+        self.directory = Path(directory)
+        self.keep = max(1, keep)
+        self.compress = compress
+        self.verify = verify
+        self.pages_per_step = max(1, pages_per_step)
+        self.step_sleep = step_sleep
+        self._lock = asyncio.Lock()
+        
+        self.last_backup: Optional[datetime] = None
+        self.last_files: List[Path] = []
+    
+    async def backup(self, db_paths: List[str]) -> List[Path]:
+        """
+        Sauvegarde plusieurs fichiers (un par shard) sous le même horodatage
+        
+        Returns:
+            List[Path]: Fichiers de sauvegarde créés
+        """
+        async with self._lock:
+            stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+            self.directory.mkdir(parents=True, exist_ok=True)
+            
+            files = []
+            for db_path in db_paths:
+                files.append(await self._backup_file(Path(db_path), stamp))
+            
+            self.last_backup = datetime.utcnow()
+            self.last_files = files
+            return files
+    
+    async def _backup_file(self, db_path: Path, stamp: str) -> Path:
+        """Copie, compresse, vérifie puis fait tourner les sauvegardes d'un fichier"""
+        target = self.directory / f"{db_path.stem}-{stamp}.db"
+        started = asyncio.get_running_loop().time()
+        
+        await self._copy(db_path, target)
+        if self.compress:
+            target = await asyncio.to_thread(compress_file, target)
+        if self.verify:
+            try:
+                await asyncio.to_thread(verify_backup, target)
+            except BackupError:
+                target.unlink(missing_ok=True)
+                raise
+        
+        removed = await asyncio.to_thread(self._rotate, db_path.stem)
+        
+        elapsed = asyncio.get_running_loop().time() - started
+        size = target.stat().st_size / 1024
+        logger.info(
+            f"💾 Sauvegarde {target.name} ({size:.0f} Kio, {elapsed:.1f} s)"
+            + (f", {len(removed)} ancienne(s) supprimée(s)" if removed else "")
+        )
+        return target
+    
+    async def _copy(self, db_path: Path, target: Path):
+        """Copie en ligne d'un fichier SQLite vers ``target``"""
+        source = await aiosqlite.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            # Transaction de lecture : fige l'instantané copié
+            await source.execute("BEGIN")
+            await source.execute("SELECT COUNT(*) FROM sqlite_master")
+            
+            destination = await aiosqlite.connect(target)
+            try:
+                await source.backup(destination, pages=self.pages_per_step, sleep=self.step_sleep)
+            finally:
+                await destination.close()
+            await source.rollback()
+        except Exception as e:
+            target.unlink(missing_ok=True)
+            raise BackupError(f"Copie de {db_path} impossible: {e}") from e
+        finally:
+            await source.close()
+    
+    def _rotate(self, stem: str) -> List[Path]:
+        """Supprime les sauvegardes les plus anciennes au-delà de ``keep``"""
+        backups = sorted(
+            path for path in self.directory.glob(f"{stem}-*.db*")
+            if path.name.endswith((".db", ".db.gz"))
+        )
+        removed = backups[:-self.keep]
+        for path in removed:
+            path.unlink(missing_ok=True)
+        return removed
+    
+    def list_backups(self) -> List[Path]:
+        """Sauvegardes présentes, de la plus récente à la plus ancienne"""
+        if not self.directory.exists():
+            return []
+        return sorted(
+            (path for path in self.directory.iterdir() if path.name.endswith((".db", ".db.gz"))),
+            key=lambda path: path.stat().st_mtime,
+            reverse=True
+        )
@@ -0,0 +1,157 @@
+"""
+Instrumentation des requêtes SQL : latences par empreinte et journal des requêtes lentes
+"""
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List
+
+from .logger import setup_logger
+
+logger = setup_logger("DBMetrics")
+
+# Littéraux remplacés par ? dans les empreintes
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDERS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+# Échantillons conservés par empreinte pour calculer les percentiles
+SAMPLE_SIZE = 512
+
+
+def fingerprint(sql: str) -> str:
+    """
+    Normalise une requête : littéraux remplacés par ?, listes IN réduites,
+    espaces compactés. Deux requêtes de même forme ont la même empreinte.
+    """
+    normalized = _STRING.sub("?", sql)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = _PLACEHOLDERS.sub("(?+)", normalized)
+    return _SPACES.sub(" ", normalized).strip()
+
+
+def _percentile(sorted_values: List[float], ratio: float) -> float:
+    """Percentile (plus proche rang) d'une liste triée"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(ratio * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+@dataclass
+class QueryStats:
+    """Statistiques d'une empreinte de requête"""
+    sql: str
+    count: int = 0
+    errors: int = 0
+    rows: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+    samples: Deque[float] = field(default_factory=lambda: deque(maxlen=SAMPLE_SIZE))
+    
+    def to_dict(self) -> dict:
+        """Résumé : nombre d'appels, latences (ms) et lignes"""
+        ordered = sorted(self.samples)
+        return {
+            "sql": self.sql,
+            "count": self.count,
+            "errors": self.errors,
+            "rows": self.rows,
+            "avg_rows": round(self.rows / self.count, 2) if self.count else 0,
+            "total_ms": round(self.total_time * 1000, 2),
+            "p50_ms": round(_percentile(ordered, 0.50) * 1000, 3),
+            "p95_ms": round(_percentile(ordered, 0.95) * 1000, 3),
+            "p99_ms": round(_percentile(ordered, 0.99) * 1000, 3),
+            "max_ms": round(self.max_time * 1000, 3),
+        }
+
+
+class QueryMetrics:
+    """
+    Collecte les latences de toutes les requêtes du DatabaseManager.
+    
+    Les requêtes dépassant ``slow_threshold_ms`` sont journalisées avec leur
+    plan d'exécution (au plus une fois par empreinte et par ``explain_cooldown``
+    secondes, pour ne pas inonder les logs).
+    """
+    
+    def __init__(self, slow_threshold_ms: float = 100, explain_cooldown: float = 300):
+        """
+        Args:
+            slow_threshold_ms: Seuil au-delà duquel une requête est lente (0 = désactivé)
+            explain_cooldown: Délai minimal entre deux EXPLAIN d'une même empreinte
+        """
+        self.slow_threshold = slow_threshold_ms / 1000
+        self.explain_cooldown = explain_cooldown
+        self.queries: Dict[str, QueryStats] = {}
+        self.slow_queries = 0
+        self._fingerprints: Dict[str, str] = {}
+        self._explained: Dict[str, float] = {}
+    
+    def fingerprint(self, sql: str) -> str:
+        """Empreinte d'une requête (mise en cache par texte SQL)"""
+        key = self._fingerprints.get(sql)
+        if key is None:
+            key = fingerprint(sql)
+            if len(self._fingerprints) < 4096:
+                self._fingerprints[sql] = key
+        return key
+    
+    def record(self, sql: str, elapsed: float, rows: int = 0, error: bool = False) -> bool:
+        """
+        Enregistre une exécution
+        
+        Returns:
+            bool: True si la requête est lente et doit être expliquée
+        """
+        key = self.fingerprint(sql)
+        stats = self.queries.get(key)
+        if stats is None:
+            stats = self.queries[key] = QueryStats(key)
+        
+        stats.count += 1
+        stats.rows += rows
+        stats.total_time += elapsed
+        stats.max_time = max(stats.max_time, elapsed)
+        stats.samples.append(elapsed)
+        if error:
+            stats.errors += 1
+        
+        if not self.slow_threshold or elapsed < self.slow_threshold:
+            return False
+        
+        self.slow_queries += 1
+        logger.warning(f"🐢 Requête lente ({elapsed * 1000:.1f} ms, {rows} lignes): {key}")
+        
+        now = time.monotonic()
+        if now - self._explained.get(key, float("-inf")) < self.explain_cooldown:
+            return False
+        self._explained[key] = now
+        return True
+    
+    def log_plan(self, sql: str, plan: List[tuple]):
+        """Journalise le plan d'exécution d'une requête lente"""
+        if not plan:
+            return
+        lines = "\n".join("    " + " | ".join(str(col) for col in row) for row in plan)
+        logger.warning(f"📋 Plan de {self.fingerprint(sql)}\n{lines}")
+    
+    def report(self, limit: int = 10, sort: str = "total_ms") -> List[dict]:
+        """
+        Empreintes les plus coûteuses
+        
+        Args:
+            limit: Nombre d'empreintes retournées
+            sort: Clé de tri (total_ms, p95_ms, p99_ms, count...)
+        """
+        summaries = [stats.to_dict() for stats in self.queries.values()]
+        summaries.sort(key=lambda s: s.get(sort, 0), reverse=True)
+        return summaries[:limit]
+    
+    def reset(self):
+        """Remet les compteurs à zéro"""
+        self.queries.clear()
+        self._explained.clear()
+        self.slow_queries = 0
@@ -0,0 +1,188 @@
+"""
+Pool de connexions SQLite : un écrivain dédié et plusieurs lecteurs
+"""
+import asyncio
+import re
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import List, Optional
+
+import aiosqlite
+
+# PRAGMA autorisés dans un profil, et ceux qui n'ont de sens que pour l'écrivain
+ALLOWED_PRAGMAS = (
+    "journal_mode", "synchronous", "cache_size", "mmap_size",
+    "temp_store", "busy_timeout", "wal_autocheckpoint",
+)
+WRITER_ONLY_PRAGMAS = ("journal_mode", "wal_autocheckpoint")
+_PRAGMA_VALUE = re.compile(r"^-?[A-Za-z0-9_]+$")
+
+# Taille du cache de requêtes compilées de chaque connexion
+STATEMENT_CACHE_SIZE = 256
+
+
+@dataclass
+class PoolStats:
+    """Statistiques d'attente d'un côté du pool (lecture ou écriture)"""
+    acquisitions: int = 0
+    waiting: int = 0
+    max_waiting: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    
+    @property
+    def avg_wait(self) -> float:
+        """Temps d'attente moyen en secondes"""
+        return self.total_wait / self.acquisitions if self.acquisitions else 0.0
+    
+    def to_dict(self) -> dict:
+        """Convertit les statistiques en dictionnaire"""
+        return {
+            "acquisitions": self.acquisitions,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "avg_wait_ms": round(self.avg_wait * 1000, 3),
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+        }
+
+
+class ConnectionPool:
+    """
+    Pool de connexions aiosqlite.
+    
+    Une seule connexion écrit (SQLite n'accepte qu'un écrivain à la fois),
+    les lectures sont réparties sur ``size`` connexions en lecture seule pour
+    ne plus attendre derrière les écritures.
+    """
+    
+    def __init__(self, db_path: str, size: int = 4, pragmas: Optional[dict] = None):
+        """
+        Initialise le pool
+        
+        Args:
+            db_path: Chemin du fichier SQLite
+            size: Nombre de connexions en lecture seule
+            pragmas: Profil PRAGMA appliqué à chaque connexion ouverte
+        """
+        self.db_path = db_path
+        self.pragmas = self._validate_pragmas(pragmas or {})
+        # Une base en mémoire n'est pas partageable entre connexions
+        self.size = 0 if db_path == ":memory:" else max(0, size)
+        
+        self.writer: Optional[aiosqlite.Connection] = None
+        self._readers: List[aiosqlite.Connection] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._write_lock = asyncio.Lock()
+        
+        self.read_stats = PoolStats()
+        self.write_stats = PoolStats()
+    
+    async def open(self):
+        """Ouvre la connexion d'écriture"""
+        if self.writer:
+            return
+        
+        self.writer = await aiosqlite.connect(self.db_path, cached_statements=STATEMENT_CACHE_SIZE)
+        await self._apply_pragmas(self.writer, writer=True)
+        self._idle = asyncio.Queue()
+    
+    async def open_readers(self):
+        """Ouvre les connexions de lecture (après création du schéma)"""
+        for _ in range(self.size - len(self._readers)):
+            reader = await aiosqlite.connect(
+                f"file:{self.db_path}?mode=ro",
+                uri=True,
+                cached_statements=STATEMENT_CACHE_SIZE
+            )
+            await self._apply_pragmas(reader, writer=False)
+            self._readers.append(reader)
+            self._idle.put_nowait(reader)
+    
+    async def close(self):
+        """Ferme toutes les connexions du pool"""
+        for reader in self._readers:
+            await reader.close()
+        self._readers.clear()
+        self._idle = None
+        
+        if self.writer:
+            await self.writer.close()
+            self.writer = None
+    
+    @staticmethod
+    def _validate_pragmas(pragmas: dict) -> dict:
+        """Vérifie le profil PRAGMA (les valeurs sont interpolées dans le SQL)"""
+        for name, value in pragmas.items():
+            if name not in ALLOWED_PRAGMAS:
+                raise ValueError(f"PRAGMA non supporté: {name}")
+            if not _PRAGMA_VALUE.match(str(value)):
+                raise ValueError(f"Valeur invalide pour PRAGMA {name}: {value!r}")
+        return dict(pragmas)
+    
+    async def _apply_pragmas(self, connection: aiosqlite.Connection, writer: bool):
+        """Applique le profil PRAGMA à une connexion"""
+        for name, value in self.pragmas.items():
+            if not writer and name in WRITER_ONLY_PRAGMAS:
+                continue
+            await connection.execute(f"PRAGMA {name} = {value}")
+    
+    @staticmethod
+    def _record(stats: PoolStats, started: float):
+        """Enregistre une acquisition et son temps d'attente"""
+        waited = time.perf_counter() - started
+        stats.acquisitions += 1
+        stats.total_wait += waited
+        stats.max_wait = max(stats.max_wait, waited)
+    
+    @staticmethod
+    def _enqueue(stats: PoolStats) -> float:
+        """Signale un appelant en attente et retourne l'instant de départ"""
+        stats.waiting += 1
+        stats.max_waiting = max(stats.max_waiting, stats.waiting)
+        return time.perf_counter()
+    
+    @asynccontextmanager
+    async def acquire_read(self):
+        """Emprunte une connexion en lecture seule"""
+        if not self._readers:
+            # Pas de lecteur dédié : on lit sur l'écrivain
+            async with self.acquire_write() as connection:
+                yield connection
+            return
+        
+        started = self._enqueue(self.read_stats)
+        try:
+            connection = await self._idle.get()
+        finally:
+            self.read_stats.waiting -= 1
+        self._record(self.read_stats, started)
+        
+        try:
+            yield connection
+        finally:
+            self._idle.put_nowait(connection)
+    
+    @asynccontextmanager
+    async def acquire_write(self):
+        """Emprunte la connexion d'écriture (accès exclusif)"""
+        started = self._enqueue(self.write_stats)
+        try:
+            await self._write_lock.acquire()
+        finally:
+            self.write_stats.waiting -= 1
+        self._record(self.write_stats, started)
+        
+        try:
+            yield self.writer
+        finally:
+            self._write_lock.release()
+    
+    def stats(self) -> dict:
+        """Retourne la profondeur des files d'attente et les temps d'attente"""
+        return {
+            "readers": len(self._readers),
+            "idle_readers": self._idle.qsize() if self._idle else 0,
+            "read": self.read_stats.to_dict(),
+            "write": self.write_stats.to_dict(),
+        }
@@ -0,0 +1,332 @@
+"""
+Index de classement en mémoire (XP par serveur, trié)
+"""
+import asyncio
+import time
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+from .logger import setup_logger
+
+if TYPE_CHECKING:
+    from .database import DatabaseManager
+
+logger = setup_logger("Leaderboard")
+
+
+@dataclass(slots=True)
+class LeaderboardEntry:
+    """Une ligne du classement"""
+    rank: int
+    user_id: int
+    xp: int
+    level: int
+
+
+class SortedKeys:
+    """
+    Liste triée découpée en blocs d'au plus ``2 * load`` clés.
+    
+    Une insertion ou un retrait ne décale que le bloc concerné
+    (O(log n + load)) au lieu de toute la liste. La position d'une clé
+    ajoute la taille des blocs précédents, cumulée une fois après chaque
+    modification puis réutilisée par les lectures suivantes.
+    """
+    
+    __slots__ = ("load", "_blocks", "_maxes", "_offsets", "_len")
+    
+    def __init__(self, keys: Iterable[Tuple[int, int]] = (), load: int = 512):
+        ordered = sorted(keys)
+        self.load = max(1, load)
+        self._blocks: List[List[Tuple[int, int]]] = [
+            ordered[start:start + self.load] for start in range(0, len(ordered), self.load)
+        ]
+        self._maxes: List[Tuple[int, int]] = [block[-1] for block in self._blocks]
+        self._offsets: Optional[List[int]] = None
+        self._len = len(ordered)
+    
+    def __len__(self) -> int:
+        return self._len
+    
+    def add(self, key: Tuple[int, int]):
+        """Insère une clé"""
+        if not self._blocks:
+            self._blocks.append([key])
+            self._maxes.append(key)
+        else:
+            index = min(bisect_left(self._maxes, key), len(self._blocks) - 1)
+            block = self._blocks[index]
+            insort(block, key)
+            self._maxes[index] = block[-1]
+            if len(block) > 2 * self.load:
+                # Bloc trop long : le couper en deux
+                self._blocks[index:index + 1] = [block[:self.load], block[self.load:]]
+                self._maxes[index:index + 1] = [block[self.load - 1], block[-1]]
+        self._len += 1
+        self._offsets = None
+    
+    def remove(self, key: Tuple[int, int]):
+        """Retire une clé présente"""
+        index = bisect_left(self._maxes, key)
+        block = self._blocks[index]
+        del block[bisect_left(block, key)]
+        if block:
+            self._maxes[index] = block[-1]
+        else:
+            del self._blocks[index]
+            del self._maxes[index]
+        self._len -= 1
+        self._offsets = None
+    
+    def _block_offsets(self) -> List[int]:
+        """Position de la première clé de chaque bloc"""
+        if self._offsets is None:
+            offsets, total = [], 0
+            for block in self._blocks:
+                offsets.append(total)
+                total += len(block)
+            self._offsets = offsets
+        return self._offsets
+    
+    def bisect_left(self, key: Tuple[int, int]) -> int:
+        """Nombre de clés strictement inférieures à ``key``"""
+        index = bisect_left(self._maxes, key)
+        if index == len(self._blocks):
+            return self._len
+        return self._block_offsets()[index] + bisect_left(self._blocks[index], key)
+    
+    def bisect_right(self, key: Tuple[int, int]) -> int:
+        """Nombre de clés inférieures ou égales à ``key``"""
+        index = bisect_right(self._maxes, key)
+        if index == len(self._blocks):
+            return self._len
+        return self._block_offsets()[index] + bisect_right(self._blocks[index], key)
+    
+    def slice(self, start: int, stop: int) -> List[Tuple[int, int]]:
+        """Clés de positions [start, stop)"""
+        if start >= stop or start >= self._len:
+            return []
+        offsets = self._block_offsets()
+        index = bisect_right(offsets, start) - 1
+        position = start - offsets[index]
+        keys: List[Tuple[int, int]] = []
+        while index < len(self._blocks) and len(keys) < stop - start:
+            keys.extend(self._blocks[index][position:position + stop - start - len(keys)])
+            index += 1
+            position = 0
+        return keys
+
+
+class GuildBoard:
+    """
+    Classement d'un serveur : clés (-xp, user_id) triées.
+    
+    La position d'un membre se trouve par bisect ; une mise à jour retire
+    puis réinsère sa clé dans un seul bloc de SortedKeys, sans décaler
+    tout le classement. À XP égale, l'ordre suit user_id.
+    """
+    
+    __slots__ = ("keys", "members", "last_used")
+    
+    def __init__(self, rows: Iterable[Tuple[int, int, int]]):
+        """
+        Args:
+            rows: (user_id, xp, level) de chaque membre
+        """
+        self.members: Dict[int, Tuple[int, int]] = {}
+        for user_id, xp, level in rows:
+            self.members[user_id] = (xp, level)
+        self.keys = SortedKeys((-xp, user_id) for user_id, (xp, _) in self.members.items())
+        self.last_used = time.monotonic()
+    
+    def __len__(self) -> int:
+        return len(self.keys)
+    
+    def update(self, user_id: int, xp: int, level: int):
+        """Enregistre le nouveau total d'un membre"""
+        previous = self.members.get(user_id)
+        if previous is not None:
+            if previous[0] != xp:
+                self.keys.remove((-previous[0], user_id))
+                self.keys.add((-xp, user_id))
+        else:
+            self.keys.add((-xp, user_id))
+        self.members[user_id] = (xp, level)
+    
+    def rank_of(self, user_id: int) -> Optional[int]:
+        """Position d'un membre (1 = premier), None s'il n'a pas d'XP"""
+        entry = self.members.get(user_id)
+        if entry is None:
+            return None
+        return self.keys.bisect_left((-entry[0], user_id)) + 1
+    
+    def page(self, offset: int = 0, limit: int = 10) -> List[LeaderboardEntry]:
+        """Tranche du classement à partir de ``offset``"""
+        return [
+            LeaderboardEntry(offset + index + 1, user_id, -negative_xp, self.members[user_id][1])
+            for index, (negative_xp, user_id) in enumerate(self.keys.slice(offset, offset + limit))
+        ]
+    
+    def after(self, cursor: Optional[Tuple[int, int]], limit: int = 10) -> List[LeaderboardEntry]:
+        """Tranche du classement qui suit ``cursor`` = (xp, user_id)"""
+        if cursor is None:
+            return self.page(0, limit)
+        return self.page(self.keys.bisect_right((-cursor[0], cursor[1])), limit)
+
+
+class LeaderboardIndex:
+    """
+    Classements XP en mémoire, un par serveur.
+    
+    Les classements sont chargés au démarrage par preload(), ou à la
+    première demande pour un serveur qui n'en a pas, puis tenus à jour par
+    XPBuffer à chaque écriture des gains. Chaque écriture reportée (ou
+    invalidation) change la version du serveur : une lecture commencée
+    avant n'est pas gardée, elle pourrait manquer ces gains. Les serveurs
+    non consultés depuis ``idle_ttl`` secondes sont oubliés, et au plus
+    ``max_guilds`` classements restent en mémoire.
+    """
+    
+    # Lectures tentées quand des gains sont écrits pendant le chargement
+    LOAD_ATTEMPTS = 3
+    
+    def __init__(self, db: "DatabaseManager", idle_ttl: float = 1800.0, max_guilds: int = 500):
+        """
+        Args:
+            db: Gestionnaire de base de données
+            idle_ttl: Secondes sans consultation avant d'oublier un serveur
+            max_guilds: Nombre maximal de classements en mémoire
+        """
+        self.db = db
+        self.idle_ttl = idle_ttl
+        self.max_guilds = max(1, max_guilds)
+        
+        self._boards: Dict[int, GuildBoard] = {}
+        self._loading: Dict[int, asyncio.Future] = {}
+        # Version de chaque serveur, changée à chaque écriture reportée
+        self._versions: Dict[int, int] = {}
+        
+        # Statistiques
+        self.loads = 0
+        self.stale_loads = 0
+        self.hits = 0
+    
+    async def board(self, guild_id: int) -> GuildBoard:
+        """Classement d'un serveur (chargé si besoin)"""
+        board = self._boards.get(guild_id)
+        if board is not None:
+            self.hits += 1
+            board.last_used = time.monotonic()
+            return board
+        
+        # Une seule lecture même si plusieurs commandes arrivent ensemble
+        loading = self._loading.get(guild_id)
+        if loading is None:
+            loading = asyncio.ensure_future(self._load(guild_id))
+            self._loading[guild_id] = loading
+            loading.add_done_callback(lambda _: self._loading.pop(guild_id, None))
+        return await asyncio.shield(loading)
+    
+    async def _load(self, guild_id: int) -> GuildBoard:
+        """
+        Lit les totaux d'un serveur et construit son classement
+        
+        Si des gains sont écrits pendant la lecture, elle est refaite (au
+        plus ``LOAD_ATTEMPTS`` fois) ; un classement encore dépassé sert la
+        demande en cours sans être gardé.
+        """
+        for _ in range(self.LOAD_ATTEMPTS):
+            version = self._versions.get(guild_id, 0)
+            board = GuildBoard(await self.db.users.xp_totals(guild_id))
+            self.loads += 1
+            if self._versions.get(guild_id, 0) == version:
+                self._evict()
+                self._boards[guild_id] = board
+                return board
+            self.stale_loads += 1
+        return board
+    
+    async def preload(self, guild_ids: Iterable[int]) -> int:
+        """
+        Charge d'avance les classements de serveurs (démarrage du bot)
+        
+        Les lectures se suivent, dans l'ordre de ``guild_ids``, jusqu'à
+        ``max_guilds`` classements ; les serveurs déjà en mémoire sont sautés.
+        
+        Returns:
+            int: Classements chargés
+        """
+        loaded = 0
+        for guild_id in guild_ids:
+            if len(self._boards) >= self.max_guilds:
+                break
+            if guild_id in self._boards:
+                continue
+            try:
+                await self.board(guild_id)
+                loaded += 1
+            except Exception as e:
+                logger.error(f"Classement du serveur {guild_id} non chargé: {e}")
+        return loaded
+    
+    def _bump(self, guild_id: int):
+        """Change la version d'un serveur (lectures en cours périmées)"""
+        self._versions[guild_id] = self._versions.get(guild_id, 0) + 1
+    
+    def apply(self, guild_id: int, rows: Iterable[Tuple[int, int, int]]):
+        """
+        Reporte des totaux écrits en base (appelé par XPBuffer)
+        
+        Args:
+            rows: (user_id, xp, level) des membres modifiés
+        """
+        self._bump(guild_id)
+        board = self._boards.get(guild_id)
+        if board is None:
+            return  # Sera lu à jour à la prochaine demande
+        for user_id, xp, level in rows:
+            board.update(user_id, xp, level)
+    
+    def invalidate(self, guild_id: int):
+        """Oublie le classement d'un serveur (relu à la prochaine demande)"""
+        self._bump(guild_id)
+        self._boards.pop(guild_id, None)
+    
+    def _evict(self):
+        """Oublie les classements inactifs, puis les moins récents si plein"""
+        deadline = time.monotonic() - self.idle_ttl
+        for guild_id in [g for g, board in self._boards.items() if board.last_used < deadline]:
+            del self._boards[guild_id]
+        
+        while len(self._boards) >= self.max_guilds:
+            oldest = min(self._boards, key=lambda g: self._boards[g].last_used)
+            del self._boards[oldest]
+    
+    async def top(self, guild_id: int, limit: int = 10, offset: int = 0) -> List[LeaderboardEntry]:
+        """Page du classement"""
+        return (await self.board(guild_id)).page(offset, limit)
+    
+    async def after(self, guild_id: int, cursor: Optional[Tuple[int, int]], limit: int = 10) -> List[LeaderboardEntry]:
+        """Page du classement qui suit ``cursor`` = (xp, user_id)"""
+        return (await self.board(guild_id)).after(cursor, limit)
+    
+    async def rank_of(self, guild_id: int, user_id: int) -> Tuple[Optional[int], int]:
+        """
+        Position d'un membre
+        
+        Returns:
+            Tuple[Optional[int], int]: (position ou None, nombre de membres classés)
+        """
+        board = await self.board(guild_id)
+        return board.rank_of(user_id), len(board)
+    
+    def stats(self) -> dict:
+        """Classements en mémoire et taux de succès"""
+        return {
+            "guilds": len(self._boards),
+            "members": sum(len(board) for board in self._boards.values()),
+            "loads": self.loads,
+            "stale_loads": self.stale_loads,
+            "hits": self.hits,
+        }
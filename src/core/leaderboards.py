@@ -0,0 +1,268 @@
+"""
+Pages de classement limitées aux membres encore présents sur le serveur
+"""
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import discord
+
+from .logger import setup_logger
+
+logger = setup_logger("Leaderboards")
+
+# Position dans un classement : (score, user_id) de la dernière ligne lue
+Cursor = Tuple[int, int]
+# Lecture d'une tranche triée après un curseur : (guild_id, after, limit) -> lignes
+Fetcher = Callable[[int, Optional[Cursor], int], Awaitable[Sequence[Any]]]
+
+# Identifiants acceptés par un appel à query_members
+QUERY_CHUNK = 100
+
+
+class MembershipCache:
+    """
+    Membres partis, mémorisés par serveur.
+    
+    Les présents sont lus dans le cache de discord.py (get_member) ; les
+    inconnus d'une page sont résolus ensemble par un seul query_members.
+    Ceux qui restent introuvables sont notés absents pendant ``ttl``
+    secondes, pour ne pas les redemander à chaque page.
+    """
+    
+    def __init__(self, ttl: float = 900.0):
+        """
+        Args:
+            ttl: Secondes avant de revérifier les membres notés absents
+        """
+        self.ttl = ttl
+        self._absent: Dict[int, Set[int]] = {}
+        self._expires: Dict[int, float] = {}
+        
+        # Statistiques
+        self.queries = 0
+        self.resolved = 0
+    
+    def _absent_set(self, guild_id: int) -> Set[int]:
+        """Absents d'un serveur (vidés une fois le délai écoulé)"""
+        now = time.monotonic()
+        if self._expires.get(guild_id, 0.0) <= now:
+            self._absent[guild_id] = set()
+            self._expires[guild_id] = now + self.ttl
+        return self._absent[guild_id]
+    
+    async def resolve(self, guild: discord.Guild, user_ids: Sequence[int]) -> Dict[int, discord.Member]:
+        """
+        Membres présents parmi ``user_ids``
+        
+        Returns:
+            Dict[int, discord.Member]: Membres trouvés, par user_id
+        """
+        absent = self._absent_set(guild.id)
+        found: Dict[int, discord.Member] = {}
+        unknown: List[int] = []
+        
+        for user_id in user_ids:
+            if user_id in absent:
+                continue
+            member = guild.get_member(user_id)
+            if member is not None:
+                found[user_id] = member
+            else:
+                unknown.append(user_id)
+        
+        for start in range(0, len(unknown), QUERY_CHUNK):
+            chunk = unknown[start:start + QUERY_CHUNK]
+            try:
+                members = await guild.query_members(user_ids=chunk, cache=True)
+            except Exception as e:
+                # Sans réponse, on n'affiche pas ces membres mais on ne les note pas absents
+                logger.warning(f"Résolution des membres de {guild.id} échouée: {e}")
+                continue
+            
+            self.queries += 1
+            self.resolved += len(members)
+            for member in members:
+                found[member.id] = member
+            absent.update(user_id for user_id in chunk if user_id not in found)
+        
+        return found
+    
+    def member_joined(self, guild_id: int, user_id: int):
+        """Un membre (re)vient sur le serveur"""
+        absent = self._absent.get(guild_id)
+        if absent is not None:
+            absent.discard(user_id)
+    
+    def member_left(self, guild_id: int, user_id: int):
+        """Un membre quitte le serveur"""
+        self._absent_set(guild_id).add(user_id)
+    
+    def forget(self, guild_id: int):
+        """Oublie un serveur (bot retiré)"""
+        self._absent.pop(guild_id, None)
+        self._expires.pop(guild_id, None)
+
+
+@dataclass(slots=True)
+class LeaderboardPage:
+    """Une page de classement filtrée"""
+    rows: List[Tuple[discord.Member, Any]]
+    next_cursor: Optional[Cursor]
+    
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+
+class LeaderboardService:
+    """
+    Remplit des pages de classement avec des membres présents.
+    
+    Chaque lecture demande ``overfetch`` fois la taille de la page, triée
+    par (score décroissant, user_id) et reprise après un curseur (keyset)
+    plutôt qu'un OFFSET. Les membres partis sont écartés ; on relit la
+    suite tant que la page n'est pas pleine, dans la limite de
+    ``max_rounds`` lectures.
+    """
+    
+    def __init__(self, overfetch: int = 2, max_rounds: int = 5, membership_ttl: float = 900.0):
+        """
+        Args:
+            overfetch: Multiplicateur de la taille de page à chaque lecture
+            max_rounds: Lectures maximales pour remplir une page
+            membership_ttl: Durée de mémorisation des membres partis
+        """
+        self.overfetch = max(1, overfetch)
+        self.max_rounds = max(1, max_rounds)
+        self.members = MembershipCache(membership_ttl)
+    
+    async def page(
+        self,
+        guild: discord.Guild,
+        fetch: Fetcher,
+        key: Callable[[Any], Cursor],
+        after: Optional[Cursor] = None,
+        limit: int = 10
+    ) -> LeaderboardPage:
+        """
+        Lit une page de ``limit`` membres présents
+        
+        Args:
+            guild: Serveur du classement
+            fetch: Lecture triée après un curseur
+            key: (score, user_id) d'une ligne, pour construire le curseur
+            after: Curseur de la page précédente (None pour la première)
+            limit: Membres par page
+        """
+        rows: List[Tuple[discord.Member, Any]] = []
+        cursor = after
+        
+        for _ in range(self.max_rounds):
+            batch_size = limit * self.overfetch
+            batch = await fetch(guild.id, cursor, batch_size)
+            members = await self.members.resolve(guild, [key(row)[1] for row in batch])
+            
+            for row in batch:
+                cursor = key(row)
+                member = members.get(cursor[1])
+                if member is None:
+                    continue
+                rows.append((member, row))
+                if len(rows) == limit:
+                    break
+            
+            if len(rows) == limit:
+                # La page suivante reprend après le dernier membre affiché
+                exhausted = cursor == key(batch[-1]) and len(batch) < batch_size
+                return LeaderboardPage(rows, None if exhausted else cursor)
+            if len(batch) < batch_size:
+                return LeaderboardPage(rows, None)
+        
+        # Page incomplète après max_rounds lectures : la suite reste accessible
+        return LeaderboardPage(rows, cursor)
+
+
+class LeaderboardView(discord.ui.View):
+    """Boutons Précédent / Suivant d'un classement paginé par curseurs"""
+    
+    def __init__(
+        self,
+        service: LeaderboardService,
+        interaction: discord.Interaction,
+        fetch: Fetcher,
+        key: Callable[[Any], Cursor],
+        render: Callable[[discord.Guild, LeaderboardPage, int], discord.Embed],
+        per_page: int = 10,
+        timeout: float = 120.0
+    ):
+        """
+        Args:
+            render: Construit l'embed d'une page (serveur, page, premier rang)
+        """
+        super().__init__(timeout=timeout)
+        self.service = service
+        self.interaction = interaction
+        self.fetch = fetch
+        self.key = key
+        self.render = render
+        self.per_page = per_page
+        
+        # Curseur de début de chaque page déjà vue (retour arrière sans relecture d'OFFSET)
+        self.starts: List[Optional[Cursor]] = [None]
+        self.current: Optional[LeaderboardPage] = None
+    
+    @property
+    def index(self) -> int:
+        return len(self.starts) - 1
+    
+    async def load(self, index: Optional[int] = None) -> LeaderboardPage:
+        """Charge la page ``index`` (la dernière ouverte par défaut)"""
+        if index is not None:
+            del self.starts[index + 1:]
+        self.current = await self.service.page(
+            self.interaction.guild, self.fetch, self.key, self.starts[-1], self.per_page
+        )
+        self.previous_page.disabled = self.index == 0
+        self.next_page.disabled = not self.current.has_more
+        return self.current
+    
+    async def skip_to(self, page: int) -> LeaderboardPage:
+        """Avance jusqu'à la page ``page`` (1 = première) ou la dernière existante"""
+        current = await self.load()
+        while self.index + 1 < page and current.has_more:
+            self.starts.append(current.next_cursor)
+            current = await self.load()
+        return current
+    
+    def embed(self) -> discord.Embed:
+        return self.render(self.interaction.guild, self.current, self.index * self.per_page + 1)
+    
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.interaction.user.id:
+            await interaction.response.send_message(
+                "❌ Seul l'auteur de la commande peut changer de page.",
+                ephemeral=True
+            )
+            return False
+        return True
+    
+    @discord.ui.button(label="Précédent", style=discord.ButtonStyle.secondary, emoji="◀️")
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.load(max(0, self.index - 1))
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+    
+    @discord.ui.button(label="Suivant", style=discord.ButtonStyle.secondary, emoji="▶️")
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self.current and self.current.has_more:
+            self.starts.append(self.current.next_cursor)
+            await self.load()
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+    
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        try:
+            await self.interaction.edit_original_response(view=self)
+        except discord.HTTPException:
+            pass
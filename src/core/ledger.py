@@ -0,0 +1,139 @@
+"""
+Journal de l'économie : mouvements accumulés en mémoire et insérés par lots
+"""
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional, Set
+
+from .logger import setup_logger
+
+if TYPE_CHECKING:
+    from .database import DatabaseManager
+
+logger = setup_logger("Ledger")
+
+
+class LedgerBuffer:
+    """
+    Mouvements de coins en attente d'écriture, par serveur.
+    
+    ``record`` ne fait qu'ajouter une ligne en mémoire : le débit ou crédit
+    a déjà été validé par sa requête conditionnelle. Dans une transaction,
+    la ligne n'est ajoutée qu'après son COMMIT, pour que le journal ne
+    garde pas un mouvement annulé. Les lignes sont
+    insérées avec un seul executemany par serveur toutes les
+    ``flush_interval`` secondes, ou dès que ``max_pending`` lignes attendent.
+    L'horodatage est celui du mouvement, pas celui de l'écriture.
+    """
+    
+    def __init__(self, db: "DatabaseManager", flush_interval: float = 2.0, max_pending: int = 500):
+        """
+        Args:
+            db: Gestionnaire de base de données
+            flush_interval: Secondes entre deux écritures du journal
+            max_pending: Lignes en attente déclenchant une écriture immédiate
+        """
+        self.db = db
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        
+        self._pending: Dict[int, List[tuple]] = defaultdict(list)
+        self._count = 0
+        self._task: Optional[asyncio.Task] = None
+        self._early: Set[asyncio.Task] = set()
+        self._flush_lock = asyncio.Lock()
+        
+        # Statistiques
+        self.recorded = 0
+        self.flushes = 0
+        self.rows_written = 0
+    
+    def start(self):
+        """Démarre la tâche d'écriture périodique"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def close(self):
+        """Arrête la tâche puis écrit les mouvements restants"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def record(
+        self,
+        guild_id: int,
+        user_id: int,
+        kind: str,
+        amount: int,
+        balance_after: int,
+        counterparty_id: Optional[int] = None,
+        reference: Optional[str] = None
+    ):
+        """
+        Met un mouvement en attente d'écriture
+        
+        Args:
+            kind: Type du mouvement (valeur de TransactionType)
+            amount: Montant signé (négatif quand les coins quittent le portefeuille)
+            balance_after: Solde du portefeuille après le mouvement
+        """
+        row = (guild_id, user_id, kind, amount, balance_after, counterparty_id, reference, datetime.utcnow())
+        self.db.after_commit(lambda: self._append(row), guild_id=guild_id)
+    
+    def _append(self, row: tuple):
+        """Ajoute un mouvement validé aux lignes en attente"""
+        self._pending[row[0]].append(row)
+        self._count += 1
+        self.recorded += 1
+        
+        if self._count >= self.max_pending and not self._early:
+            task = asyncio.create_task(self.flush())
+            self._early.add(task)
+            task.add_done_callback(self._early.discard)
+    
+    async def flush(self):
+        """Écrit tous les mouvements en attente (un executemany par serveur)"""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            
+            pending, self._pending = self._pending, defaultdict(list)
+            self._count = 0
+            results = await asyncio.gather(
+                *(self.db.ledger_entries.add_many(guild_id, rows) for guild_id, rows in pending.items()),
+                return_exceptions=True
+            )
+            
+            for (guild_id, rows), result in zip(pending.items(), results):
+                if isinstance(result, Exception):
+                    logger.error(f"Écriture du journal du serveur {guild_id} échouée: {result}")
+                    # Remettre en tête pour garder l'ordre des mouvements
+                    self._pending[guild_id][:0] = rows
+                    self._count += len(rows)
+                else:
+                    self.rows_written += len(rows)
+            
+            self.flushes += 1
+    
+    async def _run(self):
+        """Boucle d'écriture périodique"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Erreur écriture du journal: {e}")
+    
+    def stats(self) -> dict:
+        """Mouvements en attente et volume d'écritures"""
+        return {
+            "pending": self._count,
+            "recorded": self.recorded,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+        }
@@ -0,0 +1,637 @@
+"""
+Migrations versionnées du schéma de la base de données
+"""
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List
+
+import aiosqlite
+
+from .logger import setup_logger
+
+logger = setup_logger("Migrations")
+
+
+@dataclass
+class Migration:
+    """Une étape de migration du schéma"""
+    version: int
+    description: str
+    apply: Callable[[Any], Awaitable[None]]
+
+
+# Migrations enregistrées, par dialecte SQL
+MIGRATIONS: Dict[str, List[Migration]] = {"sqlite": [], "postgres": []}
+
+
+def migration(version: int, description: str, dialect: str = "sqlite"):
+    """Décorateur qui enregistre une migration dans MIGRATIONS[dialect]"""
+    def decorator(func):
+        steps = MIGRATIONS[dialect]
+        steps.append(Migration(version, description, func))
+        steps.sort(key=lambda m: m.version)
+        return func
+    return decorator
+
+
+async def table_columns(connection: aiosqlite.Connection, table: str) -> List[str]:
+    """Retourne les colonnes d'une table (liste vide si elle n'existe pas)"""
+    cursor = await connection.execute(f"PRAGMA table_info({table})")
+    return [row[1] for row in await cursor.fetchall()]
+
+
+async def rebuild_table(connection: aiosqlite.Connection, table: str, ddl: str):
+    """
+    Crée ou reconstruit une table selon ``ddl``
+    
+    Les colonnes communes à l'ancienne et à la nouvelle définition sont
+    recopiées. Les lignes qui violent les nouvelles contraintes (doublons,
+    clés NULL) ne peuvent pas l'être : si la copie en perd, l'ancienne table
+    est conservée en entier sous ``{table}_legacy`` et un avertissement
+    indique le nombre de lignes écartées.
+    
+    Args:
+        connection: Connexion (déjà dans une transaction)
+        table: Nom de la table
+        ddl: CREATE TABLE avec ``{name}`` à la place du nom de table
+    
+    Raises:
+        RuntimeError: Si des lignes sont écartées et que ``{table}_legacy`` existe déjà
+    """
+    old_columns = await table_columns(connection, table)
+    if not old_columns:
+        await connection.execute(ddl.format(name=table))
+        return
+    
+    temp = f"{table}_new"
+    await connection.execute(f"DROP TABLE IF EXISTS {temp}")
+    await connection.execute(ddl.format(name=temp))
+    
+    common = [c for c in await table_columns(connection, temp) if c in old_columns]
+    columns = ", ".join(common)
+    cursor = await connection.execute(
+        f"INSERT OR IGNORE INTO {temp} ({columns}) SELECT {columns} FROM {table}"
+    )
+    copied = cursor.rowcount
+    (total,) = await (await connection.execute(f"SELECT COUNT(*) FROM {table}")).fetchone()
+    
+    if copied < total:
+        legacy = f"{table}_legacy"
+        if await table_columns(connection, legacy):
+            raise RuntimeError(f"{total - copied} lignes de {table} écartées et {legacy} existe déjà")
+        # Copie brute (sans contraintes ni index) : rien n'est perdu
+        await connection.execute(f"CREATE TABLE {legacy} AS SELECT * FROM {table}")
+        logger.warning(
+            f"⚠️ {total - copied}/{total} lignes de {table} violent le nouveau schéma "
+            f"et n'ont pas été recopiées ; ancienne table conservée dans {legacy}"
+        )
+    
+    await connection.execute(f"DROP TABLE {table}")
+    await connection.execute(f"ALTER TABLE {temp} RENAME TO {table}")
+
+
+# ==================== MIGRATIONS ====================
+
+@migration(1, "Schéma initial (guilds, users)")
+async def _initial_schema(connection: aiosqlite.Connection):
+    # Schéma historique créé par l'ancien DatabaseManager.create_tables()
+    await connection.execute("""
+        CREATE TABLE IF NOT EXISTS guilds (
+            guild_id INTEGER PRIMARY KEY,
+            welcome_channel_id INTEGER,
+            log_channel_id INTEGER,
+            auto_role_id INTEGER,
+            prefix TEXT DEFAULT '!',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    await connection.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER PRIMARY KEY,
+            guild_id INTEGER,
+            xp INTEGER DEFAULT 0,
+            level INTEGER DEFAULT 0,
+            coins INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (guild_id) REFERENCES guilds(guild_id)
+        )
+    """)
+
+
+@migration(2, "Clés composites (guild_id, user_id), tables economy/tickets et index")
+async def _composite_keys(connection: aiosqlite.Connection):
+    await rebuild_table(connection, "guilds", """
+        CREATE TABLE {name} (
+            guild_id INTEGER PRIMARY KEY,
+            welcome_channel_id INTEGER,
+            welcome_message TEXT,
+            leave_message TEXT,
+            log_channel_id INTEGER,
+            auto_role_id INTEGER,
+            level_up_channel_id INTEGER,
+            prefix TEXT DEFAULT '!',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Un utilisateur peut être présent sur plusieurs serveurs
+    await rebuild_table(connection, "users", """
+        CREATE TABLE {name} (
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            xp INTEGER NOT NULL DEFAULT 0,
+            level INTEGER NOT NULL DEFAULT 0,
+            coins INTEGER NOT NULL DEFAULT 0,
+            messages INTEGER NOT NULL DEFAULT 0,
+            last_message TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (guild_id, user_id)
+        ) WITHOUT ROWID
+    """)
+    
+    await rebuild_table(connection, "economy", """
+        CREATE TABLE {name} (
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            balance INTEGER NOT NULL DEFAULT 100,
+            bank INTEGER NOT NULL DEFAULT 0,
+            daily_claimed TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (guild_id, user_id)
+        ) WITHOUT ROWID
+    """)
+    
+    # L'ordre des colonnes est celui attendu par les cogs (SELECT *)
+    await rebuild_table(connection, "tickets", """
+        CREATE TABLE {name} (
+            ticket_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            category TEXT,
+            status TEXT NOT NULL DEFAULT 'open',
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            closed_at TIMESTAMP,
+            closed_by INTEGER
+        )
+    """)
+    
+    # Index couvrants : /leaderboard, /rank
+    await connection.execute("""
+        CREATE INDEX IF NOT EXISTS idx_users_leaderboard
+        ON users (guild_id, xp DESC, user_id, level)
+    """)
+    
+    # /richest trie sur la même expression (balance + bank)
+    await connection.execute("""
+        CREATE INDEX IF NOT EXISTS idx_economy_wealth
+        ON economy (guild_id, (balance + bank) DESC, user_id, balance, bank)
+    """)
+    
+    # /tickets, création et fermeture de tickets
+    await connection.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tickets_guild_created
+        ON tickets (guild_id, created_at DESC)
+    """)
+    await connection.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tickets_guild_status
+        ON tickets (guild_id, status, created_at DESC)
+    """)
+    await connection.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tickets_user_status
+        ON tickets (guild_id, user_id, status)
+    """)
+    await connection.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tickets_channel_status
+        ON tickets (channel_id, status)
+    """)
+
+
+
+@migration(3, "Courbe de niveaux par serveur (guilds.level_curve)")
+async def _level_curve(connection: aiosqlite.Connection):
+    if "level_curve" not in await table_columns(connection, "guilds"):
+        await connection.execute("ALTER TABLE guilds ADD COLUMN level_curve TEXT")
+
+
+@migration(4, "Cumuls d'XP par jour et par mois (xp_daily, xp_monthly)")
+async def _xp_rollups(connection: aiosqlite.Connection):
+    # day = AAAAMMJJ et month = AAAAMM en entiers : day / 100 donne le mois
+    await connection.execute("""
+        CREATE TABLE IF NOT EXISTS xp_daily (
+            guild_id INTEGER NOT NULL,
+            day INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            xp INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, day, user_id)
+        ) WITHOUT ROWID
+    """)
+    await connection.execute("""
+        CREATE TABLE IF NOT EXISTS xp_monthly (
+            guild_id INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            xp INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, month, user_id)
+        ) WITHOUT ROWID
+    """)
+
+
+@migration(5, "Rôles récompenses par niveau (level_rewards)")
+async def _level_rewards(connection: aiosqlite.Connection):
+    await connection.execute("""
+        CREATE TABLE IF NOT EXISTS level_rewards (
+            guild_id INTEGER NOT NULL,
+            level INTEGER NOT NULL,
+            role_id INTEGER NOT NULL,
+            PRIMARY KEY (guild_id, level)
+        ) WITHOUT ROWID
+    """)
+
+
+@migration(6, "Saisons de niveaux et archives des classements (seasons, season_snapshots)")
+async def _seasons(connection: aiosqlite.Connection):
+    await connection.execute("""
+        CREATE TABLE IF NOT EXISTS seasons (
+            season_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            number INTEGER NOT NULL,
+            started_at TIMESTAMP,
+            ended_at TIMESTAMP NOT NULL,
+            UNIQUE (guild_id, number)
+        )
+    """)
+    await connection.execute("""
+        CREATE TABLE IF NOT EXISTS season_snapshots (
+            season_id INTEGER NOT NULL,
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            xp INTEGER NOT NULL,
+            level INTEGER NOT NULL,
+            messages INTEGER NOT NULL,
+            PRIMARY KEY (season_id, user_id)
+        ) WITHOUT ROWID
+    """)
+    # Classements d'une saison archivée
+    await connection.execute("""
+        CREATE INDEX IF NOT EXISTS idx_season_snapshots_rank
+        ON season_snapshots (season_id, guild_id, xp DESC, user_id, level)
+    """)
+
+
+@migration(7, "Journal des mouvements de coins et instantanés des soldes (economy_ledger, economy_snapshots)")
+async def _economy_ledger(connection: aiosqlite.Connection):
+    await connection.execute("""
+        CREATE TABLE IF NOT EXISTS economy_ledger (
+            entry_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            amount INTEGER NOT NULL,
+            balance_after INTEGER NOT NULL,
+            counterparty_id INTEGER,
+            reference TEXT,
+            created_at TIMESTAMP NOT NULL
+        )
+    """)
+    # Historique d'un membre, du plus récent au plus ancien (pages par entry_id)
+    await connection.execute("""
+        CREATE INDEX IF NOT EXISTS idx_economy_ledger_member
+        ON economy_ledger (guild_id, user_id, entry_id)
+    """)
+    await connection.execute("""
+        CREATE TABLE IF NOT EXISTS economy_snapshots (
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            entry_id INTEGER NOT NULL,
+            balance INTEGER NOT NULL,
+            taken_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (guild_id, user_id, entry_id)
+        ) WITHOUT ROWID
+    """)
+    # Soldes antérieurs au journal : point de départ des reconstructions
+    await connection.execute("""
+        INSERT OR IGNORE INTO economy_snapshots (guild_id, user_id, entry_id, balance)
+        SELECT guild_id, user_id, 0, balance FROM economy
+    """)
+
+
+@migration(8, "Richesse totale en colonne générée et index de classement (economy.total)")
+async def _economy_total(connection: aiosqlite.Connection):
+    # Colonne VIRTUAL : seule forme ajoutable par ALTER TABLE ; l'index la stocke
+    await connection.execute("""
+        ALTER TABLE economy
+        ADD COLUMN total INTEGER GENERATED ALWAYS AS (balance + bank) VIRTUAL
+    """)
+    await connection.execute("DROP INDEX IF EXISTS idx_economy_wealth")
+    await connection.execute("""
+        CREATE INDEX IF NOT EXISTS idx_economy_wealth
+        ON economy (guild_id, total DESC, user_id, balance, bank)
+    """)
+
+
+# ==================== MIGRATIONS POSTGRESQL ====================
+# Les versions suivent celles de SQLite : la version 2 crée directement le
+# schéma complet (les identifiants Discord ne tiennent que dans un BIGINT).
+
+@migration(2, "Schéma complet (guilds, users, economy, tickets) et index", dialect="postgres")
+async def _pg_schema(connection):
+    await connection.execute("""
+        CREATE TABLE IF NOT EXISTS guilds (
+            guild_id BIGINT PRIMARY KEY,
+            welcome_channel_id BIGINT,
+            welcome_message TEXT,
+            leave_message TEXT,
+            log_channel_id BIGINT,
+            auto_role_id BIGINT,
+            level_up_channel_id BIGINT,
+            prefix TEXT DEFAULT '!',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    await connection.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            guild_id BIGINT NOT NULL,
+            user_id BIGINT NOT NULL,
+            xp BIGINT NOT NULL DEFAULT 0,
+            level INTEGER NOT NULL DEFAULT 0,
+            coins BIGINT NOT NULL DEFAULT 0,
+            messages INTEGER NOT NULL DEFAULT 0,
+            last_message TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (guild_id, user_id)
+        )
+    """)
+    await connection.execute("""
+        CREATE TABLE IF NOT EXISTS economy (
+            guild_id BIGINT NOT NULL,
+            user_id BIGINT NOT NULL,
+            balance BIGINT NOT NULL DEFAULT 100,
+            bank BIGINT NOT NULL DEFAULT 0,
+            daily_claimed TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (guild_id, user_id)
+        )
+    """)
+    await connection.execute("""
+        CREATE TABLE IF NOT EXISTS tickets (
+            ticket_id BIGSERIAL PRIMARY KEY,
+            guild_id BIGINT NOT NULL,
+            channel_id BIGINT NOT NULL,
+            user_id BIGINT NOT NULL,
+            category TEXT,
+            status TEXT NOT NULL DEFAULT 'open',
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            closed_at TIMESTAMP,
+            closed_by BIGINT
+        )
+    """)
+    
+    await connection.execute("""
+        CREATE INDEX IF NOT EXISTS idx_users_leaderboard
+        ON users (guild_id, xp DESC) INCLUDE (user_id, level)
+    """)
+    await connection.execute("""
+        CREATE INDEX IF NOT EXISTS idx_economy_wealth
+        ON economy (guild_id, (balance + bank) DESC)
+    """)
+    await connection.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tickets_guild_created
+        ON tickets (guild_id, created_at DESC)
+    """)
+    await connection.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tickets_guild_status
+        ON tickets (guild_id, status, created_at DESC)
+    """)
+    await connection.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tickets_user_status
+        ON tickets (guild_id, user_id, status)
+    """)
+    await connection.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tickets_channel_status
+        ON tickets (channel_id, status)
+    """)
+
+
+
+@migration(3, "Courbe de niveaux par serveur (guilds.level_curve)", dialect="postgres")
+async def _pg_level_curve(connection):
+    await connection.execute("ALTER TABLE guilds ADD COLUMN IF NOT EXISTS level_curve TEXT")
+
+
+@migration(4, "Cumuls d'XP par jour et par mois (xp_daily, xp_monthly)", dialect="postgres")
+async def _pg_xp_rollups(connection):
+    await connection.execute("""
+        CREATE TABLE IF NOT EXISTS xp_daily (
+            guild_id BIGINT NOT NULL,
+            day INTEGER NOT NULL,
+            user_id BIGINT NOT NULL,
+            xp BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, day, user_id)
+        )
+    """)
+    await connection.execute("""
+        CREATE TABLE IF NOT EXISTS xp_monthly (
+            guild_id BIGINT NOT NULL,
+            month INTEGER NOT NULL,
+            user_id BIGINT NOT NULL,
+            xp BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, month, user_id)
+        )
+    """)
+
+
+@migration(5, "Rôles récompenses par niveau (level_rewards)", dialect="postgres")
+async def _pg_level_rewards(connection):
+    await connection.execute("""
+        CREATE TABLE IF NOT EXISTS level_rewards (
+            guild_id BIGINT NOT NULL,
+            level INTEGER NOT NULL,
+            role_id BIGINT NOT NULL,
+            PRIMARY KEY (guild_id, level)
+        )
+    """)
+
+
+@migration(6, "Saisons de niveaux et archives des classements (seasons, season_snapshots)", dialect="postgres")
+async def _pg_seasons(connection):
+    await connection.execute("""
+        CREATE TABLE IF NOT EXISTS seasons (
+            season_id BIGSERIAL PRIMARY KEY,
+            guild_id BIGINT NOT NULL,
+            number INTEGER NOT NULL,
+            started_at TIMESTAMP,
+            ended_at TIMESTAMP NOT NULL,
+            UNIQUE (guild_id, number)
+        )
+    """)
+    await connection.execute("""
+        CREATE TABLE IF NOT EXISTS season_snapshots (
+            season_id BIGINT NOT NULL,
+            guild_id BIGINT NOT NULL,
+            user_id BIGINT NOT NULL,
+            xp BIGINT NOT NULL,
+            level INTEGER NOT NULL,
+            messages INTEGER NOT NULL,
+            PRIMARY KEY (season_id, user_id)
+        )
+    """)
+    await connection.execute("""
+        CREATE INDEX IF NOT EXISTS idx_season_snapshots_rank
+        ON season_snapshots (season_id, guild_id, xp DESC) INCLUDE (user_id, level)
+    """)
+
+
+@migration(7, "Journal des mouvements de coins et instantanés des soldes (economy_ledger, economy_snapshots)", dialect="postgres")
+async def _pg_economy_ledger(connection):
+    await connection.execute("""
+        CREATE TABLE IF NOT EXISTS economy_ledger (
+            entry_id BIGSERIAL PRIMARY KEY,
+            guild_id BIGINT NOT NULL,
+            user_id BIGINT NOT NULL,
+            kind TEXT NOT NULL,
+            amount BIGINT NOT NULL,
+            balance_after BIGINT NOT NULL,
+            counterparty_id BIGINT,
+            reference TEXT,
+            created_at TIMESTAMP NOT NULL
+        )
+    """)
+    await connection.execute("""
+        CREATE INDEX IF NOT EXISTS idx_economy_ledger_member
+        ON economy_ledger (guild_id, user_id, entry_id)
+    """)
+    await connection.execute("""
+        CREATE TABLE IF NOT EXISTS economy_snapshots (
+            guild_id BIGINT NOT NULL,
+            user_id BIGINT NOT NULL,
+            entry_id BIGINT NOT NULL,
+            balance BIGINT NOT NULL,
+            taken_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (guild_id, user_id, entry_id)
+        )
+    """)
+    await connection.execute("""
+        INSERT INTO economy_snapshots (guild_id, user_id, entry_id, balance)
+        SELECT guild_id, user_id, 0, balance FROM economy
+        ON CONFLICT DO NOTHING
+    """)
+
+
+@migration(8, "Richesse totale en colonne générée et index de classement (economy.total)", dialect="postgres")
+async def _pg_economy_total(connection):
+    await connection.execute("""
+        ALTER TABLE economy
+        ADD COLUMN IF NOT EXISTS total BIGINT GENERATED ALWAYS AS (balance + bank) STORED
+    """)
+    await connection.execute("DROP INDEX IF EXISTS idx_economy_wealth")
+    await connection.execute("""
+        CREATE INDEX IF NOT EXISTS idx_economy_wealth
+        ON economy (guild_id, total DESC, user_id) INCLUDE (balance, bank)
+    """)
+
+
+# ==================== RUNNER ====================
+
+class MigrationRunner:
+    """Applique les migrations manquantes et trace la version du schéma (SQLite)"""
+    
+    dialect = "sqlite"
+    
+    def __init__(self, connection, migrations: List[Migration] = None):
+        """
+        Args:
+            connection: Connexion d'écriture
+            migrations: Migrations à appliquer (par défaut celles du dialecte)
+        """
+        self.connection = connection
+        self.migrations = migrations if migrations is not None else MIGRATIONS[self.dialect]
+    
+    async def _ensure_version_table(self):
+        """Crée la table de suivi des versions"""
+        await self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        await self.connection.commit()
+    
+    async def current_version(self) -> int:
+        """Retourne la dernière version appliquée (0 si aucune)"""
+        await self._ensure_version_table()
+        cursor = await self.connection.execute("SELECT MAX(version) FROM schema_migrations")
+        row = await cursor.fetchone()
+        return row[0] or 0
+    
+    async def pending(self) -> List[Migration]:
+        """Retourne les migrations pas encore appliquées"""
+        version = await self.current_version()
+        return [m for m in self.migrations if m.version > version]
+    
+    async def run(self) -> List[int]:
+        """
+        Applique les migrations manquantes, chacune dans sa transaction
+        
+        Returns:
+            List[int]: Versions appliquées
+        """
+        applied = []
+        
+        for step in await self.pending():
+            try:
+                await self._apply(step)
+            except Exception:
+                logger.error(f"❌ Migration {step.version} échouée: {step.description}")
+                raise
+            
+            applied.append(step.version)
+            logger.info(f"✅ Migration {step.version} appliquée: {step.description}")
+        
+        return applied
+    
+    async def _apply(self, step: Migration):
+        """Applique une migration et l'enregistre, dans une même transaction"""
+        try:
+            await self.connection.execute("BEGIN")
+            await step.apply(self.connection)
+            await self.connection.execute(
+                "INSERT INTO schema_migrations (version, description) VALUES (?, ?)",
+                (step.version, step.description)
+            )
+            await self.connection.commit()
+        except Exception:
+            await self.connection.rollback()
+            raise
+
+
+class PostgresMigrationRunner(MigrationRunner):
+    """Variante de MigrationRunner pour une connexion asyncpg"""
+    
+    dialect = "postgres"
+    
+    async def _ensure_version_table(self):
+        """Crée la table de suivi des versions"""
+        await self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+    
+    async def current_version(self) -> int:
+        """Retourne la dernière version appliquée (0 si aucune)"""
+        await self._ensure_version_table()
+        return await self.connection.fetchval("SELECT MAX(version) FROM schema_migrations") or 0
+    
+    async def _apply(self, step: Migration):
+        """Applique une migration et l'enregistre, dans une même transaction"""
+        async with self.connection.transaction():
+            await step.apply(self.connection)
+            await self.connection.execute(
+                "INSERT INTO schema_migrations (version, description) VALUES ($1, $2)",
+                step.version, step.description
+            )
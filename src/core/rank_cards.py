@@ -0,0 +1,213 @@
+"""
+Cartes de rang : rendu hors de la boucle d'événements et caches
+"""
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Hashable, Optional
+
+import aiohttp
+
+from utils.rank_card import PIL_AVAILABLE, RankCardData, render_rank_card
+from .logger import setup_logger
+
+logger = setup_logger("RankCards")
+
+
+class ByteLRU:
+    """
+    Cache LRU borné par un budget d'octets.
+    
+    Les entrées les moins récemment lues sont retirées dès que la taille
+    cumulée des valeurs dépasse ``max_bytes``.
+    """
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        
+        # Statistiques
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+    
+    def __len__(self) -> int:
+        return len(self._items)
+    
+    def get(self, key: Hashable) -> Optional[bytes]:
+        value = self._items.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return value
+    
+    def put(self, key: Hashable, value: bytes):
+        if len(value) > self.max_bytes:
+            return  # Plus grand que tout le budget : jamais mis en cache
+        
+        previous = self._items.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous)
+        self._items[key] = value
+        self.size += len(value)
+        
+        while self.size > self.max_bytes:
+            _, dropped = self._items.popitem(last=False)
+            self.size -= len(dropped)
+            self.evicted += 1
+    
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._items),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "evicted": self.evicted,
+        }
+
+
+class AvatarCache:
+    """
+    Avatars téléchargés une seule fois, par une session HTTP partagée.
+    
+    La clé est le hash de l'avatar Discord : un changement d'avatar donne
+    une nouvelle clé, l'ancienne image finit évincée par le LRU.
+    """
+    
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024, timeout: float = 5.0):
+        self.cache = ByteLRU(max_bytes)
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=self.timeout)
+        return self._session
+    
+    async def get(self, key: str, url: str) -> Optional[bytes]:
+        """Octets de l'avatar ``key`` (None si le téléchargement échoue)"""
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        
+        # Un seul téléchargement même si plusieurs /rank arrivent ensemble
+        pending = self._inflight.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._download(key, url))
+            self._inflight[key] = pending
+            pending.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(pending)
+    
+    async def _download(self, key: str, url: str) -> Optional[bytes]:
+        try:
+            async with self._get_session().get(url) as response:
+                response.raise_for_status()
+                data = await response.read()
+        except Exception as e:
+            logger.warning(f"Téléchargement de l'avatar {key} échoué: {e}")
+            return None
+        
+        self.cache.put(key, data)
+        return data
+    
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class RankCardRenderer:
+    """
+    Rendu des cartes de rang dans un ProcessPoolExecutor.
+    
+    Les cartes déjà dessinées sont gardées dans un LRU borné en octets,
+    par (serveur, membre, niveau, tranche d'XP, avatar, nom, position) : la
+    progression affichée est arrondie à la tranche, si bien que quelques
+    messages de plus ne forcent pas un nouveau rendu.
+    """
+    
+    def __init__(
+        self,
+        workers: int = 2,
+        cache_bytes: int = 32 * 1024 * 1024,
+        avatar_bytes: int = 16 * 1024 * 1024,
+        xp_buckets: int = 50
+    ):
+        """
+        Args:
+            workers: Processus de rendu
+            cache_bytes: Budget du cache de cartes
+            avatar_bytes: Budget du cache d'avatars
+            xp_buckets: Nombre de tranches de progression par niveau
+        """
+        self.workers = workers
+        self.xp_buckets = max(1, xp_buckets)
+        self.cards = ByteLRU(cache_bytes)
+        self.avatars = AvatarCache(avatar_bytes)
+        self._pool: Optional[ProcessPoolExecutor] = None
+    
+    @property
+    def available(self) -> bool:
+        """False sans Pillow : /rank garde alors l'embed texte"""
+        return PIL_AVAILABLE
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+    
+    def bucket(self, progress: float) -> int:
+        """Tranche de progression (0 à xp_buckets)"""
+        return int(min(max(progress, 0.0), 1.0) * self.xp_buckets)
+    
+    async def render(
+        self,
+        guild_id: int,
+        member,
+        level: int,
+        progress: float,
+        rank: Optional[int]
+    ) -> bytes:
+        """
+        PNG de la carte de rang d'un membre
+        
+        Args:
+            member: discord.Member affiché
+            progress: Avancement vers le niveau suivant (0 à 1)
+        """
+        avatar = member.display_avatar
+        bucket = self.bucket(progress)
+        key = (guild_id, member.id, level, bucket, avatar.key, member.display_name, rank)
+        
+        card = self.cards.get(key)
+        if card is not None:
+            return card
+        
+        avatar_bytes = await self.avatars.get(avatar.key, avatar.replace(size=256, format="png").url)
+        data = RankCardData(
+            display_name=member.display_name,
+            level=level,
+            progress=bucket / self.xp_buckets,
+            rank=rank,
+            avatar=avatar_bytes
+        )
+        
+        loop = asyncio.get_running_loop()
+        card = await loop.run_in_executor(self._get_pool(), render_rank_card, data)
+        self.cards.put(key, card)
+        return card
+    
+    async def close(self):
+        """Ferme la session HTTP et arrête les processus de rendu"""
+        await self.avatars.close()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+    
+    def stats(self) -> dict:
+        return {"cards": self.cards.stats(), "avatars": self.avatars.cache.stats()}
@@ -0,0 +1,910 @@
+"""
+Couche d'accès aux données (repositories)
+
+Chaque repository garde ses requêtes dans des constantes de classe : le
+texte SQL est identique d'un appel à l'autre, donc la requête est compilée
+une seule fois par connexion puis reprise du cache de statements de
+sqlite3 (voir ``cached_statements`` dans le pool).
+
+Chaque appel transmet ``guild_id`` au DatabaseManager, qui l'utilise pour
+choisir le shard du serveur quand la base est découpée (``DB_SHARDS``).
+"""
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from utils.level_curves import LevelCurve
+    from .database import DatabaseManager
+
+
+# ==================== LIGNES ====================
+
+@dataclass(slots=True)
+class GuildRow:
+    """Configuration d'un serveur"""
+    guild_id: int
+    welcome_channel_id: Optional[int] = None
+    welcome_message: Optional[str] = None
+    leave_message: Optional[str] = None
+    log_channel_id: Optional[int] = None
+    auto_role_id: Optional[int] = None
+    level_up_channel_id: Optional[int] = None
+    prefix: str = "!"
+    level_curve: Optional[str] = None
+
+
+@dataclass(slots=True)
+class UserRow:
+    """Progression d'un membre sur un serveur"""
+    guild_id: int
+    user_id: int
+    xp: int = 0
+    level: int = 0
+    messages: int = 0
+    last_message: Optional[datetime] = None
+
+
+@dataclass(slots=True)
+class XPPeriodRow:
+    """XP gagnée par un membre sur une période"""
+    user_id: int
+    xp: int
+
+
+@dataclass(slots=True)
+class SeasonRow:
+    """Saison de niveaux terminée"""
+    season_id: int
+    guild_id: int
+    number: int
+    started_at: Optional[datetime]
+    ended_at: datetime
+    members: int = 0
+
+
+@dataclass(slots=True)
+class SeasonEntry:
+    """Résultat archivé d'un membre pour une saison"""
+    user_id: int
+    xp: int
+    level: int
+
+
+@dataclass(slots=True)
+class EconomyRow:
+    """Compte économique d'un membre sur un serveur"""
+    guild_id: int
+    user_id: int
+    balance: int = 100
+    bank: int = 0
+    daily_claimed: Optional[datetime] = None
+    
+    @property
+    def total(self) -> int:
+        """Richesse totale (portefeuille + banque)"""
+        return self.balance + self.bank
+
+
+@dataclass(slots=True)
+class LedgerRow:
+    """Mouvement du portefeuille d'un membre"""
+    entry_id: int
+    user_id: int
+    kind: str
+    amount: int
+    balance_after: int
+    counterparty_id: Optional[int]
+    reference: Optional[str]
+    created_at: datetime
+
+
+@dataclass(slots=True)
+class TicketRow:
+    """Ticket de support"""
+    ticket_id: int
+    guild_id: int
+    channel_id: int
+    user_id: int
+    category: Optional[str]
+    status: str
+    description: Optional[str]
+    created_at: Optional[datetime]
+    closed_at: Optional[datetime] = None
+    closed_by: Optional[int] = None
+
+
+# ==================== REPOSITORIES ====================
+
+class Repository:
+    """Base commune : accès au DatabaseManager"""
+    
+    def __init__(self, db: "DatabaseManager"):
+        self.db = db
+
+
+class GuildRepo(Repository):
+    """Accès à la table guilds"""
+    
+    COLUMNS = (
+        "welcome_channel_id", "welcome_message", "leave_message",
+        "log_channel_id", "auto_role_id", "level_up_channel_id", "prefix",
+        "level_curve",
+    )
+    
+    SELECT = f"SELECT guild_id, {', '.join(COLUMNS)} FROM guilds WHERE guild_id = ?"
+    ENSURE = "INSERT INTO guilds (guild_id) VALUES (?) ON CONFLICT (guild_id) DO NOTHING"
+    # Une requête UPSERT par colonne, générée une fois pour toutes
+    UPSERT = {
+        column: (
+            f"INSERT INTO guilds (guild_id, {column}) VALUES (?, ?) "
+            f"ON CONFLICT (guild_id) DO UPDATE SET {column} = excluded.{column}"
+        )
+        for column in COLUMNS
+    }
+    
+    async def get(self, guild_id: int) -> Optional[GuildRow]:
+        """Récupère la configuration d'un serveur"""
+        row = await self.db.fetchone(self.SELECT, (guild_id,), guild_id=guild_id)
+        return GuildRow(*row) if row else None
+    
+    async def ensure(self, guild_id: int):
+        """Crée la ligne du serveur si elle n'existe pas"""
+        await self.db.execute(self.ENSURE, (guild_id,), guild_id=guild_id)
+    
+    async def set(self, guild_id: int, column: str, value):
+        """Met à jour (ou crée) une colonne de configuration"""
+        if column not in self.UPSERT:
+            raise ValueError(f"Colonne de configuration inconnue: {column}")
+        await self.db.execute(self.UPSERT[column], (guild_id, value), guild_id=guild_id)
+
+
+class UserRepo(Repository):
+    """Accès à la table users (XP et niveaux)"""
+    
+    FIELDS = "guild_id, user_id, xp, level, messages, last_message"
+    
+    SELECT = f"SELECT {FIELDS} FROM users WHERE guild_id = ? AND user_id = ?"
+    SELECT_MANY = f"SELECT {FIELDS} FROM users WHERE guild_id = ? AND user_id IN ({{placeholders}})"
+    # Identifiants par requête IN (sous la limite de variables de SQLite)
+    SELECT_MANY_CHUNK = 500
+    TOP = f"SELECT {FIELDS} FROM users WHERE guild_id = ? ORDER BY xp DESC, user_id LIMIT ?"
+    ADD_XP = f"""
+        INSERT INTO users (guild_id, user_id, xp, messages, last_message)
+        VALUES (?, ?, ?, 1, ?)
+        ON CONFLICT (guild_id, user_id) DO UPDATE SET
+            xp = users.xp + excluded.xp,
+            messages = users.messages + 1,
+            last_message = excluded.last_message
+        RETURNING {FIELDS}
+    """
+    # Gains agrégés par XPBuffer : un jeu de paramètres par membre
+    ADD_XP_MANY = """
+        INSERT INTO users (guild_id, user_id, xp, level, messages, last_message)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (guild_id, user_id) DO UPDATE SET
+            xp = users.xp + excluded.xp,
+            level = CASE WHEN excluded.level > users.level THEN excluded.level ELSE users.level END,
+            messages = users.messages + excluded.messages,
+            last_message = COALESCE(excluded.last_message, users.last_message)
+    """
+    SET_LEVEL = "UPDATE users SET level = ? WHERE guild_id = ? AND user_id = ?"
+    MAX_XP = "SELECT MAX(xp) FROM users WHERE guild_id = ?"
+    XP_TOTALS = "SELECT user_id, xp, level FROM users WHERE guild_id = ?"
+    # Recalcul ensembliste : niveau = plus haut seuil atteint. Les seuils sont
+    # une table VALUES (colonnes column1 = niveau, column2 = XP) ; pas de CTE,
+    # sqlite3 ne renverrait pas le nombre de lignes modifiées
+    RECOMPUTE_LEVELS = """
+        UPDATE users SET level = (
+            SELECT MAX(t.column1) FROM (VALUES {values}) AS t WHERE t.column2 <= users.xp
+        )
+        WHERE guild_id = ? AND level <> (
+            SELECT MAX(t.column1) FROM (VALUES {values}) AS t WHERE t.column2 <= users.xp
+        )
+    """
+    
+    async def get(self, guild_id: int, user_id: int) -> Optional[UserRow]:
+        """Récupère la progression d'un membre"""
+        row = await self.db.fetchone(self.SELECT, (guild_id, user_id), guild_id=guild_id)
+        return UserRow(*row) if row else None
+    
+    async def get_many(self, guild_id: int, user_ids: Sequence[int]) -> Dict[int, UserRow]:
+        """Progression de plusieurs membres, par user_id (absents omis)"""
+        found: Dict[int, UserRow] = {}
+        for start in range(0, len(user_ids), self.SELECT_MANY_CHUNK):
+            chunk = list(user_ids[start:start + self.SELECT_MANY_CHUNK])
+            sql = self.SELECT_MANY.format(placeholders=", ".join("?" * len(chunk)))
+            for row in await self.db.fetchall(sql, (guild_id, *chunk), guild_id=guild_id):
+                user = UserRow(*row)
+                found[user.user_id] = user
+        return found
+    
+    async def top(self, guild_id: int, limit: int = 10) -> List[UserRow]:
+        """Membres avec le plus d'XP"""
+        rows = await self.db.fetchall(self.TOP, (guild_id, limit), guild_id=guild_id)
+        return [UserRow(*row) for row in rows]
+    
+    async def xp_totals(self, guild_id: int) -> List[Tuple[int, int, int]]:
+        """(user_id, xp, level) de tous les membres d'un serveur"""
+        return await self.db.fetchall(self.XP_TOTALS, (guild_id,), guild_id=guild_id)
+    
+    async def add_xp(self, guild_id: int, user_id: int, xp: int, now: datetime) -> UserRow:
+        """Ajoute de l'XP et un message (crée le membre si besoin)"""
+        row = await self.db.execute_returning(self.ADD_XP, (guild_id, user_id, xp, now), guild_id=guild_id)
+        return UserRow(*row)
+    
+    async def add_xp_many(self, guild_id: int, rows: List[tuple]):
+        """
+        Ajoute des gains agrégés pour plusieurs membres d'un serveur
+        
+        Args:
+            rows: (guild_id, user_id, xp, level, messages, last_message) par membre
+        """
+        await self.db.executemany(self.ADD_XP_MANY, rows, guild_id=guild_id)
+    
+    async def recompute_levels(self, guild_id: int, curve: "LevelCurve") -> int:
+        """
+        Recalcule le niveau de tous les membres d'un serveur en une requête
+        
+        Returns:
+            int: Nombre de membres dont le niveau a changé
+        """
+        row = await self.db.fetchone(self.MAX_XP, (guild_id,), guild_id=guild_id)
+        if not row or row[0] is None:
+            return 0
+        
+        # Seuils entiers calculés par LevelCurve : interpolés sans risque
+        thresholds = curve.thresholds_up_to(row[0])
+        values = ", ".join(f"({level}, {int(xp)})" for level, xp in enumerate(thresholds))
+        return await self.db.execute(
+            self.RECOMPUTE_LEVELS.format(values=values),
+            (guild_id,),
+            guild_id=guild_id
+        )
+    
+    async def set_level(self, guild_id: int, user_id: int, level: int):
+        """Enregistre le nouveau niveau d'un membre (écriture différée)"""
+        self.db.write(self.SET_LEVEL, (level, guild_id, user_id), guild_id=guild_id)
+
+
+class XPRollupRepo(Repository):
+    """
+    Cumuls d'XP par jour (xp_daily) et par mois (xp_monthly)
+    
+    Les jours sont des entiers AAAAMMJJ : un classement de période est une
+    somme sur une plage de la clé primaire (guild_id, day, user_id). Les
+    jours anciens sont repliés en mois (AAAAMM = day / 100) par compact().
+    """
+    
+    ADD_DAILY_MANY = """
+        INSERT INTO xp_daily (guild_id, day, user_id, xp)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (guild_id, day, user_id) DO UPDATE SET
+            xp = xp_daily.xp + excluded.xp
+    """
+    # Pages par curseur (xp, user_id) sur les totaux de la période
+    PERIOD_FIRST = """
+        SELECT user_id, SUM(xp) AS total FROM xp_daily
+        WHERE guild_id = ? AND day >= ?
+        GROUP BY user_id
+        ORDER BY total DESC, user_id
+        LIMIT ?
+    """
+    PERIOD_AFTER = """
+        SELECT user_id, SUM(xp) AS total FROM xp_daily
+        WHERE guild_id = ? AND day >= ?
+        GROUP BY user_id
+        HAVING SUM(xp) < ? OR (SUM(xp) = ? AND user_id > ?)
+        ORDER BY total DESC, user_id
+        LIMIT ?
+    """
+    FOLD_MONTHS = """
+        INSERT INTO xp_monthly (guild_id, month, user_id, xp)
+        SELECT guild_id, day / 100, user_id, SUM(xp) FROM xp_daily
+        WHERE day < ?
+        GROUP BY guild_id, day / 100, user_id
+        ON CONFLICT (guild_id, month, user_id) DO UPDATE SET
+            xp = xp_monthly.xp + excluded.xp
+    """
+    PURGE_DAYS = "DELETE FROM xp_daily WHERE day < ?"
+    
+    @staticmethod
+    def day_key(moment: date) -> int:
+        """AAAAMMJJ d'une date"""
+        return moment.year * 10000 + moment.month * 100 + moment.day
+    
+    async def add_daily_many(self, guild_id: int, rows: List[tuple]):
+        """
+        Ajoute l'XP du jour de plusieurs membres d'un serveur
+        
+        Args:
+            rows: (guild_id, day, user_id, xp) par membre et par jour
+        """
+        await self.db.executemany(self.ADD_DAILY_MANY, rows, guild_id=guild_id)
+    
+    async def top_since(
+        self,
+        guild_id: int,
+        since: int,
+        cursor: Optional[Tuple[int, int]] = None,
+        limit: int = 10
+    ) -> List[XPPeriodRow]:
+        """Membres ayant gagné le plus d'XP depuis le jour ``since`` (AAAAMMJJ)"""
+        if cursor is None:
+            rows = await self.db.fetchall(self.PERIOD_FIRST, (guild_id, since, limit), guild_id=guild_id)
+        else:
+            xp, user_id = cursor
+            rows = await self.db.fetchall(
+                self.PERIOD_AFTER,
+                (guild_id, since, xp, xp, user_id, limit),
+                guild_id=guild_id
+            )
+        return [XPPeriodRow(*row) for row in rows]
+    
+    async def compact(self, before: int) -> int:
+        """
+        Replie les jours antérieurs à ``before`` (AAAAMMJJ) dans les cumuls
+        mensuels, sur tous les serveurs
+        
+        Returns:
+            int: Lignes journalières supprimées
+        """
+        _, purged = await self.db.execute_shards([
+            (self.FOLD_MONTHS, (before,)),
+            (self.PURGE_DAYS, (before,)),
+        ])
+        return purged
+
+
+class LevelRewardRepo(Repository):
+    """Accès à la table level_rewards (rôles donnés par niveau)"""
+    
+    SELECT = "SELECT level, role_id FROM level_rewards WHERE guild_id = ? ORDER BY level"
+    UPSERT = """
+        INSERT INTO level_rewards (guild_id, level, role_id) VALUES (?, ?, ?)
+        ON CONFLICT (guild_id, level) DO UPDATE SET role_id = excluded.role_id
+    """
+    DELETE = "DELETE FROM level_rewards WHERE guild_id = ? AND level = ?"
+    
+    async def list(self, guild_id: int) -> List[Tuple[int, int]]:
+        """(niveau, role_id) des récompenses d'un serveur, triées par niveau"""
+        return await self.db.fetchall(self.SELECT, (guild_id,), guild_id=guild_id)
+    
+    async def set(self, guild_id: int, level: int, role_id: int):
+        """Associe un rôle à un niveau (remplace le précédent)"""
+        await self.db.execute(self.UPSERT, (guild_id, level, role_id), guild_id=guild_id)
+    
+    async def remove(self, guild_id: int, level: int) -> bool:
+        """Retire la récompense d'un niveau"""
+        return await self.db.execute(self.DELETE, (guild_id, level), guild_id=guild_id) > 0
+
+
+class SeasonRepo(Repository):
+    """
+    Saisons de niveaux : archive des totaux puis remise à zéro
+    
+    La fin d'une saison copie les lignes users du serveur dans
+    season_snapshots et remet XP et niveaux à zéro, chaque étape en une
+    seule requête ensembliste, dans une même transaction.
+    """
+    
+    FIELDS = "season_id, guild_id, number, started_at, ended_at"
+    NEXT = "SELECT COALESCE(MAX(number), 0) + 1, MAX(ended_at) FROM seasons WHERE guild_id = ?"
+    CREATE = f"""
+        INSERT INTO seasons (guild_id, number, started_at, ended_at)
+        VALUES (?, ?, ?, ?)
+        RETURNING {FIELDS}
+    """
+    ARCHIVE = """
+        INSERT INTO season_snapshots (season_id, guild_id, user_id, xp, level, messages)
+        SELECT seasons.season_id, users.guild_id, users.user_id, users.xp, users.level, users.messages
+        FROM users JOIN seasons ON seasons.guild_id = users.guild_id
+        WHERE seasons.season_id = ? AND users.guild_id = ? AND users.xp > 0
+    """
+    RESET = "UPDATE users SET xp = 0, level = 0 WHERE guild_id = ? AND (xp <> 0 OR level <> 0)"
+    LIST = f"""
+        SELECT {FIELDS}, (SELECT COUNT(*) FROM season_snapshots s WHERE s.season_id = seasons.season_id)
+        FROM seasons WHERE guild_id = ?
+        ORDER BY number DESC
+        LIMIT ?
+    """
+    BY_NUMBER = f"SELECT {FIELDS} FROM seasons WHERE guild_id = ? AND number = ?"
+    # Pages par curseur (xp, user_id), servies par idx_season_snapshots_rank
+    TOP_FIRST = """
+        SELECT user_id, xp, level FROM season_snapshots
+        WHERE season_id = ? AND guild_id = ?
+        ORDER BY xp DESC, user_id
+        LIMIT ?
+    """
+    TOP_AFTER = """
+        SELECT user_id, xp, level FROM season_snapshots
+        WHERE season_id = ? AND guild_id = ? AND (xp < ? OR (xp = ? AND user_id > ?))
+        ORDER BY xp DESC, user_id
+        LIMIT ?
+    """
+    
+    async def end(self, guild_id: int, now: datetime) -> SeasonRow:
+        """
+        Termine la saison en cours : archive puis remet à zéro
+        
+        À appeler dans XPBuffer.exclusive : les gains d'XP en mémoire
+        doivent être écrits avant, et pas pendant.
+        """
+        async with self.db.transaction(guild_id):
+            number, started_at = await self.db.fetchone(self.NEXT, (guild_id,), guild_id=guild_id)
+            row = await self.db.execute_returning(
+                self.CREATE,
+                (guild_id, number, started_at, now),
+                guild_id=guild_id
+            )
+            season = SeasonRow(*row)
+            season.members = await self.db.execute(self.ARCHIVE, (season.season_id, guild_id), guild_id=guild_id)
+            await self.db.execute(self.RESET, (guild_id,), guild_id=guild_id)
+        return season
+    
+    async def list(self, guild_id: int, limit: int = 10) -> List[SeasonRow]:
+        """Dernières saisons terminées"""
+        rows = await self.db.fetchall(self.LIST, (guild_id, limit), guild_id=guild_id)
+        return [SeasonRow(*row) for row in rows]
+    
+    async def get(self, guild_id: int, number: int) -> Optional[SeasonRow]:
+        """Saison terminée par son numéro"""
+        row = await self.db.fetchone(self.BY_NUMBER, (guild_id, number), guild_id=guild_id)
+        return SeasonRow(*row) if row else None
+    
+    async def top(
+        self,
+        guild_id: int,
+        season_id: int,
+        cursor: Optional[Tuple[int, int]] = None,
+        limit: int = 10
+    ) -> List[SeasonEntry]:
+        """Classement archivé d'une saison, après ``cursor`` = (xp, user_id)"""
+        if cursor is None:
+            rows = await self.db.fetchall(self.TOP_FIRST, (season_id, guild_id, limit), guild_id=guild_id)
+        else:
+            xp, user_id = cursor
+            rows = await self.db.fetchall(
+                self.TOP_AFTER,
+                (season_id, guild_id, xp, xp, user_id, limit),
+                guild_id=guild_id
+            )
+        return [SeasonEntry(*row) for row in rows]
+
+
+class EconomyRepo(Repository):
+    """Accès à la table economy"""
+    
+    FIELDS = "guild_id, user_id, balance, bank, daily_claimed"
+    STARTING_BALANCE = 100
+    
+    SELECT = f"SELECT {FIELDS} FROM economy WHERE guild_id = ? AND user_id = ?"
+    CREATE = """
+        INSERT INTO economy (guild_id, user_id, balance, bank)
+        VALUES (?, ?, ?, 0)
+        ON CONFLICT (guild_id, user_id) DO NOTHING
+    """
+    # Classements servis par idx_economy_wealth (guild_id, total DESC, user_id)
+    RICHEST = """
+        SELECT guild_id, user_id, balance, bank, daily_claimed FROM economy
+        WHERE guild_id = ?
+        ORDER BY total DESC, user_id
+        LIMIT ? OFFSET ?
+    """
+    # Pages par curseur (total, user_id) : pas d'OFFSET à parcourir. La
+    # borne ``total <= ?`` donne au moteur une plage d'index à parcourir
+    RICHEST_FIRST = """
+        SELECT guild_id, user_id, balance, bank, daily_claimed FROM economy
+        WHERE guild_id = ?
+        ORDER BY total DESC, user_id
+        LIMIT ?
+    """
+    RICHEST_AFTER = """
+        SELECT guild_id, user_id, balance, bank, daily_claimed FROM economy
+        WHERE guild_id = ?
+          AND total <= ? AND (total < ? OR user_id > ?)
+        ORDER BY total DESC, user_id
+        LIMIT ?
+    """
+    COUNT = "SELECT COUNT(*) FROM economy WHERE guild_id = ?"
+    # Comptage sur l'index : les comptes strictement plus riches. Aucune
+    # ligne pour un membre sans compte, qui n'est donc pas classé
+    RANK = """
+        SELECT (
+            SELECT COUNT(*) FROM economy other
+            WHERE other.guild_id = target.guild_id AND other.total > target.total
+        ) + 1
+        FROM economy target
+        WHERE target.guild_id = ? AND target.user_id = ?
+    """
+    UPDATE_COLUMNS = ("balance", "bank", "daily_claimed")
+    # Mouvements du portefeuille en une requête : le solde est relu et
+    # modifié par le moteur, sans lecture préalable côté bot
+    DEBIT = """
+        UPDATE economy SET balance = balance - ?
+        WHERE guild_id = ? AND user_id = ? AND balance >= ?
+        RETURNING balance
+    """
+    CREDIT = """
+        INSERT INTO economy (guild_id, user_id, balance, bank)
+        VALUES (?, ?, ?, 0)
+        ON CONFLICT (guild_id, user_id) DO UPDATE SET balance = economy.balance + ?
+        RETURNING balance
+    """
+    # Portefeuille <-> banque : ``amount`` positif pour un dépôt, négatif pour un retrait
+    TO_BANK = """
+        UPDATE economy SET balance = balance - ?, bank = bank + ?
+        WHERE guild_id = ? AND user_id = ? AND balance >= ? AND bank >= ?
+        RETURNING balance, bank
+    """
+    # Récompense quotidienne : crédit et date de réclamation dans la même
+    # requête, refusée tant que la précédente a moins de DAILY_COOLDOWN
+    CLAIM_DAILY = """
+        UPDATE economy SET balance = balance + ?, daily_claimed = ?
+        WHERE guild_id = ? AND user_id = ?
+          AND (daily_claimed IS NULL OR daily_claimed <= ?)
+        RETURNING balance
+    """
+    DAILY_COOLDOWN = timedelta(hours=24)
+    
+    # Secondes pendant lesquelles un nombre de comptes reste en cache
+    COUNT_TTL = 300.0
+    
+    def __init__(self, db: "DatabaseManager"):
+        super().__init__(db)
+        # Un UPDATE par combinaison de colonnes, construit à la demande
+        self._updates: Dict[Tuple[str, ...], str] = {}
+        # Nombre de comptes par serveur : (valeur, expiration)
+        self._counts: Dict[int, Tuple[int, float]] = {}
+    
+    async def get(self, guild_id: int, user_id: int) -> Optional[EconomyRow]:
+        """Récupère le compte d'un membre"""
+        row = await self.db.fetchone(self.SELECT, (guild_id, user_id), guild_id=guild_id)
+        return EconomyRow(*row) if row else None
+    
+    async def get_or_create(self, guild_id: int, user_id: int) -> EconomyRow:
+        """Récupère le compte d'un membre, en l'ouvrant si besoin"""
+        account = await self.get(guild_id, user_id)
+        if account:
+            return account
+        
+        created = await self.db.execute(
+            self.CREATE,
+            (guild_id, user_id, self.STARTING_BALANCE),
+            guild_id=guild_id
+        )
+        if not created:
+            # Ouvert entre-temps par une autre commande
+            return await self.get(guild_id, user_id)
+        
+        cached = self._counts.get(guild_id)
+        if cached is not None:
+            self._counts[guild_id] = (cached[0] + 1, cached[1])
+        return EconomyRow(guild_id, user_id, self.STARTING_BALANCE)
+    
+    def _update_sql(self, columns: Tuple[str, ...]) -> str:
+        """Retourne (et met en cache) l'UPDATE pour ces colonnes"""
+        sql = self._updates.get(columns)
+        if sql is None:
+            assignments = ", ".join(f"{column} = ?" for column in columns)
+            sql = f"UPDATE economy SET {assignments} WHERE guild_id = ? AND user_id = ?"
+            self._updates[columns] = sql
+        return sql
+    
+    async def update(self, guild_id: int, user_id: int, **values):
+        """Met à jour balance, bank et/ou daily_claimed en une seule requête"""
+        columns = tuple(c for c in self.UPDATE_COLUMNS if values.get(c) is not None)
+        if not columns:
+            return
+        
+        params = tuple(values[c] for c in columns) + (guild_id, user_id)
+        await self.db.execute(self._update_sql(columns), params, guild_id=guild_id)
+    
+    async def debit(self, guild_id: int, user_id: int, amount: int) -> Optional[int]:
+        """
+        Retire ``amount`` du portefeuille si le solde suffit
+        
+        Returns:
+            Optional[int]: Nouveau solde, None si le solde est insuffisant
+        """
+        params = (amount, guild_id, user_id, amount)
+        row = await self.db.execute_returning(self.DEBIT, params, guild_id=guild_id)
+        if row is None and await self.get(guild_id, user_id) is None:
+            # Compte pas encore ouvert : l'ouvrir avec le solde de départ
+            await self.get_or_create(guild_id, user_id)
+            row = await self.db.execute_returning(self.DEBIT, params, guild_id=guild_id)
+        return row[0] if row else None
+    
+    async def credit(self, guild_id: int, user_id: int, amount: int) -> int:
+        """Ajoute ``amount`` au portefeuille (ouvert si besoin) et retourne le nouveau solde"""
+        row = await self.db.execute_returning(
+            self.CREDIT,
+            (guild_id, user_id, self.STARTING_BALANCE + amount, amount),
+            guild_id=guild_id
+        )
+        return row[0]
+    
+    async def claim_daily(self, guild_id: int, user_id: int, amount: int, now: datetime) -> Optional[int]:
+        """
+        Crédite la récompense quotidienne et note sa date, si elle est disponible
+        
+        Returns:
+            Optional[int]: Nouveau solde, None si déjà réclamée depuis moins de DAILY_COOLDOWN
+        """
+        params = (amount, now, guild_id, user_id, now - self.DAILY_COOLDOWN)
+        row = await self.db.execute_returning(self.CLAIM_DAILY, params, guild_id=guild_id)
+        if row is None and await self.get(guild_id, user_id) is None:
+            # Compte pas encore ouvert : l'ouvrir avec le solde de départ
+            await self.get_or_create(guild_id, user_id)
+            row = await self.db.execute_returning(self.CLAIM_DAILY, params, guild_id=guild_id)
+        return row[0] if row else None
+    
+    async def move(
+        self,
+        guild_id: int,
+        sender_id: int,
+        receiver_id: int,
+        amount: int
+    ) -> Optional[Tuple[int, int]]:
+        """
+        Transfère ``amount`` d'un portefeuille à l'autre, dans une transaction
+        
+        Returns:
+            Optional[Tuple[int, int]]: Soldes (expéditeur, destinataire), None si le solde est insuffisant
+        """
+        async with self.db.transaction(guild_id):
+            sender = await self.debit(guild_id, sender_id, amount)
+            if sender is None:
+                return None
+            receiver = await self.credit(guild_id, receiver_id, amount)
+        return sender, receiver
+    
+    async def to_bank(self, guild_id: int, user_id: int, amount: int) -> Optional[Tuple[int, int]]:
+        """
+        Dépose (``amount`` > 0) ou retire (``amount`` < 0) en une requête
+        
+        Returns:
+            Optional[Tuple[int, int]]: (portefeuille, banque), None si les fonds sont insuffisants
+        """
+        row = await self.db.execute_returning(
+            self.TO_BANK,
+            (amount, amount, guild_id, user_id, amount, -amount),
+            guild_id=guild_id
+        )
+        return (row[0], row[1]) if row else None
+    
+    async def richest(self, guild_id: int, limit: int = 10, offset: int = 0) -> List[EconomyRow]:
+        """Comptes triés par richesse totale"""
+        rows = await self.db.fetchall(self.RICHEST, (guild_id, limit, offset), guild_id=guild_id)
+        return [EconomyRow(*row) for row in rows]
+    
+    async def richest_after(
+        self,
+        guild_id: int,
+        cursor: Optional[Tuple[int, int]],
+        limit: int = 10
+    ) -> List[EconomyRow]:
+        """Comptes triés par richesse qui suivent ``cursor`` = (total, user_id)"""
+        if cursor is None:
+            rows = await self.db.fetchall(self.RICHEST_FIRST, (guild_id, limit), guild_id=guild_id)
+        else:
+            total, user_id = cursor
+            rows = await self.db.fetchall(
+                self.RICHEST_AFTER,
+                (guild_id, total, total, user_id, limit),
+                guild_id=guild_id
+            )
+        return [EconomyRow(*row) for row in rows]
+    
+    async def count(self, guild_id: int) -> int:
+        """
+        Nombre de comptes sur le serveur
+        
+        Gardé ``COUNT_TTL`` secondes : les comptes ouverts par get_or_create
+        y sont ajoutés, ceux ouverts par un crédit n'apparaissent qu'au
+        recomptage suivant.
+        """
+        now = time.monotonic()
+        cached = self._counts.get(guild_id)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+        
+        row = await self.db.fetchone(self.COUNT, (guild_id,), guild_id=guild_id)
+        self._counts[guild_id] = (row[0], now + self.COUNT_TTL)
+        return row[0]
+    
+    async def rank_of(self, guild_id: int, user_id: int) -> Optional[int]:
+        """Position d'un membre dans le classement de richesse, None s'il n'a pas de compte"""
+        row = await self.db.fetchone(self.RANK, (guild_id, user_id), guild_id=guild_id)
+        return row[0] if row else None
+
+
+class LedgerRepo(Repository):
+    """
+    Journal des mouvements de coins (economy_ledger) et instantanés des soldes
+    
+    Le journal n'est jamais modifié : chaque ligne porte le montant signé et
+    le solde du portefeuille après le mouvement. Un instantané mémorise, pour
+    un membre, le solde au dernier mouvement connu ; le solde se reconstruit
+    à partir du dernier instantané et des seuls mouvements qui le suivent.
+    """
+    
+    FIELDS = "entry_id, user_id, kind, amount, balance_after, counterparty_id, reference, created_at"
+    INSERT = """
+        INSERT INTO economy_ledger
+            (guild_id, user_id, kind, amount, balance_after, counterparty_id, reference, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    # Pages par curseur entry_id, servies par idx_economy_ledger_member
+    HISTORY_FIRST = f"""
+        SELECT {FIELDS} FROM economy_ledger
+        WHERE guild_id = ? AND user_id = ?
+        ORDER BY entry_id DESC
+        LIMIT ?
+    """
+    HISTORY_BEFORE = f"""
+        SELECT {FIELDS} FROM economy_ledger
+        WHERE guild_id = ? AND user_id = ? AND entry_id < ?
+        ORDER BY entry_id DESC
+        LIMIT ?
+    """
+    # Dernier solde de chaque membre ayant bougé depuis le dernier instantané
+    SNAPSHOT = """
+        INSERT INTO economy_snapshots (guild_id, user_id, entry_id, balance)
+        SELECT l.guild_id, l.user_id, l.entry_id, l.balance_after
+        FROM economy_ledger l
+        WHERE l.entry_id > (SELECT COALESCE(MAX(entry_id), 0) FROM economy_snapshots)
+          AND NOT EXISTS (
+              SELECT 1 FROM economy_ledger n
+              WHERE n.guild_id = l.guild_id AND n.user_id = l.user_id AND n.entry_id > l.entry_id
+          )
+    """
+    LATEST_SNAPSHOT = """
+        SELECT entry_id, balance FROM economy_snapshots
+        WHERE guild_id = ? AND user_id = ?
+        ORDER BY entry_id DESC
+        LIMIT 1
+    """
+    SUM_AFTER = """
+        SELECT COALESCE(SUM(amount), 0) FROM economy_ledger
+        WHERE guild_id = ? AND user_id = ? AND entry_id > ?
+    """
+    
+    async def add_many(self, guild_id: int, rows: Sequence[tuple]):
+        """
+        Ajoute des mouvements en un seul executemany
+        
+        Args:
+            rows: (guild_id, user_id, kind, amount, balance_after, counterparty_id, reference, created_at)
+        """
+        await self.db.executemany(self.INSERT, rows, guild_id=guild_id)
+    
+    async def history(
+        self,
+        guild_id: int,
+        user_id: int,
+        before: Optional[int] = None,
+        limit: int = 10
+    ) -> List[LedgerRow]:
+        """Mouvements d'un membre, du plus récent au plus ancien, avant l'entrée ``before``"""
+        if before is None:
+            rows = await self.db.fetchall(self.HISTORY_FIRST, (guild_id, user_id, limit), guild_id=guild_id)
+        else:
+            rows = await self.db.fetchall(
+                self.HISTORY_BEFORE,
+                (guild_id, user_id, before, limit),
+                guild_id=guild_id
+            )
+        return [LedgerRow(*row) for row in rows]
+    
+    async def snapshot(self) -> int:
+        """
+        Instantané des soldes ayant bougé depuis le précédent (tous serveurs)
+        
+        Returns:
+            int: Membres photographiés
+        """
+        (taken,) = await self.db.execute_shards([(self.SNAPSHOT, ())])
+        return taken
+    
+    async def rebuild(self, guild_id: int, user_id: int) -> int:
+        """Solde du portefeuille recalculé depuis le dernier instantané et le journal"""
+        snapshot = await self.db.fetchone(self.LATEST_SNAPSHOT, (guild_id, user_id), guild_id=guild_id)
+        entry_id, balance = snapshot or (0, EconomyRepo.STARTING_BALANCE)
+        (moved,) = await self.db.fetchone(self.SUM_AFTER, (guild_id, user_id, entry_id), guild_id=guild_id)
+        return balance + moved
+
+
+class TicketRepo(Repository):
+    """Accès à la table tickets"""
+    
+    FIELDS = (
+        "ticket_id, guild_id, channel_id, user_id, category, status, "
+        "description, created_at, closed_at, closed_by"
+    )
+    
+    OPEN_BY_USER = f"""
+        SELECT {FIELDS} FROM tickets
+        WHERE guild_id = ? AND user_id = ? AND status = 'open'
+    """
+    OPEN_BY_CHANNEL = f"""
+        SELECT {FIELDS} FROM tickets
+        WHERE guild_id = ? AND channel_id = ? AND status = 'open'
+    """
+    CREATE = """
+        INSERT INTO tickets
+        (guild_id, channel_id, user_id, category, description, status, created_at)
+        VALUES (?, ?, ?, ?, ?, 'open', ?)
+    """
+    CLOSE = """
+        UPDATE tickets
+        SET status = 'closed', closed_at = ?, closed_by = ?
+        WHERE guild_id = ? AND channel_id = ? AND status = 'open'
+    """
+    # Une requête par combinaison de filtres (status, user)
+    LIST = {
+        (False, False): f"SELECT {FIELDS} FROM tickets WHERE guild_id = ? "
+                        "ORDER BY created_at DESC LIMIT ?",
+        (True, False): f"SELECT {FIELDS} FROM tickets WHERE guild_id = ? AND status = ? "
+                       "ORDER BY created_at DESC LIMIT ?",
+        (False, True): f"SELECT {FIELDS} FROM tickets WHERE guild_id = ? AND user_id = ? "
+                       "ORDER BY created_at DESC LIMIT ?",
+        (True, True): f"SELECT {FIELDS} FROM tickets WHERE guild_id = ? AND user_id = ? "
+                      "AND status = ? ORDER BY created_at DESC LIMIT ?",
+    }
+    
+    async def open_for_user(self, guild_id: int, user_id: int) -> Optional[TicketRow]:
+        """Ticket ouvert d'un membre, s'il en a un"""
+        row = await self.db.fetchone(self.OPEN_BY_USER, (guild_id, user_id), guild_id=guild_id)
+        return TicketRow(*row) if row else None
+    
+    async def open_for_channel(self, guild_id: int, channel_id: int) -> Optional[TicketRow]:
+        """Ticket ouvert associé à un canal"""
+        row = await self.db.fetchone(self.OPEN_BY_CHANNEL, (guild_id, channel_id), guild_id=guild_id)
+        return TicketRow(*row) if row else None
+    
+    async def create(
+        self,
+        guild_id: int,
+        channel_id: int,
+        user_id: int,
+        category: str,
+        description: str,
+        created_at: datetime
+    ):
+        """Enregistre un nouveau ticket ouvert"""
+        await self.db.execute(
+            self.CREATE,
+            (guild_id, channel_id, user_id, category, description, created_at),
+            guild_id=guild_id
+        )
+    
+    async def close(self, guild_id: int, channel_id: int, closed_by: int, closed_at: datetime) -> bool:
+        """
+        Ferme le ticket ouvert d'un canal
+        
+        Returns:
+            bool: False si aucun ticket ouvert n'était associé au canal
+        """
+        closed = await self.db.execute(self.CLOSE, (closed_at, closed_by, guild_id, channel_id), guild_id=guild_id)
+        return closed > 0
+    
+    async def list(
+        self,
+        guild_id: int,
+        status: Optional[str] = None,
+        user_id: Optional[int] = None,
+        limit: int = 25
+    ) -> List[TicketRow]:
+        """Tickets d'un serveur, du plus récent au plus ancien"""
+        params = [guild_id]
+        if user_id is not None:
+            params.append(user_id)
+        if status:
+            params.append(status)
+        params.append(limit)
+        
+        sql = self.LIST[(bool(status), user_id is not None)]
+        rows = await self.db.fetchall(sql, tuple(params), guild_id=guild_id)
+        return [TicketRow(*row) for row in rows]
@@ -0,0 +1,157 @@
+"""
+Attribution des rôles récompenses : file à débit limité et réconciliation
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import discord
+
+from models.leveling import LevelConfig
+from .logger import setup_logger
+
+logger = setup_logger("RoleSync")
+
+
+@dataclass
+class RoleChange:
+    """Rôles à ajouter et retirer à un membre"""
+    member: discord.Member
+    add: Set[int] = field(default_factory=set)
+    remove: Set[int] = field(default_factory=set)
+    reason: str = "Récompense de niveau"
+
+
+class RoleUpdateQueue:
+    """
+    Modifications de rôles appliquées une par une, au plus
+    ``rate`` appels à l'API par seconde.
+    
+    Les changements d'un même membre en attente sont fusionnés : un
+    membre ne reçoit qu'un appel add_roles et un appel remove_roles, même
+    après plusieurs montées de niveau rapprochées.
+    """
+    
+    def __init__(self, rate: float = 2.0):
+        """
+        Args:
+            rate: Appels à l'API Discord par seconde au maximum
+        """
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._pending: Dict[Tuple[int, int], RoleChange] = {}
+        self._queue: "asyncio.Queue[Tuple[int, int]]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._next_call = 0.0
+        
+        # Statistiques
+        self.applied = 0
+        self.failed = 0
+    
+    def start(self):
+        """Démarre le traitement de la file"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def close(self):
+        """Arrête le traitement (les changements en attente sont abandonnés)"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+    
+    def __len__(self) -> int:
+        return len(self._pending)
+    
+    def submit(self, change: RoleChange):
+        """Met en file des ajouts/retraits de rôles pour un membre"""
+        key = (change.member.guild.id, change.member.id)
+        pending = self._pending.get(key)
+        if pending is None:
+            self._pending[key] = change
+            self._queue.put_nowait(key)
+            return
+        
+        # Le dernier changement demandé l'emporte sur le précédent
+        pending.member = change.member
+        pending.add = (pending.add - change.remove) | change.add
+        pending.remove = (pending.remove - change.add) | change.remove
+    
+    async def _throttle(self):
+        """Attend le créneau du prochain appel à l'API"""
+        delay = self._next_call - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self._next_call = time.monotonic() + self.interval
+    
+    async def _apply(self, change: RoleChange):
+        """Applique un changement (uniquement les rôles réellement manquants ou en trop)"""
+        member = change.member
+        current = {role.id for role in member.roles}
+        add = [member.guild.get_role(role_id) for role_id in change.add - current]
+        remove = [member.guild.get_role(role_id) for role_id in change.remove & current]
+        add = [role for role in add if role is not None]
+        remove = [role for role in remove if role is not None]
+        
+        if add:
+            await self._throttle()
+            await member.add_roles(*add, reason=change.reason)
+        if remove:
+            await self._throttle()
+            await member.remove_roles(*remove, reason=change.reason)
+    
+    async def _run(self):
+        """Boucle de traitement de la file"""
+        while True:
+            key = await self._queue.get()
+            change = self._pending.pop(key, None)
+            if change is None:
+                continue
+            try:
+                await self._apply(change)
+                self.applied += 1
+            except discord.HTTPException as e:
+                self.failed += 1
+                logger.warning(f"Rôles de {change.member} non modifiés: {e}")
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Erreur modification des rôles de {change.member}: {e}")
+    
+    def stats(self) -> dict:
+        return {"pending": len(self._pending), "applied": self.applied, "failed": self.failed}
+
+
+def manageable_roles(guild: discord.Guild, config: LevelConfig) -> Set[int]:
+    """Rôles récompenses que le bot peut attribuer (sous son rôle le plus haut)"""
+    me = guild.me
+    roles = set()
+    for role_id in config.reward_role_ids:
+        role = guild.get_role(role_id)
+        if role is not None and not role.managed and me is not None and role < me.top_role:
+            roles.add(role_id)
+    return roles
+
+
+def diff_member_roles(
+    members: Iterable[discord.Member],
+    levels: Dict[int, int],
+    config: LevelConfig,
+    manageable: Set[int]
+) -> List[RoleChange]:
+    """
+    Écarts entre les rôles attendus et les rôles réels
+    
+    Args:
+        members: Membres du serveur
+        levels: Niveau de chaque membre (absent = niveau 0)
+        config: Récompenses du serveur
+        manageable: Rôles que le bot peut modifier
+    """
+    changes = []
+    for member in members:
+        if member.bot:
+            continue
+        expected = config.roles_up_to(levels.get(member.id, 0)) & manageable
+        actual = {role.id for role in member.roles} & manageable
+        if expected != actual:
+            changes.append(RoleChange(member, expected - actual, actual - expected, "Réconciliation des récompenses de niveau"))
+    return changes
@@ -0,0 +1,201 @@
+"""
+File d'écriture différée (write-behind) avec commit groupé
+"""
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Optional
+
+from .db_pool import ConnectionPool
+from .logger import setup_logger
+
+logger = setup_logger("WriteQueue")
+
+
+@dataclass
+class _Write:
+    """Une écriture en attente"""
+    sql: str
+    params: Any
+    fetch: bool = False
+    many: bool = False
+    future: Optional[asyncio.Future] = None
+
+
+class WriteBehindQueue:
+    """
+    Regroupe les écritures de tous les cogs dans une seule transaction.
+    
+    Les requêtes soumises sont mises en file puis exécutées par lots :
+    un lot part dès que ``max_batch`` écritures attendent, ou au plus tard
+    ``flush_interval`` secondes après la première. Chaque requête est isolée
+    dans un SAVEPOINT : une erreur n'annule que la requête fautive, pas le
+    reste du lot. Le futur retourné par ``submit`` est résolu après le
+    COMMIT, l'attendre garantit donc que l'écriture est durable.
+    """
+    
+    def __init__(self, pool: ConnectionPool, flush_interval: float = 0.01, max_batch: int = 200):
+        """
+        Initialise la file
+        
+        Args:
+            pool: Pool fournissant la connexion d'écriture
+            flush_interval: Délai maximal (secondes) avant le commit d'un lot
+            max_batch: Nombre d'écritures déclenchant un commit immédiat
+        """
+        self.pool = pool
+        self.flush_interval = flush_interval
+        self.max_batch = max(1, max_batch)
+        
+        self._pending: Deque[_Write] = deque()
+        self._wakeup = asyncio.Event()  # Au moins une écriture en attente
+        self._full = asyncio.Event()  # Lot complet, inutile d'attendre
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        
+        # Statistiques
+        self.batches = 0
+        self.statements = 0
+        self.largest_batch = 0
+    
+    @property
+    def running(self) -> bool:
+        """La file accepte-t-elle des écritures ?"""
+        return self._task is not None and not self._closing
+    
+    def start(self):
+        """Démarre la tâche de vidage"""
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+    
+    async def close(self):
+        """Vide la file puis arrête la tâche"""
+        if self._task is None:
+            return
+        
+        self._closing = True
+        self._wakeup.set()
+        self._full.set()
+        await self._task
+        self._task = None
+    
+    def submit(self, sql: str, params: Any = (), fetch: bool = False, many: bool = False) -> asyncio.Future:
+        """
+        Ajoute une écriture à la file
+        
+        Args:
+            sql: Requête à exécuter
+            params: Paramètres (liste de jeux de paramètres si ``many``)
+            fetch: Retourner les lignes (RETURNING) plutôt que le rowcount
+            many: Exécuter avec executemany
+        
+        Returns:
+            asyncio.Future: Résolu après le COMMIT du lot
+        """
+        if not self.running:
+            raise RuntimeError("La file d'écriture n'est pas démarrée")
+        
+        write = _Write(sql, params, fetch, many, asyncio.get_running_loop().create_future())
+        self._pending.append(write)
+        self._wakeup.set()
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+        return write.future
+    
+    async def flush(self):
+        """Commit immédiat de toutes les écritures en attente"""
+        while self._pending:
+            await self._flush_batch()
+    
+    def stats(self) -> dict:
+        """Profondeur de la file et taille des lots"""
+        return {
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "statements": self.statements,
+            "avg_batch": round(self.statements / self.batches, 2) if self.batches else 0,
+            "largest_batch": self.largest_batch,
+        }
+    
+    async def _run(self):
+        """Boucle de vidage : attend une écriture, laisse le lot se remplir, commit"""
+        while True:
+            await self._wakeup.wait()
+            
+            if not self._closing and len(self._pending) < self.max_batch:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            
+            try:
+                await self._flush_batch()
+            except Exception as e:
+                logger.error(f"Erreur lors du commit groupé: {e}")
+            
+            if self._closing and not self._pending:
+                return
+    
+    async def _flush_batch(self):
+        """Exécute un lot dans une transaction"""
+        async with self.pool.acquire_write() as connection:
+            # Le lot est prélevé sous le verrou pour conserver l'ordre des écritures
+            batch = [self._pending.popleft() for _ in range(min(len(self._pending), self.max_batch))]
+            if len(self._pending) < self.max_batch:
+                self._full.clear()
+            if not self._pending:
+                self._wakeup.clear()
+            if not batch:
+                return
+            
+            results = []
+            try:
+                await connection.execute("BEGIN")
+                for write in batch:
+                    results.append(await self._execute(connection, write))
+                await connection.commit()
+            except Exception as e:
+                await connection.rollback()
+                for write in batch:
+                    if not write.future.done():
+                        write.future.set_exception(e)
+                raise
+        
+        self.batches += 1
+        self.statements += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        
+        for write, (result, error) in zip(batch, results):
+            if write.future.done():
+                continue
+            if error is not None:
+                write.future.set_exception(error)
+            else:
+                write.future.set_result(result)
+    
+    @staticmethod
+    async def _execute(connection, write: _Write):
+        """
+        Exécute une écriture dans son propre SAVEPOINT
+        
+        Returns:
+            tuple: (résultat, exception)
+        """
+        await connection.execute("SAVEPOINT write_behind")
+        try:
+            if write.many:
+                cursor = await connection.executemany(write.sql, write.params)
+                result = cursor.rowcount
+            elif write.fetch:
+                result = list(await connection.execute_fetchall(write.sql, write.params))
+            else:
+                cursor = await connection.execute(write.sql, write.params)
+                result = cursor.rowcount
+        except Exception as e:
+            await connection.execute("ROLLBACK TO write_behind")
+            await connection.execute("RELEASE write_behind")
+            return None, e
+        
+        await connection.execute("RELEASE write_behind")
+        return result, None
@@ -0,0 +1,367 @@
+"""
+Accumulateur d'XP : gains agrégés en mémoire et écrits par lots
+"""
+import asyncio
+import contextlib
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from .repositories import UserRow, XPRollupRepo
+from .logger import setup_logger
+
+if TYPE_CHECKING:
+    from .database import DatabaseManager
+
+logger = setup_logger("XPBuffer")
+
+Key = Tuple[int, int]
+
+
+@dataclass(slots=True)
+class _Delta:
+    """Gains d'un membre pas encore écrits en base"""
+    xp: int = 0
+    messages: int = 0
+    level: int = 0
+    last_message: Optional[datetime] = None
+    days: Dict[int, int] = field(default_factory=dict)  # XP par jour (AAAAMMJJ)
+    
+    def add_day(self, day: int, xp: int):
+        self.days[day] = self.days.get(day, 0) + xp
+
+
+class XPBuffer:
+    """
+    Totaux d'XP en mémoire par (guild_id, user_id).
+    
+    Le premier gain d'un membre charge sa ligne ; les suivants ne touchent
+    que la mémoire, ce qui permet de détecter un passage de niveau sans
+    requête. Toutes les ``flush_interval`` secondes, les gains accumulés
+    sont écrits avec un seul UPSERT executemany par serveur, dans la même
+    transaction que les cumuls journaliers (xp_daily). Les membres
+    inactifs depuis ``idle_ttl`` secondes sont retirés de la mémoire une
+    fois leurs gains écrits.
+    """
+    
+    def __init__(self, db: "DatabaseManager", flush_interval: float = 5.0, idle_ttl: float = 600.0):
+        """
+        Args:
+            db: Gestionnaire de base de données
+            flush_interval: Secondes entre deux écritures des gains
+            idle_ttl: Secondes d'inactivité avant d'oublier un membre
+        """
+        self.db = db
+        self.flush_interval = flush_interval
+        self.idle_ttl = idle_ttl
+        
+        self._totals: Dict[Key, UserRow] = {}
+        self._pending: Dict[Key, _Delta] = {}
+        self._last_seen: Dict[Key, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        
+        # Statistiques
+        self.gains = 0
+        self.flushes = 0
+        self.rows_written = 0
+    
+    def start(self):
+        """Démarre la tâche d'écriture périodique"""
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+    
+    async def close(self):
+        """Arrête la boucle (le lot en cours va à son terme) puis écrit les gains restants"""
+        if self._task:
+            self._stopping.set()
+            # Annulée de l'extérieur, la boucle a remis ses gains en attente
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
+    
+    async def add(self, guild_id: int, user_id: int, xp: int, now: datetime) -> UserRow:
+        """
+        Ajoute de l'XP et un message à un membre
+        
+        Returns:
+            UserRow: Totaux à jour du membre (gains non écrits compris)
+        """
+        key = (guild_id, user_id)
+        totals = self._totals.get(key)
+        if totals is None:
+            totals = await self._load(guild_id, user_id)
+        
+        totals.xp += xp
+        totals.messages += 1
+        totals.last_message = now
+        
+        delta = self._pending.get(key)
+        if delta is None:
+            delta = self._pending[key] = _Delta()
+        delta.xp += xp
+        delta.messages += 1
+        delta.last_message = now
+        delta.add_day(XPRollupRepo.day_key(now), xp)
+        
+        self._last_seen[key] = time.monotonic()
+        self.gains += 1
+        return totals
+    
+    async def add_many(
+        self,
+        guild_id: int,
+        user_ids: Sequence[int],
+        xp: int,
+        now: Optional[datetime] = None
+    ) -> List[UserRow]:
+        """
+        Ajoute la même quantité d'XP à plusieurs membres, sans compter de
+        message (XP vocale). Les membres absents de la mémoire sont chargés
+        en une seule lecture.
+        
+        Returns:
+            List[UserRow]: Totaux à jour, dans l'ordre de ``user_ids``
+        """
+        missing = [user_id for user_id in user_ids if (guild_id, user_id) not in self._totals]
+        if missing:
+            rows = await self.db.users.get_many(guild_id, missing)
+            for user_id in missing:
+                # Un message a pu charger le membre pendant l'attente
+                self._totals.setdefault((guild_id, user_id), rows.get(user_id) or UserRow(guild_id, user_id))
+        
+        day = XPRollupRepo.day_key(now or datetime.utcnow())
+        seen = time.monotonic()
+        updated = []
+        for user_id in user_ids:
+            key = (guild_id, user_id)
+            totals = self._totals[key]
+            totals.xp += xp
+            
+            delta = self._pending.get(key)
+            if delta is None:
+                delta = self._pending[key] = _Delta()
+            delta.xp += xp
+            delta.add_day(day, xp)
+            
+            self._last_seen[key] = seen
+            updated.append(totals)
+        
+        self.gains += len(updated)
+        return updated
+    
+    def set_level(self, guild_id: int, user_id: int, level: int):
+        """
+        Enregistre un passage de niveau (écrit avec le prochain lot)
+        
+        Ignoré si les totaux du membre ont été oubliés entre-temps
+        (invalidate, exclusive) : le niveau a été calculé sur des totaux
+        périmés et sera recalculé au prochain gain.
+        """
+        key = (guild_id, user_id)
+        totals = self._totals.get(key)
+        if totals is None:
+            return
+        totals.level = level
+        
+        delta = self._pending.get(key)
+        if delta is None:
+            delta = self._pending[key] = _Delta()
+        delta.level = max(delta.level, level)
+    
+    async def get(self, guild_id: int, user_id: int) -> Optional[UserRow]:
+        """Progression d'un membre : totaux en mémoire s'ils existent, sinon la base"""
+        totals = self._totals.get((guild_id, user_id))
+        if totals is not None:
+            return totals
+        return await self.db.users.get(guild_id, user_id)
+    
+    async def _load(self, guild_id: int, user_id: int) -> UserRow:
+        """Charge les totaux d'un membre depuis la base"""
+        row = await self.db.users.get(guild_id, user_id)
+        
+        # Un autre message a pu charger le membre pendant l'attente
+        totals = self._totals.get((guild_id, user_id))
+        if totals is None:
+            totals = row or UserRow(guild_id, user_id)
+            self._totals[(guild_id, user_id)] = totals
+        return totals
+    
+    async def flush(self):
+        """Écrit tous les gains accumulés (un executemany par serveur)"""
+        async with self._flush_lock:
+            await self._flush_pending()
+    
+    async def _flush_pending(self):
+        """flush, verrou d'écriture déjà tenu"""
+        if not self._pending:
+            self._evict_idle()
+            return
+        
+        pending, self._pending = self._pending, {}
+        by_guild: Dict[int, List[tuple]] = defaultdict(list)
+        daily: Dict[int, List[tuple]] = defaultdict(list)
+        for (guild_id, user_id), delta in pending.items():
+            by_guild[guild_id].append(
+                (guild_id, user_id, delta.xp, delta.level, delta.messages, delta.last_message)
+            )
+            daily[guild_id].extend((guild_id, day, user_id, xp) for day, xp in delta.days.items())
+        
+        # Une tâche par serveur : asyncio.wait ne les annule pas si le flush
+        # l'est, une transaction interrompue au COMMIT laisserait son issue
+        # inconnue (gains perdus ou écrits deux fois)
+        writes = {
+            guild_id: asyncio.ensure_future(self._write(guild_id, rows, daily[guild_id]))
+            for guild_id, rows in by_guild.items()
+        }
+        try:
+            await asyncio.wait(writes.values())
+        except asyncio.CancelledError:
+            # Arrêt en plein lot : les écritures lancées vont à leur terme
+            await asyncio.wait(writes.values())
+            raise
+        finally:
+            self._settle(pending, by_guild, writes)
+        
+        self.flushes += 1
+        self._evict_idle()
+    
+    def _settle(
+        self,
+        pending: Dict[Key, _Delta],
+        by_guild: Dict[int, List[tuple]],
+        writes: Dict[int, asyncio.Future]
+    ):
+        """Compte les écritures réussies et remet en attente les gains des autres"""
+        for guild_id, write in writes.items():
+            if not write.done():
+                # Flush annulé deux fois : l'écriture est abandonnée, ses gains gardés
+                write.cancel()
+                self._requeue(pending, guild_id)
+            elif write.cancelled() or write.exception() is not None:
+                error = "annulée" if write.cancelled() else write.exception()
+                logger.error(f"Écriture de l'XP du serveur {guild_id} échouée: {error}")
+                self._requeue(pending, guild_id)
+            else:
+                self.rows_written += len(by_guild[guild_id])
+                self._publish(guild_id, by_guild[guild_id])
+    
+    async def _write(self, guild_id: int, rows: List[tuple], daily: List[tuple]):
+        """Totaux et cumuls journaliers d'un serveur, validés ensemble"""
+        async with self.db.transaction(guild_id):
+            await self.db.users.add_xp_many(guild_id, rows)
+            if daily:
+                await self.db.xp_rollups.add_daily_many(guild_id, daily)
+    
+    def _publish(self, guild_id: int, rows: List[tuple]):
+        """Reporte les totaux écrits dans le classement en mémoire"""
+        totals = (self._totals.get((guild_id, row[1])) for row in rows)
+        self.db.leaderboard.apply(
+            guild_id,
+            [(member.user_id, member.xp, member.level) for member in totals if member is not None]
+        )
+    
+    def _requeue(self, pending: Dict[Key, _Delta], guild_id: int):
+        """Remet en attente les gains d'un serveur dont l'écriture a échoué"""
+        for key, delta in pending.items():
+            if key[0] != guild_id:
+                continue
+            
+            current = self._pending.get(key)
+            if current is None:
+                self._pending[key] = delta
+                continue
+            current.xp += delta.xp
+            current.messages += delta.messages
+            current.level = max(current.level, delta.level)
+            current.last_message = current.last_message or delta.last_message
+            for day, xp in delta.days.items():
+                current.add_day(day, xp)
+    
+    def _evict_idle(self):
+        """Oublie les membres inactifs dont tous les gains sont écrits"""
+        deadline = time.monotonic() - self.idle_ttl
+        idle = [
+            key for key, seen in self._last_seen.items()
+            if seen < deadline and key not in self._pending
+        ]
+        for key in idle:
+            del self._last_seen[key]
+            self._totals.pop(key, None)
+    
+    async def invalidate(self, guild_id: int, user_id: Optional[int] = None):
+        """
+        Écrit les gains en attente puis oublie les totaux en mémoire (d'un
+        membre ou de tout un serveur)
+        
+        À appeler avant de modifier directement la table users.
+        """
+        await self.flush()
+        self._forget(guild_id, user_id)
+    
+    def _forget(self, guild_id: int, user_id: Optional[int] = None):
+        """Oublie les totaux en mémoire d'un membre ou de tout un serveur"""
+        keys = [
+            key for key in self._totals
+            if key[0] == guild_id and (user_id is None or key[1] == user_id)
+        ]
+        for key in keys:
+            del self._totals[key]
+            self._last_seen.pop(key, None)
+    
+    @asynccontextmanager
+    async def exclusive(self, guild_id: int) -> AsyncIterator[None]:
+        """
+        Modification ensembliste des niveaux d'un serveur (fin de saison,
+        recalcul après changement de courbe)
+        
+        Le verrou d'écriture est tenu pendant tout le bloc : les gains en
+        attente sont écrits avant, aucun lot ne part pendant. Les gains
+        arrivés pendant le bloc gardent leur XP mais perdent leur niveau,
+        calculé sur des totaux d'avant la modification, que MAX(level)
+        rétablirait. Ils sont écrits en sortie, puis les totaux du serveur
+        sont oubliés.
+        
+        Usage:
+            async with db.xp.exclusive(guild_id):
+                await db.users.recompute_levels(guild_id, curve)
+        """
+        async with self._flush_lock:
+            await self._flush_pending()
+            try:
+                yield
+            finally:
+                for key, delta in self._pending.items():
+                    if key[0] == guild_id:
+                        delta.level = 0
+                await self._flush_pending()
+                self._forget(guild_id)
+    
+    async def _run(self):
+        """Boucle d'écriture périodique, jusqu'à close()"""
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.flush_interval)
+                break  # close() écrit le dernier lot
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Erreur lors de l'écriture de l'XP: {e}")
+    
+    def stats(self) -> dict:
+        """Taille de la mémoire et volume d'écritures"""
+        return {
+            "members": len(self._totals),
+            "pending": len(self._pending),
+            "gains": self.gains,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+        }
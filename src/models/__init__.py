@@ -3,11 +3,11 @@ Modèles de données SQLAlchemy.
 Ces classes représentent les tables de la base de données.
 """
 
-from .guild import GuildConfig, GuildStats, GuildLog
-from .user import User, UserStats, UserEconomy
-from .ticket import Ticket, TicketMessage, TicketCategory
-# from .leveling import LevelConfig, LevelReward
-from .economy import ShopItem, Transaction, InventoryItem
+from .guild import Guild
+from .user import User
+from .ticket import Ticket, TicketStatus, TicketConfig
+from .leveling import LevelConfig, LevelReward
+from .economy import EconomyUser, ShopItem, Transaction, TransactionType
 
 # Importations de base SQLAlchemy
 from sqlalchemy.ext.declarative import declarative_base
@@ -18,11 +18,11 @@ Base = declarative_base()
 
 # Tous les modèles disponibles
 MODEL_CLASSES = [
-    GuildConfig, GuildStats, GuildLog,
-    User, UserStats, UserEconomy,
-    Ticket, TicketMessage, TicketCategory,
-    # LevelConfig, LevelReward,
-    ShopItem, Transaction, InventoryItem
+    Guild,
+    User,
+    Ticket, TicketConfig,
+    LevelConfig, LevelReward,
+    EconomyUser, ShopItem, Transaction
 ]
 
 # Fonctions utilitaires
@@ -38,11 +38,11 @@ def get_all_tables():
 __all__ = [
     "Base",
     # Modèles
-    "GuildConfig", "GuildStats", "GuildLog",
-    "User", "UserStats", "UserEconomy",
-    "Ticket", "TicketMessage", "TicketCategory",
+    "Guild",
+    "User",
+    "Ticket", "TicketStatus", "TicketConfig",
     "LevelConfig", "LevelReward",
-    "ShopItem", "Transaction", "InventoryItem",
+    "EconomyUser", "ShopItem", "Transaction", "TransactionType",
     # Utilitaires
     "MODEL_CLASSES", "get_model_by_name", "get_all_tables"
 ]
\ No newline at end of file
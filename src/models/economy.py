@@ -2,6 +2,7 @@
 Model for Economy system (coins, inventory, shop)
 """
 from datetime import datetime
+from enum import Enum
 from typing import Optional, Dict, Any, List
 
 
@@ -148,4 +149,79 @@ class ShopItem:
         return cls(**data)
     
     def __repr__(self):
-        return f"<ShopItem {self.name} price={self.price}>"
\ No newline at end of file
+        return f"<ShopItem {self.name} price={self.price}>"
+
+
+class TransactionType(Enum):
+    """Kind of a ledger entry (what moved the wallet)"""
+    DAILY = "daily"
+    DEPOSIT = "deposit"
+    WITHDRAW = "withdraw"
+    TRANSFER_IN = "transfer_in"
+    TRANSFER_OUT = "transfer_out"
+    SHOP_PURCHASE = "shop_purchase"
+    SHOP_REFUND = "shop_refund"
+    LOOTBOX = "lootbox"
+    CASINO_BET = "casino_bet"
+    CASINO_PAYOUT = "casino_payout"
+    ADMIN_ADJUST = "admin_adjust"
+
+
+class Transaction:
+    """
+    An append-only ledger entry
+    
+    ``amount`` is signed (negative when coins leave the wallet) and
+    ``balance_after`` is the wallet balance once the entry is applied.
+    """
+    
+    def __init__(
+        self,
+        entry_id: int,
+        guild_id: int,
+        user_id: int,
+        type: str,
+        amount: int,
+        balance_after: int,
+        counterparty_id: Optional[int] = None,
+        reference: Optional[str] = None,
+        created_at: Optional[datetime] = None
+    ):
+        self.entry_id = entry_id
+        self.guild_id = guild_id
+        self.user_id = user_id
+        self.type = TransactionType(type)
+        self.amount = amount
+        self.balance_after = balance_after
+        self.counterparty_id = counterparty_id
+        self.reference = reference
+        self.created_at = created_at or datetime.utcnow()
+    
+    @property
+    def is_credit(self) -> bool:
+        """True when coins entered the wallet"""
+        return self.amount > 0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return {
+            "entry_id": self.entry_id,
+            "guild_id": self.guild_id,
+            "user_id": self.user_id,
+            "type": self.type.value,
+            "amount": self.amount,
+            "balance_after": self.balance_after,
+            "counterparty_id": self.counterparty_id,
+            "reference": self.reference,
+            "created_at": self.created_at.isoformat() if self.created_at else None
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Transaction':
+        """Create from dictionary"""
+        if isinstance(data.get('created_at'), str):
+            data['created_at'] = datetime.fromisoformat(data['created_at'])
+        return cls(**data)
+    
+    def __repr__(self):
+        return f"<Transaction {self.type.value} user_id={self.user_id} amount={self.amount}>"
@@ -0,0 +1,77 @@
+"""
+Models for level-reward roles
+"""
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+
+class LevelReward:
+    """A role granted when a member reaches a level"""
+    
+    __slots__ = ("guild_id", "level", "role_id")
+    
+    def __init__(self, guild_id: int, level: int, role_id: int):
+        self.guild_id = guild_id
+        self.level = level
+        self.role_id = role_id
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert reward to dictionary"""
+        return {"guild_id": self.guild_id, "level": self.level, "role_id": self.role_id}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LevelReward':
+        """Create LevelReward from dictionary"""
+        return cls(**data)
+    
+    def __repr__(self):
+        return f"<LevelReward guild_id={self.guild_id} level={self.level} role_id={self.role_id}>"
+
+
+class LevelConfig:
+    """
+    Reward roles of a guild, precomputed as a sorted threshold list.
+    
+    Rewards stack: a member at level L is expected to hold the role of
+    every reward with ``level <= L``. Lookups are binary searches over
+    ``levels``, so they cost O(log n) whatever the number of rewards.
+    """
+    
+    def __init__(self, guild_id: int, rewards: Iterable[LevelReward] = ()):
+        self.guild_id = guild_id
+        ordered = sorted(rewards, key=lambda reward: reward.level)
+        self.levels: List[int] = [reward.level for reward in ordered]
+        self.role_ids: List[int] = [reward.role_id for reward in ordered]
+        self.reward_role_ids: Set[int] = set(self.role_ids)
+    
+    def __len__(self) -> int:
+        return len(self.levels)
+    
+    @property
+    def rewards(self) -> List[LevelReward]:
+        return [LevelReward(self.guild_id, level, role_id) for level, role_id in zip(self.levels, self.role_ids)]
+    
+    def role_for(self, level: int) -> Optional[int]:
+        """Highest reward role reached at ``level`` (None below the first threshold)"""
+        index = bisect_right(self.levels, level)
+        return self.role_ids[index - 1] if index else None
+    
+    def roles_up_to(self, level: int) -> Set[int]:
+        """Every reward role a member at ``level`` should hold"""
+        return set(self.role_ids[:bisect_right(self.levels, level)])
+    
+    def roles_between(self, old_level: int, new_level: int) -> List[int]:
+        """Reward roles unlocked when going from ``old_level`` to ``new_level``"""
+        return self.role_ids[bisect_right(self.levels, old_level):bisect_right(self.levels, new_level)]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert config to dictionary"""
+        return {"guild_id": self.guild_id, "rewards": [reward.to_dict() for reward in self.rewards]}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LevelConfig':
+        """Create LevelConfig from dictionary"""
+        return cls(data["guild_id"], [LevelReward.from_dict(reward) for reward in data.get("rewards", [])])
+    
+    def __repr__(self):
+        return f"<LevelConfig guild_id={self.guild_id} rewards={len(self)}>"
@@ -1,6 +1,8 @@
 """
 Utilities package
 """
+from .cooldowns import CooldownStore
+from .locks import StripedLocks
 from .converters import MemberOrUser, TimeConverter, EmojiConverter, ChannelOrThread, RoleOrMember
 from .helpers import (
     clean_prefix, format_time, format_number, truncate_string,
@@ -22,6 +24,10 @@ from .time_utils import (
 )
 
 __all__ = [
+    # Cooldowns
+    'CooldownStore',
+    # Locks
+    'StripedLocks',
     # Converters
     'MemberOrUser', 'TimeConverter', 'EmojiConverter', 'ChannelOrThread', 'RoleOrMember',
     # Helpers
@@ -0,0 +1,128 @@
+"""
+Bounded cooldown store on a monotonic clock
+"""
+import time
+from itertools import islice
+from typing import Callable, Dict, Hashable, Tuple
+
+CooldownKey = Tuple[int, ...]
+
+
+class CooldownStore:
+    """
+    Per-key cooldowns with a fixed duration, e.g. keyed by (user_id, guild_id).
+    
+    Entries are kept in expiry order (every store shares the same duration,
+    so re-inserting a key moves it to the end). Expired entries are swept
+    in bulk from the front at most every ``sweep_interval`` seconds, and the
+    oldest entries are dropped once ``max_size`` is reached, so memory stays
+    bounded whatever the number of users.
+    """
+    
+    def __init__(
+        self,
+        duration: float,
+        max_size: int = 100_000,
+        sweep_interval: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            duration: Cooldown length in seconds
+            max_size: Hard cap on the number of tracked keys
+            sweep_interval: Minimum seconds between two sweeps of expired keys
+            clock: Monotonic time source (seconds)
+        """
+        self.duration = duration
+        self.max_size = max(1, max_size)
+        self.sweep_interval = sweep_interval
+        self._clock = clock
+        
+        self._expiries: Dict[Hashable, float] = {}
+        self._next_sweep = clock() + sweep_interval
+        
+        # Metrics
+        self.hits = 0  # Calls rejected because the key was cooling down
+        self.misses = 0  # Calls allowed
+        self.expired = 0  # Keys removed by sweeps
+        self.evicted = 0  # Keys dropped early because of max_size
+    
+    def __len__(self) -> int:
+        return len(self._expiries)
+    
+    def __contains__(self, key: CooldownKey) -> bool:
+        return self.remaining(key) > 0
+    
+    def try_acquire(self, key: CooldownKey) -> bool:
+        """
+        Start the cooldown for ``key`` unless it is already running
+        
+        Returns:
+            bool: True if the action is allowed, False if still cooling down
+        """
+        now = self._clock()
+        if now >= self._next_sweep:
+            self._sweep(now)
+        
+        expiry = self._expiries.get(key)
+        if expiry is not None and expiry > now:
+            self.hits += 1
+            return False
+        
+        self.misses += 1
+        if expiry is not None:
+            # Re-insert to keep the dict ordered by expiry
+            del self._expiries[key]
+        elif len(self._expiries) >= self.max_size:
+            self._evict_oldest(now)
+        self._expiries[key] = now + self.duration
+        return True
+    
+    def remaining(self, key: CooldownKey) -> float:
+        """Seconds left before ``key`` can act again (0 if not cooling down)"""
+        expiry = self._expiries.get(key)
+        if expiry is None:
+            return 0.0
+        return max(0.0, expiry - self._clock())
+    
+    def reset(self, key: CooldownKey):
+        """Cancel the cooldown of ``key``"""
+        self._expiries.pop(key, None)
+    
+    def clear(self):
+        """Forget every cooldown"""
+        self._expiries.clear()
+    
+    def _sweep(self, now: float):
+        """Drop every expired key (they all sit at the front)"""
+        expired = 0
+        for key, expiry in self._expiries.items():
+            if expiry > now:
+                break
+            expired += 1
+        
+        if expired:
+            for key in list(islice(self._expiries, expired)):
+                del self._expiries[key]
+            self.expired += expired
+        self._next_sweep = now + self.sweep_interval
+    
+    def _evict_oldest(self, now: float):
+        """Make room for one key: sweep, then drop the oldest entry if still full"""
+        self._sweep(now)
+        if len(self._expiries) >= self.max_size:
+            del self._expiries[next(iter(self._expiries))]
+            self.evicted += 1
+    
+    def stats(self) -> dict:
+        """Hit/miss counters and current size"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._expiries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
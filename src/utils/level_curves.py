@@ -0,0 +1,115 @@
+"""
+Level curves compiled into threshold arrays
+
+A curve is described by a short spec string stored per guild:
+    quadratic          level = floor(sqrt(xp / 100))   (default)
+    quadratic:250      same shape with a custom factor
+    mee6               5*l^2 + 50*l + 100 XP from level l to l+1
+    table:100,300,600  explicit cumulative XP for levels 1, 2, 3...
+                       (past the table, the last step repeats)
+"""
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Callable, List, Optional
+
+DEFAULT_CURVE = "quadratic"
+MAX_LEVEL = 1000
+
+
+class LevelCurve:
+    """Cumulative XP thresholds: ``thresholds[level]`` is the XP needed to reach ``level``"""
+    
+    __slots__ = ("spec", "thresholds")
+    
+    def __init__(self, spec: str, thresholds: List[int]):
+        if not thresholds or thresholds[0] != 0:
+            raise ValueError("A level curve must start at 0 XP")
+        if any(b <= a for a, b in zip(thresholds, thresholds[1:])):
+            raise ValueError("Level thresholds must be strictly increasing")
+        self.spec = spec
+        self.thresholds = thresholds
+    
+    @property
+    def max_level(self) -> int:
+        """Highest level the curve can return"""
+        return len(self.thresholds) - 1
+    
+    def level_for(self, xp: int) -> int:
+        """Level reached with ``xp`` total XP (binary search)"""
+        return max(0, bisect_right(self.thresholds, xp) - 1)
+    
+    def xp_for(self, level: int) -> int:
+        """Total XP needed to reach ``level``"""
+        if level <= 0:
+            return 0
+        return self.thresholds[min(level, self.max_level)]
+    
+    def thresholds_up_to(self, xp: int) -> List[int]:
+        """Thresholds of every level reachable with at most ``xp``"""
+        return self.thresholds[:self.level_for(xp) + 1]
+    
+    def __repr__(self) -> str:
+        return f"LevelCurve({self.spec!r}, max_level={self.max_level})"
+
+
+def _cumulative(step: Callable[[int], int], max_level: int) -> List[int]:
+    """Thresholds from the XP needed to go from level l to l+1"""
+    thresholds = [0]
+    for level in range(max_level):
+        thresholds.append(thresholds[-1] + step(level))
+    return thresholds
+
+
+def _quadratic(factor: int, max_level: int) -> List[int]:
+    return [factor * level * level for level in range(max_level + 1)]
+
+
+def _mee6(max_level: int) -> List[int]:
+    return _cumulative(lambda level: 5 * level * level + 50 * level + 100, max_level)
+
+
+def _table(values: List[int], max_level: int) -> List[int]:
+    thresholds = [0] + values
+    step = thresholds[-1] - thresholds[-2]
+    while len(thresholds) <= max_level:
+        thresholds.append(thresholds[-1] + step)
+    return thresholds
+
+
+def _parse_ints(raw: str) -> List[int]:
+    try:
+        return [int(value) for value in raw.replace(" ", "").split(",") if value]
+    except ValueError as e:
+        raise ValueError(f"Invalid number in level curve: {raw!r}") from e
+
+
+@lru_cache(maxsize=64)
+def parse_curve(spec: Optional[str], max_level: int = MAX_LEVEL) -> LevelCurve:
+    """
+    Compile a curve spec (cached: guilds sharing a spec share the arrays)
+    
+    Raises:
+        ValueError: If the spec is unknown or malformed
+    """
+    spec = (spec or DEFAULT_CURVE).strip().lower()
+    kind, _, argument = spec.partition(":")
+    
+    if kind == "quadratic":
+        values = _parse_ints(argument)
+        factor = values[0] if values else 100
+        if factor <= 0:
+            raise ValueError("The quadratic factor must be positive")
+        return LevelCurve(spec, _quadratic(factor, max_level))
+    
+    if kind == "mee6":
+        return LevelCurve(spec, _mee6(max_level))
+    
+    if kind == "table":
+        values = _parse_ints(argument)
+        if not values:
+            raise ValueError("A table curve needs at least one threshold")
+        if len(values) == 1:
+            values = [values[0], values[0] * 2]
+        return LevelCurve(spec, _table(values, max_level))
+    
+    raise ValueError(f"Unknown level curve: {kind!r}")
@@ -0,0 +1,93 @@
+"""
+Striped asyncio locks keyed by account
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Hashable, List
+
+
+class StripedLocks:
+    """
+    A fixed pool of ``asyncio.Lock`` shared by hashing keys onto stripes.
+    
+    Memory does not grow with the number of keys: two keys on the same
+    stripe simply serialize each other. ``acquire`` takes every stripe of
+    its keys in ascending stripe order, so two tasks locking the same
+    accounts in a different order (A -> B and B -> A) cannot deadlock, and
+    keys sharing a stripe only lock it once.
+    
+    Locks are not reentrant: code holding a key must not acquire it again.
+    """
+    
+    def __init__(self, stripes: int = 256, clock: Callable[[], float] = time.perf_counter):
+        """
+        Args:
+            stripes: Number of locks in the pool
+            clock: Time source used to measure waits (seconds)
+        """
+        self.stripes = max(1, stripes)
+        self._locks = [asyncio.Lock() for _ in range(self.stripes)]
+        self._clock = clock
+        
+        # Metrics
+        self.acquisitions = 0
+        self.contended = 0  # Acquisitions that had to wait for another holder
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._stripe_contention = [0] * self.stripes
+    
+    def stripe_of(self, key: Hashable) -> int:
+        """Index of the lock guarding ``key``"""
+        return hash(key) % self.stripes
+    
+    def locked(self, key: Hashable) -> bool:
+        """True if the stripe of ``key`` is currently held"""
+        return self._locks[self.stripe_of(key)].locked()
+    
+    @asynccontextmanager
+    async def acquire(self, *keys: Hashable) -> AsyncIterator[None]:
+        """
+        Hold the locks of every key for the duration of the block
+        
+        Usage:
+            async with locks.acquire((guild_id, sender_id), (guild_id, receiver_id)):
+                ...
+        """
+        stripes = sorted({self.stripe_of(key) for key in keys})
+        held: List[asyncio.Lock] = []
+        started = self._clock()
+        waited = False
+        try:
+            for index in stripes:
+                lock = self._locks[index]
+                if lock.locked():
+                    waited = True
+                    self._stripe_contention[index] += 1
+                await lock.acquire()
+                held.append(lock)
+            
+            wait = self._clock() - started
+            self.acquisitions += 1
+            if waited:
+                self.contended += 1
+                self.wait_total += wait
+                self.wait_max = max(self.wait_max, wait)
+            yield
+        finally:
+            for lock in reversed(held):
+                lock.release()
+    
+    def stats(self) -> dict:
+        busiest = max(range(self.stripes), key=self._stripe_contention.__getitem__)
+        return {
+            "stripes": self.stripes,
+            "held": sum(lock.locked() for lock in self._locks),
+            "acquisitions": self.acquisitions,
+            "contended": self.contended,
+            "contention_rate": round(self.contended / self.acquisitions, 4) if self.acquisitions else 0.0,
+            "avg_wait_ms": round(self.wait_total / self.contended * 1000, 3) if self.contended else 0.0,
+            "max_wait_ms": round(self.wait_max * 1000, 3),
+            "busiest_stripe": busiest,
+            "busiest_stripe_contended": self._stripe_contention[busiest],
+        }
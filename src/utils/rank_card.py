@@ -0,0 +1,100 @@
+"""
+Rank card rendering with Pillow
+
+``render_rank_card`` is a plain top-level function working on bytes so it
+can run in a ProcessPoolExecutor. Pillow is optional: check
+``PIL_AVAILABLE`` before submitting work.
+"""
+import io
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+    PIL_AVAILABLE = True
+except ImportError:  # Optional: /rank falls back to a text embed
+    Image = ImageDraw = ImageFont = None
+    PIL_AVAILABLE = False
+
+CARD_SIZE = (900, 260)
+AVATAR_SIZE = 180
+RING_WIDTH = 12
+
+BACKGROUND = (35, 39, 42)
+TRACK = (72, 75, 78)
+TEXT = (255, 255, 255)
+MUTED = (185, 187, 190)
+
+
+@dataclass(frozen=True)
+class RankCardData:
+    """Everything drawn on a card (picklable)"""
+    display_name: str
+    level: int
+    progress: float  # 0.0 - 1.0 towards the next level
+    rank: Optional[int]
+    avatar: Optional[bytes] = None
+    accent: Tuple[int, int, int] = (88, 101, 242)
+
+
+def _font(size: int):
+    """DejaVu if installed (most distros ship it), Pillow's default otherwise"""
+    try:
+        return ImageFont.truetype("DejaVuSans-Bold.ttf", size)
+    except OSError:
+        return ImageFont.load_default()
+
+
+def _circle_avatar(raw: Optional[bytes], size: int):
+    """Avatar cropped to a circle (grey disc when missing or unreadable)"""
+    mask = Image.new("L", (size, size), 0)
+    ImageDraw.Draw(mask).ellipse((0, 0, size - 1, size - 1), fill=255)
+    
+    avatar = None
+    if raw:
+        try:
+            avatar = Image.open(io.BytesIO(raw)).convert("RGBA").resize((size, size), Image.LANCZOS)
+        except Exception:
+            avatar = None
+    if avatar is None:
+        avatar = Image.new("RGBA", (size, size), TRACK)
+    
+    avatar.putalpha(mask)
+    return avatar
+
+
+def render_rank_card(data: RankCardData) -> bytes:
+    """Draw the card and return it as PNG bytes"""
+    if not PIL_AVAILABLE:
+        raise RuntimeError("Pillow is not installed")
+    
+    card = Image.new("RGBA", CARD_SIZE, BACKGROUND)
+    draw = ImageDraw.Draw(card)
+    
+    # Progress ring around the avatar
+    margin = (CARD_SIZE[1] - AVATAR_SIZE) // 2
+    ring_box = (
+        margin - RING_WIDTH, margin - RING_WIDTH,
+        margin + AVATAR_SIZE + RING_WIDTH, margin + AVATAR_SIZE + RING_WIDTH
+    )
+    draw.ellipse(ring_box, outline=TRACK, width=RING_WIDTH)
+    progress = min(max(data.progress, 0.0), 1.0)
+    if progress > 0:
+        draw.arc(ring_box, start=-90, end=-90 + 360 * progress, fill=data.accent, width=RING_WIDTH)
+    card.alpha_composite(_circle_avatar(data.avatar, AVATAR_SIZE), (margin, margin))
+    
+    # Text block
+    left = margin * 2 + AVATAR_SIZE + RING_WIDTH
+    name = data.display_name if len(data.display_name) <= 22 else data.display_name[:21] + "…"
+    draw.text((left, 50), name, font=_font(44), fill=TEXT)
+    draw.text((left, 120), f"Niveau {data.level}", font=_font(34), fill=data.accent)
+    
+    rank = f"Rang #{data.rank}" if data.rank else "Non classé"
+    draw.text((left, 170), rank, font=_font(28), fill=MUTED)
+    
+    percent = f"{progress * 100:.0f}%"
+    draw.text((CARD_SIZE[0] - 40, 170), percent, font=_font(28), fill=MUTED, anchor="ra")
+    
+    buffer = io.BytesIO()
+    card.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
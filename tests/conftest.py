@@ -0,0 +1,72 @@
+"""
+Fixtures pytest communes
+"""
+import os
+import sys
+
+import pytest
+import pytest_asyncio
+
+# Les modules du bot s'importent depuis src (core, cogs, utils...)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from core.database import DatabaseManager  # noqa: E402
+from core.db_backends import parse_database_url  # noqa: E402
+
+# Base PostgreSQL dédiée aux tests : son schéma public est vidé à chaque test
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "postgres: test lancé contre PostgreSQL (TEST_POSTGRES_URL)")
+
+
+async def _reset_postgres(url: str):
+    """Repart d'un schéma vide : chaque test rejoue toutes les migrations"""
+    import asyncpg
+    
+    _, dsn = parse_database_url(url)
+    connection = await asyncpg.connect(dsn)
+    try:
+        await connection.execute("DROP SCHEMA public CASCADE; CREATE SCHEMA public")
+    finally:
+        await connection.close()
+
+
+@pytest_asyncio.fixture
+async def sqlite_db():
+    """Base SQLite en mémoire, migrée et connectée (file d'écriture, lecteur unique)"""
+    manager = DatabaseManager("sqlite:///:memory:", maintenance_interval=0)
+    await manager.connect()
+    yield manager
+    await manager.close()
+
+
+@pytest_asyncio.fixture
+async def file_db(tmp_path):
+    """Base SQLite sur disque : écrivain et lecteurs séparés"""
+    manager = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}", maintenance_interval=0)
+    await manager.connect()
+    yield manager
+    await manager.close()
+
+
+@pytest_asyncio.fixture(params=[
+    "sqlite",
+    pytest.param("postgres", marks=[
+        pytest.mark.postgres,
+        pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL non défini"),
+    ]),
+])
+async def db(request):
+    """Base migrée sur chaque backend : SQLite en mémoire toujours, PostgreSQL si configuré"""
+    if request.param == "postgres":
+        await _reset_postgres(POSTGRES_URL)
+        url = POSTGRES_URL
+    else:
+        url = "sqlite:///:memory:"
+    
+    manager = DatabaseManager(url, maintenance_interval=0)
+    await manager.connect()
+    yield manager
+    await manager.close()
@@ -0,0 +1,65 @@
+"""
+Tests des sauvegardes à chaud SQLite (BackupManager)
+"""
+import gzip
+import shutil
+import sqlite3
+
+import pytest
+
+from core.database import DatabaseManager
+from core.db_backup import BackupError, BackupManager, verify_backup
+
+GUILD_ID = 1
+
+
+@pytest.mark.asyncio
+async def test_backup_restores_the_live_database(tmp_path):
+    db = DatabaseManager(
+        f"sqlite:///{tmp_path / 'bot.db'}",
+        maintenance_interval=0,
+        backup_dir=str(tmp_path / "backups")
+    )
+    await db.connect()
+    try:
+        await db.economy.credit(GUILD_ID, 1, 10)
+        (backup,) = await db.backup()
+    finally:
+        await db.close()
+
+    assert backup.name.endswith(".db.gz")
+    verify_backup(backup)
+
+    restored = tmp_path / "restored.db"
+    with gzip.open(backup, "rb") as source, open(restored, "wb") as target:
+        shutil.copyfileobj(source, target)
+    connection = sqlite3.connect(restored)
+    try:
+        assert connection.execute("SELECT balance FROM economy WHERE user_id = 1").fetchone() == (110,)
+    finally:
+        connection.close()
+
+
+def test_corrupt_backup_is_rejected(tmp_path):
+    broken = tmp_path / "bot-20240101-000000.db"
+    broken.write_bytes(b"pas une base SQLite" * 100)
+    with pytest.raises(BackupError):
+        verify_backup(broken)
+
+
+def test_rotate_keeps_the_newest_backups_of_each_file(tmp_path):
+    manager = BackupManager(str(tmp_path), keep=2)
+    stamps = ["20240101-000000", "20240102-000000", "20240103-000000"]
+    for stamp in stamps:
+        (tmp_path / f"bot-{stamp}.db.gz").touch()
+    # Autre fichier de base (catalogue de shards) : sa rotation est séparée
+    (tmp_path / "bot.catalog-20240101-000000.db.gz").touch()
+
+    removed = manager._rotate("bot")
+
+    assert [path.name for path in removed] == ["bot-20240101-000000.db.gz"]
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "bot-20240102-000000.db.gz",
+        "bot-20240103-000000.db.gz",
+        "bot.catalog-20240101-000000.db.gz",
+    ]
@@ -0,0 +1,61 @@
+"""
+Tests of the bounded cooldown store
+"""
+from utils.cooldowns import CooldownStore
+
+
+class FakeClock:
+    """Monotonic clock moved by hand"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_cooldown_expires_after_its_duration():
+    clock = FakeClock()
+    store = CooldownStore(60, clock=clock)
+
+    assert store.try_acquire((1, 1))
+    assert not store.try_acquire((1, 1))
+    assert store.remaining((1, 1)) == 60
+
+    clock.now += 59.5
+    assert (1, 1) in store
+    assert not store.try_acquire((1, 1))
+
+    clock.now += 0.5
+    assert (1, 1) not in store
+    assert store.try_acquire((1, 1))
+    assert store.stats()["hits"] == 2
+
+
+def test_sweep_drops_expired_keys_in_bulk():
+    clock = FakeClock()
+    store = CooldownStore(60, sweep_interval=30, clock=clock)
+    for user_id in range(5):
+        store.try_acquire((user_id, 1))
+
+    clock.now += 45
+    store.try_acquire((99, 1))  # Sweep due, nothing expired yet
+    assert len(store) == 6
+
+    clock.now += 30
+    store.try_acquire((100, 1))
+    assert len(store) == 2
+    assert store.expired == 5
+
+
+def test_max_size_evicts_the_oldest_cooldown():
+    clock = FakeClock()
+    store = CooldownStore(60, max_size=2, clock=clock)
+    store.try_acquire((1, 1))
+    clock.now += 1
+    store.try_acquire((2, 1))
+    store.try_acquire((3, 1))
+
+    assert len(store) == 2
+    assert store.evicted == 1
+    assert (1, 1) not in store and (3, 1) in store
@@ -0,0 +1,167 @@
+"""
+Tests de la couche base de données : file d'écriture et transactions
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+GUILD_ID = 1
+
+
+async def balance(db, user_id: int) -> int:
+    row = await db.fetchone(
+        "SELECT balance FROM economy WHERE guild_id = ? AND user_id = ?",
+        (GUILD_ID, user_id),
+        guild_id=GUILD_ID
+    )
+    return row[0] if row else None
+
+
+# ==================== FILE D'ÉCRITURE ====================
+
+@pytest.mark.asyncio
+async def test_write_queue_commits_concurrent_writes_together(sqlite_db):
+    writes = sqlite_db.backend.writes
+    await asyncio.gather(*(sqlite_db.economy.credit(GUILD_ID, user_id, 10) for user_id in range(50)))
+
+    assert writes.statements == 50
+    assert writes.batches < 50
+    assert await balance(sqlite_db, 49) == 110
+
+
+@pytest.mark.asyncio
+async def test_write_queue_failing_write_only_rolls_back_itself(sqlite_db):
+    sql = "INSERT INTO guilds (guild_id) VALUES (?)"
+    results = await asyncio.gather(
+        sqlite_db.execute(sql, (10,), guild_id=GUILD_ID),
+        sqlite_db.execute(sql, (10,), guild_id=GUILD_ID),  # Clé déjà prise dans le même lot
+        sqlite_db.execute(sql, (11,), guild_id=GUILD_ID),
+        return_exceptions=True
+    )
+
+    assert sqlite_db.backend.writes.batches == 1
+    assert results[0] == 1 and results[2] == 1
+    assert isinstance(results[1], Exception)
+    rows = await sqlite_db.fetchall("SELECT guild_id FROM guilds ORDER BY guild_id", guild_id=GUILD_ID)
+    assert rows == [(10,), (11,)]
+
+
+@pytest.mark.asyncio
+async def test_write_is_visible_to_readers_after_commit(file_db):
+    await file_db.write(
+        "INSERT INTO guilds (guild_id) VALUES (?)", (GUILD_ID,), guild_id=GUILD_ID
+    )
+    assert await file_db.guilds.get(GUILD_ID) is not None
+
+
+# ==================== TRANSACTIONS ====================
+
+@pytest.mark.asyncio
+async def test_transaction_commits_all_statements(db):
+    async with db.transaction(GUILD_ID):
+        await db.economy.credit(GUILD_ID, 1, 10)
+        await db.economy.credit(GUILD_ID, 2, 20)
+
+    assert await balance(db, 1) == 110
+    assert await balance(db, 2) == 120
+
+
+@pytest.mark.asyncio
+async def test_transaction_rolls_back_on_exception(db):
+    with pytest.raises(RuntimeError):
+        async with db.transaction(GUILD_ID):
+            await db.economy.credit(GUILD_ID, 1, 10)
+            raise RuntimeError
+
+    assert await balance(db, 1) is None
+    assert not db.in_transaction
+
+
+@pytest.mark.asyncio
+async def test_nested_transaction_rolls_back_its_savepoint_only(db):
+    async with db.transaction(GUILD_ID):
+        await db.economy.credit(GUILD_ID, 1, 10)
+        with pytest.raises(RuntimeError):
+            async with db.transaction(GUILD_ID):
+                await db.economy.credit(GUILD_ID, 2, 20)
+                raise RuntimeError
+        await db.economy.credit(GUILD_ID, 3, 30)
+
+    assert await balance(db, 1) == 110
+    assert await balance(db, 2) is None
+    assert await balance(db, 3) == 130
+
+
+@pytest.mark.asyncio
+async def test_transaction_reads_its_own_writes(db):
+    async with db.transaction(GUILD_ID):
+        await db.economy.credit(GUILD_ID, 1, 10)
+        assert await balance(db, 1) == 110
+    assert await balance(db, 1) == 110
+
+
+@pytest.mark.asyncio
+async def test_acquire_read_inside_a_transaction_reuses_its_connection(sqlite_db):
+    async with sqlite_db.transaction(GUILD_ID):
+        await sqlite_db.economy.credit(GUILD_ID, 1, 10)
+        # Sans lecteur dédié, acquire_read ne doit pas redemander l'écrivain
+        async def count():
+            async with sqlite_db.acquire_read(GUILD_ID) as connection:
+                return await connection.execute_fetchall("SELECT COUNT(*) FROM economy")
+
+        rows = await asyncio.wait_for(count(), timeout=5)
+        assert rows[0][0] == 1
+
+
+@pytest.mark.asyncio
+async def test_after_commit_waits_for_commit_and_skips_rollbacks(db):
+    applied = []
+
+    async with db.transaction(GUILD_ID):
+        db.after_commit(lambda: applied.append("outer"), guild_id=GUILD_ID)
+        with pytest.raises(RuntimeError):
+            async with db.transaction(GUILD_ID):
+                db.after_commit(lambda: applied.append("savepoint"), guild_id=GUILD_ID)
+                raise RuntimeError
+        assert applied == []
+    assert applied == ["outer"]
+
+    with pytest.raises(RuntimeError):
+        async with db.transaction(GUILD_ID):
+            db.after_commit(lambda: applied.append("rolled back"), guild_id=GUILD_ID)
+            raise RuntimeError
+    assert applied == ["outer"]
+
+    db.after_commit(lambda: applied.append("now"), guild_id=GUILD_ID)
+    assert applied == ["outer", "now"]
+
+
+@pytest.mark.asyncio
+async def test_ledger_keeps_no_entry_for_rolled_back_movement(db):
+    with pytest.raises(RuntimeError):
+        async with db.transaction(GUILD_ID):
+            balance_after = await db.economy.credit(GUILD_ID, 1, 10)
+            db.ledger.record(GUILD_ID, 1, "casino_payout", 10, balance_after)
+            raise RuntimeError
+
+    assert len(db.ledger) == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_debits_never_overdraw(db):
+    await db.economy.get_or_create(GUILD_ID, 1)  # Solde de départ : 100
+    results = await asyncio.gather(*(db.economy.debit(GUILD_ID, 1, 30) for _ in range(5)))
+
+    assert sorted(result for result in results if result is not None) == [10, 40, 70]
+    assert await balance(db, 1) == 10
+
+
+@pytest.mark.asyncio
+async def test_daily_is_claimed_once(db):
+    now = datetime.utcnow()
+    results = await asyncio.gather(*(db.economy.claim_daily(GUILD_ID, 1, 100, now) for _ in range(3)))
+
+    assert sorted(results, key=lambda result: result is None) == [200, None, None]
+    assert await db.economy.claim_daily(GUILD_ID, 1, 100, now + timedelta(hours=23)) is None
+    assert await db.economy.claim_daily(GUILD_ID, 1, 100, now + timedelta(hours=25)) == 300
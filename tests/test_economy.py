@@ -0,0 +1,119 @@
+"""
+Tests des cogs Economy et Casino contre une vraie base SQLite
+"""
+import asyncio
+
+import pytest
+
+from cogs.casino import Casino
+from cogs.economy import Economy
+from models.economy import TransactionType
+from utils.locks import StripedLocks
+
+GUILD_ID = 1
+
+
+class FakeBot:
+    """Juste ce qu'il faut de bot pour instancier les cogs"""
+
+    def __init__(self, db):
+        self.db = db
+        self.cogs = {}
+
+    def get_cog(self, name: str):
+        return self.cogs.get(name)
+
+
+@pytest.fixture
+def cogs(db):
+    bot = FakeBot(db)
+    economy = Economy(bot)
+    # Une seule stripe : tous les comptes partagent le même verrou
+    economy.locks = StripedLocks(stripes=1)
+    bot.cogs["Economy"] = economy
+    return economy, Casino(bot)
+
+
+@pytest.mark.asyncio
+async def test_casino_settle_races_economy_debit_without_deadlock(db, cogs):
+    economy, casino = cogs
+    await db.economy.get_or_create(GUILD_ID, 1)
+    await db.economy.get_or_create(GUILD_ID, 2)
+
+    # Règlement d'une partie pendant que le même joueur mise à nouveau
+    await asyncio.wait_for(asyncio.gather(
+        casino.pay_out(GUILD_ID, [(1, 50), (2, 50)]),
+        casino.check_and_deduct(1, GUILD_ID, 30),
+        economy.debit(2, GUILD_ID, 30, TransactionType.CASINO_BET),
+    ), timeout=5)
+
+    assert (await db.economy.get(GUILD_ID, 1)).balance == 120
+    assert (await db.economy.get(GUILD_ID, 2)).balance == 120
+
+
+@pytest.mark.asyncio
+async def test_account_locks_are_refused_inside_a_transaction(db, cogs):
+    economy, _ = cogs
+    with pytest.raises(RuntimeError):
+        async with db.transaction(GUILD_ID):
+            await economy.credit(1, GUILD_ID, 10, TransactionType.CASINO_PAYOUT)
+
+
+@pytest.mark.asyncio
+async def test_credit_many_updates_ledger_and_cache_after_commit(db, cogs):
+    economy, _ = cogs
+    await economy.get_balance(1, GUILD_ID)  # Compte en cache
+
+    balances = await economy.credit_many(GUILD_ID, [(1, 10), (2, 20), (1, 5)], TransactionType.CASINO_PAYOUT)
+
+    assert balances == [110, 120, 115]
+    assert economy.accounts.get(GUILD_ID, 1).balance == 115
+    assert len(db.ledger) == 3
+
+
+@pytest.mark.asyncio
+async def test_rolled_back_credit_leaves_cache_and_ledger_untouched(db, cogs):
+    economy, _ = cogs
+    await economy.get_balance(1, GUILD_ID)
+
+    with pytest.raises(RuntimeError):
+        async with db.transaction(GUILD_ID):
+            await economy._credit(1, GUILD_ID, 10, TransactionType.CASINO_PAYOUT)
+            raise RuntimeError
+
+    assert economy.accounts.get(GUILD_ID, 1).balance == 100
+    assert (await db.economy.get(GUILD_ID, 1)).balance == 100
+    assert len(db.ledger) == 0
+
+
+@pytest.mark.asyncio
+async def test_admin_edit_goes_through_the_ledger_and_drops_the_cached_account(db, cogs):
+    economy, _ = cogs
+    await economy.get_balance(1, GUILD_ID)
+    await economy.credit(1, GUILD_ID, 50, TransactionType.CASINO_PAYOUT)
+
+    assert await economy.update_balance(1, GUILD_ID, balance=40, bank=25, reference="admin:9")
+    assert economy.accounts.get(GUILD_ID, 1) is None  # Oublié après le COMMIT
+    assert await economy.get_balance(1, GUILD_ID) == {"balance": 40, "bank": 25, "daily_claimed": None}
+
+    assert await economy.update_balance(1, GUILD_ID, balance=75)
+    await db.ledger.flush()
+    assert await db.ledger_entries.rebuild(GUILD_ID, 1) == 75  # Aucun écart pour /ledgeraudit
+    kinds = [entry.kind for entry in await db.ledger_entries.history(GUILD_ID, 1)]
+    assert kinds.count(TransactionType.ADMIN_ADJUST.value) == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_admin_edit_is_rolled_back(db, cogs, monkeypatch):
+    economy, _ = cogs
+    await economy.get_balance(1, GUILD_ID)
+
+    async def fail(*args, **kwargs):
+        raise RuntimeError("écriture refusée")
+
+    monkeypatch.setattr(db.economy, "update", fail)  # Échec après le débit : ROLLBACK
+
+    assert not await economy.update_balance(1, GUILD_ID, balance=10, bank=5)
+    assert (await db.economy.get(GUILD_ID, 1)).balance == 100
+    assert len(db.ledger) == 0
+    assert economy.accounts.get(GUILD_ID, 1) is None
@@ -0,0 +1,124 @@
+"""
+Tests de l'index de classement en mémoire (SortedKeys, GuildBoard, LeaderboardIndex)
+"""
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from core.leaderboard_index import GuildBoard, LeaderboardIndex, SortedKeys
+
+
+def check_blocks(keys: SortedKeys, load: int):
+    """Blocs non vides, bornés et cohérents avec leurs maximums"""
+    assert all(0 < len(block) <= 2 * load for block in keys._blocks)
+    assert keys._maxes == [block[-1] for block in keys._blocks]
+
+
+def test_sorted_keys_split_and_emptied_blocks():
+    keys = SortedKeys(load=2)
+    for value in range(5):
+        keys.add((value, 0))
+    assert [len(block) for block in keys._blocks] == [2, 3]  # Bloc de 5 > 2 * load : coupé
+
+    for value in (0, 1):
+        keys.remove((value, 0))
+    assert len(keys._blocks) == 1  # Bloc vidé retiré
+    assert keys.slice(0, 10) == [(2, 0), (3, 0), (4, 0)]
+    check_blocks(keys, 2)
+
+
+def test_sorted_keys_match_a_sorted_list():
+    rng = random.Random(14)
+    keys, reference = SortedKeys(load=3), []
+
+    for _ in range(2000):
+        key = (rng.randrange(-50, 0), rng.randrange(20))
+        if key in reference and rng.random() < 0.5:
+            keys.remove(key)
+            reference.remove(key)
+        elif key not in reference:
+            keys.add(key)
+            reference.append(key)
+            reference.sort()
+
+        probe = (rng.randrange(-51, 1), rng.randrange(21))
+        assert keys.bisect_left(probe) == sum(k < probe for k in reference)
+        assert keys.bisect_right(probe) == sum(k <= probe for k in reference)
+        start = rng.randrange(len(reference) + 2)
+        stop = start + rng.randrange(12)
+        assert keys.slice(start, stop) == reference[start:stop]
+
+    assert len(keys) == len(reference)
+    check_blocks(keys, 3)
+
+
+def test_board_pages_ties_by_user_id():
+    board = GuildBoard([(user_id, 100, 1) for user_id in (5, 3, 9, 1)] + [(7, 200, 2)])
+    board.keys = SortedKeys(board.keys.slice(0, len(board)), load=1)  # Égalités à cheval sur des blocs
+
+    first = board.after(None, limit=2)
+    assert [(e.rank, e.user_id) for e in first] == [(1, 7), (2, 1)]
+    rest = board.after((first[-1].xp, first[-1].user_id), limit=10)
+    assert [(e.rank, e.user_id) for e in rest] == [(3, 3), (4, 5), (5, 9)]
+    assert board.rank_of(5) == 4
+
+    board.update(9, 150, 1)
+    assert [e.user_id for e in board.page(0, 10)] == [7, 9, 1, 3, 5]
+
+
+class FakeUsers:
+    """xp_totals qui laisse ``during_read`` s'exécuter pendant la lecture"""
+
+    def __init__(self, totals):
+        self.totals = totals
+        self.during_read = []
+        self.reads = 0
+
+    async def xp_totals(self, guild_id):
+        self.reads += 1
+        if self.during_read:
+            self.during_read.pop(0)()
+        return list(self.totals)
+
+
+@pytest.mark.asyncio
+async def test_load_racing_a_flush_is_retried():
+    users = FakeUsers([(1, 100, 1)])
+    index = LeaderboardIndex(SimpleNamespace(users=users))
+
+    def flush():
+        # Écriture des gains pendant la lecture : la base a changé
+        users.totals = [(1, 150, 1)]
+        index.apply(1, [(1, 150, 1)])
+
+    users.during_read.append(flush)
+    entries = await index.top(1)
+
+    assert [(e.user_id, e.xp) for e in entries] == [(1, 150)]
+    assert index.stats()["loads"] == 2 and index.stats()["stale_loads"] == 1
+    assert (await index.top(1))[0].xp == 150 and users.reads == 2
+
+
+@pytest.mark.asyncio
+async def test_board_still_stale_after_every_attempt_is_not_kept():
+    users = FakeUsers([(1, 100, 1)])
+    index = LeaderboardIndex(SimpleNamespace(users=users))
+    users.during_read.extend([lambda: index.apply(1, [])] * LeaderboardIndex.LOAD_ATTEMPTS)
+
+    await index.top(1)
+    assert index.stats()["guilds"] == 0
+
+    await index.top(1)
+    assert users.reads == LeaderboardIndex.LOAD_ATTEMPTS + 1
+    assert index.stats()["guilds"] == 1
+
+
+@pytest.mark.asyncio
+async def test_preload_stops_at_max_guilds():
+    users = FakeUsers([(1, 100, 1)])
+    index = LeaderboardIndex(SimpleNamespace(users=users), max_guilds=2)
+
+    assert await index.preload([10, 11, 12]) == 2
+    assert await index.preload([10, 11]) == 0
+    assert users.reads == 2
@@ -0,0 +1,77 @@
+"""
+Tests des verrous par compte (StripedLocks)
+"""
+import asyncio
+
+import pytest
+
+from utils.locks import StripedLocks
+
+
+class RecordingLock(asyncio.Lock):
+    """Verrou qui note l'ordre dans lequel les stripes sont prises"""
+
+    def __init__(self, index: int, journal: list):
+        super().__init__()
+        self.index = index
+        self.journal = journal
+
+    async def acquire(self):
+        self.journal.append(self.index)
+        return await super().acquire()
+
+
+@pytest.mark.asyncio
+async def test_stripes_are_taken_in_ascending_order():
+    locks = StripedLocks(stripes=16)
+    journal = []
+    locks._locks = [RecordingLock(index, journal) for index in range(locks.stripes)]
+    keys = [(1, user_id) for user_id in (9, 3, 14, 7)]
+
+    async with locks.acquire(*keys):
+        assert all(locks.locked(key) for key in keys)
+
+    assert journal == sorted({locks.stripe_of(key) for key in keys})
+    assert not any(locks.locked(key) for key in keys)
+
+
+@pytest.mark.asyncio
+async def test_keys_on_the_same_stripe_lock_it_once():
+    locks = StripedLocks(stripes=1)
+    async with locks.acquire((1, 1), (1, 2)):
+        assert locks.stats()["held"] == 1
+
+
+@pytest.mark.asyncio
+async def test_crossed_acquisitions_do_not_deadlock():
+    locks = StripedLocks(stripes=8)
+    a, b = (1, 1), (1, 2)
+
+    async def worker(first, second):
+        for _ in range(200):
+            async with locks.acquire(first, second):
+                await asyncio.sleep(0)
+
+    await asyncio.wait_for(asyncio.gather(worker(a, b), worker(b, a)), timeout=5)
+    assert locks.acquisitions == 400
+
+
+@pytest.mark.asyncio
+async def test_contention_is_counted():
+    locks = StripedLocks(stripes=4)
+    entered = asyncio.Event()
+
+    async def holder():
+        async with locks.acquire("key"):
+            entered.set()
+            await asyncio.sleep(0.01)
+
+    task = asyncio.create_task(holder())
+    await entered.wait()
+    async with locks.acquire("key"):
+        pass
+    await task
+
+    stats = locks.stats()
+    assert stats["contended"] == 1
+    assert stats["busiest_stripe"] == locks.stripe_of("key")
@@ -0,0 +1,42 @@
+"""
+Tests des migrations SQLite depuis l'ancien schéma
+"""
+import aiosqlite
+import pytest
+
+from core.migrations import MIGRATIONS, MigrationRunner, table_columns
+
+
+async def legacy_database(path, users):
+    """Base au schéma historique (version 1) peuplée de ``users``"""
+    connection = await aiosqlite.connect(path)
+    await MigrationRunner(connection, MIGRATIONS["sqlite"][:1]).run()
+    await connection.executemany("INSERT INTO users (user_id, guild_id, xp) VALUES (?, ?, ?)", users)
+    await connection.commit()
+    return connection
+
+
+@pytest.mark.asyncio
+async def test_rows_rejected_by_the_new_schema_are_kept_aside(tmp_path):
+    connection = await legacy_database(tmp_path / "bot.db", [(1, 10, 50), (2, None, 70), (3, 10, 90)])
+    try:
+        applied = await MigrationRunner(connection).run()
+        assert applied[-1] == MIGRATIONS["sqlite"][-1].version
+
+        cursor = await connection.execute("SELECT user_id FROM users ORDER BY user_id")
+        assert await cursor.fetchall() == [(1,), (3,)]
+        # L'utilisateur sans serveur n'a pas disparu
+        cursor = await connection.execute("SELECT user_id, guild_id, xp FROM users_legacy ORDER BY user_id")
+        assert await cursor.fetchall() == [(1, 10, 50), (2, None, 70), (3, 10, 90)]
+    finally:
+        await connection.close()
+
+
+@pytest.mark.asyncio
+async def test_clean_rebuild_keeps_no_legacy_table(tmp_path):
+    connection = await legacy_database(tmp_path / "bot.db", [(1, 10, 50)])
+    try:
+        await MigrationRunner(connection).run()
+        assert await table_columns(connection, "users_legacy") == []
+    finally:
+        await connection.close()
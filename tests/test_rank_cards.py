@@ -0,0 +1,67 @@
+"""
+Tests du cache des cartes de rang (ByteLRU, RankCardRenderer)
+"""
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from core import rank_cards
+from core.rank_cards import ByteLRU, RankCardRenderer
+
+
+def test_byte_lru_evicts_least_recently_read_over_budget():
+    cache = ByteLRU(max_bytes=10)
+    cache.put("a", b"1234")
+    cache.put("b", b"1234")
+    assert cache.get("a") == b"1234"  # "b" devient le moins récent
+
+    cache.put("c", b"1234")
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert (cache.size, cache.evicted) == (8, 1)
+
+
+def test_byte_lru_replacement_and_oversized_values():
+    cache = ByteLRU(max_bytes=10)
+    cache.put("a", b"12345678")
+    cache.put("a", b"12")
+    assert cache.size == 2
+
+    cache.put("big", b"x" * 11)  # Plus grand que le budget : ignoré
+    assert cache.get("big") is None
+    assert len(cache) == 1 and cache.evicted == 0
+
+
+def fake_member(user_id: int = 1):
+    avatar = SimpleNamespace(key="avatar-hash")
+    avatar.replace = lambda **_: SimpleNamespace(url="https://cdn.invalid/avatar.png")
+    return SimpleNamespace(id=user_id, display_name="Membre", display_avatar=avatar)
+
+
+@pytest.mark.asyncio
+async def test_progress_within_a_bucket_reuses_the_rendered_card(monkeypatch):
+    renderer = RankCardRenderer(xp_buckets=10)
+    renderer._pool = ThreadPoolExecutor(max_workers=1)
+    rendered = []
+
+    async def no_avatar(key, url):
+        return None
+
+    def render_rank_card(data):
+        rendered.append(data)
+        return f"carte {data.progress}".encode()
+
+    monkeypatch.setattr(renderer.avatars, "get", no_avatar)
+    monkeypatch.setattr(rank_cards, "render_rank_card", render_rank_card)
+    try:
+        first = await renderer.render(1, fake_member(), 3, 0.51, rank=2)
+        again = await renderer.render(1, fake_member(), 3, 0.58, rank=2)
+        later = await renderer.render(1, fake_member(), 3, 0.61, rank=2)
+    finally:
+        await renderer.close()
+
+    assert first is again
+    assert later != first
+    assert [data.progress for data in rendered] == [0.5, 0.6]
@@ -0,0 +1,101 @@
+"""
+Tests des rôles récompenses : fusion des changements et réconciliation
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from core.role_sync import RoleChange, RoleUpdateQueue, diff_member_roles
+from models.leveling import LevelConfig, LevelReward
+
+GUILD_ID = 1
+BRONZE, SILVER, GOLD, UNMANAGED = 10, 20, 30, 99
+
+
+class FakeMember:
+    """Membre Discord minimal : rôles et appels add_roles/remove_roles"""
+
+    def __init__(self, user_id: int, roles=(), bot: bool = False):
+        self.id = user_id
+        self.bot = bot
+        self.guild = SimpleNamespace(id=GUILD_ID, get_role=lambda role_id: SimpleNamespace(id=role_id))
+        self.roles = [SimpleNamespace(id=role_id) for role_id in roles]
+        self.calls = []
+
+    async def add_roles(self, *roles, reason=None):
+        self.calls.append(("add", sorted(role.id for role in roles)))
+
+    async def remove_roles(self, *roles, reason=None):
+        self.calls.append(("remove", sorted(role.id for role in roles)))
+
+
+@pytest.fixture
+def config():
+    return LevelConfig(GUILD_ID, [
+        LevelReward(GUILD_ID, 5, BRONZE),
+        LevelReward(GUILD_ID, 10, SILVER),
+        LevelReward(GUILD_ID, 20, GOLD),
+    ])
+
+
+@pytest.mark.asyncio
+async def test_submit_merges_pending_changes_of_a_member():
+    queue = RoleUpdateQueue()
+    member = FakeMember(1)
+    queue.submit(RoleChange(member, add={BRONZE}))
+    queue.submit(RoleChange(member, add={SILVER}, remove={BRONZE}))
+    queue.submit(RoleChange(member, add={BRONZE, GOLD}))
+
+    assert len(queue) == 1
+    (change,) = queue._pending.values()
+    assert (change.add, change.remove) == ({BRONZE, SILVER, GOLD}, set())
+
+    queue.submit(RoleChange(FakeMember(2), add={BRONZE}))
+    assert len(queue) == 2
+
+
+@pytest.mark.asyncio
+async def test_queue_applies_only_missing_and_extra_roles():
+    queue = RoleUpdateQueue(rate=0)
+    member = FakeMember(1, roles=[BRONZE, GOLD])
+    queue.start()
+    try:
+        queue.submit(RoleChange(member, add={BRONZE, SILVER}, remove={GOLD, UNMANAGED}))
+
+        async def applied():
+            while queue.applied < 1:
+                await asyncio.sleep(0)
+
+        await asyncio.wait_for(applied(), timeout=5)
+    finally:
+        await queue.close()
+
+    assert member.calls == [("add", [SILVER]), ("remove", [GOLD])]
+
+
+def test_diff_member_roles_reconciles_stacked_rewards(config):
+    manageable = {BRONZE, SILVER, GOLD}
+    members = [
+        FakeMember(1, roles=[BRONZE, SILVER]),  # Niveau 12 : à jour
+        FakeMember(2, roles=[UNMANAGED]),  # Niveau 25 : tout manque
+        FakeMember(3, roles=[BRONZE, GOLD]),  # Niveau 6 : GOLD en trop
+        FakeMember(4, roles=[GOLD], bot=True),  # Bots ignorés
+        FakeMember(5, roles=[SILVER]),  # Absent des niveaux : niveau 0
+    ]
+    levels = {1: 12, 2: 25, 3: 6, 4: 0}
+
+    changes = diff_member_roles(members, levels, config, manageable)
+
+    assert [(c.member.id, c.add, c.remove) for c in changes] == [
+        (2, {BRONZE, SILVER, GOLD}, set()),
+        (3, set(), {GOLD}),
+        (5, set(), {SILVER}),
+    ]
+
+
+def test_diff_member_roles_leaves_unmanageable_roles_alone(config):
+    member = FakeMember(1, roles=[GOLD])
+    assert diff_member_roles([member], {1: 25}, config, manageable={BRONZE}) == [
+        RoleChange(member, {BRONZE}, set(), "Réconciliation des récompenses de niveau")
+    ]
@@ -0,0 +1,64 @@
+"""
+Tests du découpage SQLite en shards (ShardedSQLiteBackend)
+"""
+import pytest
+
+from core.database import DatabaseManager
+from core.db_backends import ShardedSQLiteBackend
+
+GUILD_IDS = range(1, 21)
+
+
+def sharded(tmp_path, shards: int) -> DatabaseManager:
+    return DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}", maintenance_interval=0, shards=shards)
+
+
+@pytest.mark.asyncio
+async def test_shard_placement_survives_a_reopen_with_more_shards(tmp_path):
+    db = sharded(tmp_path, 2)
+    await db.connect()
+    try:
+        for guild_id in GUILD_IDS:
+            await db.economy.credit(guild_id, 1, guild_id)
+        placement = {guild_id: db.backend.shard_of(guild_id) for guild_id in GUILD_IDS}
+        assert set(placement.values()) == {0, 1}
+    finally:
+        await db.close()
+
+    # K passe à 4 : les serveurs déjà placés restent sur leur shard
+    db = sharded(tmp_path, 4)
+    await db.connect()
+    try:
+        assert {guild_id: db.backend.shard_of(guild_id) for guild_id in GUILD_IDS} == placement
+        for guild_id in GUILD_IDS:
+            assert (await db.economy.get(guild_id, 1)).balance == 100 + guild_id
+    finally:
+        await db.close()
+
+
+@pytest.mark.asyncio
+async def test_guild_data_lives_in_a_single_shard(tmp_path):
+    db = sharded(tmp_path, 2)
+    await db.connect()
+    try:
+        await db.economy.credit(7, 1, 10)
+        backend: ShardedSQLiteBackend = db.backend
+        home = backend.shard_of(7)
+        counts = [
+            (await shard.fetchone("SELECT COUNT(*) FROM economy WHERE guild_id = 7"))[0]
+            for shard in backend.shards
+        ]
+        assert counts[home] == 1 and sum(counts) == 1
+    finally:
+        await db.close()
+
+
+@pytest.mark.asyncio
+async def test_connection_is_refused_when_sharded(tmp_path):
+    db = sharded(tmp_path, 2)
+    await db.connect()
+    try:
+        with pytest.raises(RuntimeError, match="DB_SHARDS"):
+            db.connection
+    finally:
+        await db.close()
@@ -0,0 +1,65 @@
+"""
+Tests de l'échantillonnage de l'XP vocale (cog Leveling)
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from cogs.leveling import Leveling
+from utils.level_curves import LevelCurve
+
+GUILD_ID = 1
+
+
+def voice_member(user_id: int, bot: bool = False, **state):
+    voice = SimpleNamespace(**{"self_mute": False, "mute": False, "self_deaf": False, "deaf": False, **state})
+    return SimpleNamespace(id=user_id, bot=bot, voice=voice)
+
+
+def channel(name: str, *members):
+    return SimpleNamespace(name=name, members=list(members))
+
+
+def guild_with(*channels, afk=None, present=()):
+    members = {member.id: member for ch in channels for member in ch.members if member.id in present}
+    return SimpleNamespace(
+        id=GUILD_ID,
+        voice_channels=list(channels),
+        afk_channel=afk,
+        get_member=members.get
+    )
+
+
+def test_voice_eligible_skips_afk_bots_muted_and_lonely_members():
+    general = channel("général", voice_member(1), voice_member(2), voice_member(3, bot=True),
+                      voice_member(4, self_mute=True))
+    lonely = channel("seul", voice_member(5), voice_member(6, deaf=True))
+    afk = channel("afk", voice_member(7), voice_member(8))
+
+    eligible = Leveling.voice_eligible(guild_with(general, lonely, afk, afk=afk))
+
+    assert eligible == {1: general, 2: general}
+
+
+@pytest.mark.asyncio
+async def test_award_voice_xp_batches_gains_and_levels_up(db):
+    bot = SimpleNamespace(db=db, config=SimpleNamespace(voice_xp_amount=15))
+    leveling = Leveling(bot)
+    leveling.curves[GUILD_ID] = LevelCurve("test", [0, 10, 1000])
+    level_ups = []
+
+    async def level_up(member, old_level, new_level, channel):
+        level_ups.append((member.id, old_level, new_level, channel.name))
+
+    leveling.level_up = level_up
+    talk = channel("général", voice_member(1), voice_member(2))
+
+    # Le membre 2 a quitté le serveur entre l'échantillon et le passage de niveau
+    await leveling.award_voice_xp(guild_with(talk, present={1}))
+    await db.xp.flush()
+
+    assert level_ups == [(1, 0, 1, "général")]
+    assert db.xp.stats()["gains"] == 2
+    user = await db.users.get(GUILD_ID, 2)
+    assert (user.xp, user.level, user.messages) == (15, 1, 0)
+    await leveling.cards.close()
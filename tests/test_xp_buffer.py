@@ -0,0 +1,121 @@
+"""
+Tests de l'accumulateur d'XP (XPBuffer)
+"""
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from core.repositories import XPRollupRepo
+from core.xp_buffer import XPBuffer
+
+GUILD_ID = 1
+NOW = datetime(2024, 1, 15, 12, 0)
+
+
+def block_writes(db, monkeypatch):
+    """Fait attendre l'écriture des totaux jusqu'à ``release`` ; ``started`` signale son début"""
+    started, release = asyncio.Event(), asyncio.Event()
+    original = db.users.add_xp_many
+
+    async def add_xp_many(guild_id, rows):
+        started.set()
+        await release.wait()
+        await original(guild_id, rows)
+
+    monkeypatch.setattr(db.users, "add_xp_many", add_xp_many)
+    return started, release
+
+
+@pytest.mark.asyncio
+async def test_close_during_a_flush_keeps_its_gains(db, monkeypatch):
+    xp = XPBuffer(db, flush_interval=0.01)
+    started, release = block_writes(db, monkeypatch)
+    xp.start()
+    await xp.add(GUILD_ID, 1, 10, NOW)
+    await asyncio.wait_for(started.wait(), timeout=5)
+
+    # Arrêt du bot pendant que la boucle écrit le lot
+    closing = asyncio.create_task(xp.close())
+    await asyncio.sleep(0.01)
+    release.set()
+    await asyncio.wait_for(closing, timeout=5)
+
+    assert (await db.users.get(GUILD_ID, 1)).xp == 10
+
+
+@pytest.mark.asyncio
+async def test_cancelled_flush_writes_its_batch_exactly_once(db, monkeypatch):
+    xp = XPBuffer(db, flush_interval=0.01)
+    started, release = block_writes(db, monkeypatch)
+    xp.start()
+    await xp.add(GUILD_ID, 1, 10, NOW)
+    await asyncio.wait_for(started.wait(), timeout=5)
+
+    # Annulation de la boucle en plein lot (arrêt de la boucle d'événements)
+    xp._task.cancel()
+    await asyncio.sleep(0.01)
+    release.set()
+    await asyncio.wait_for(xp.close(), timeout=5)
+
+    assert (await db.users.get(GUILD_ID, 1)).xp == 10
+    assert xp.stats()["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_write_is_requeued_and_merged(db, monkeypatch):
+    xp = XPBuffer(db)
+    original = db.users.add_xp_many
+    calls = []
+
+    async def add_xp_many(guild_id, rows):
+        calls.append(rows)
+        if len(calls) == 1:
+            raise RuntimeError("disque plein")
+        await original(guild_id, rows)
+
+    monkeypatch.setattr(db.users, "add_xp_many", add_xp_many)
+    await xp.add(GUILD_ID, 1, 10, NOW)
+    await xp.flush()
+    assert xp.stats()["pending"] == 1
+    assert await db.users.get(GUILD_ID, 1) is None
+
+    await xp.add(GUILD_ID, 1, 5, NOW)
+    await xp.flush()
+
+    user = await db.users.get(GUILD_ID, 1)
+    assert (user.xp, user.messages) == (15, 2)
+    (day,) = await db.xp_rollups.top_since(GUILD_ID, XPRollupRepo.day_key(NOW))
+    assert day.xp == 15
+
+
+@pytest.mark.asyncio
+async def test_exclusive_drops_levels_computed_before_the_reset(db):
+    xp = XPBuffer(db)
+    await xp.add(GUILD_ID, 1, 100, NOW)
+    xp.set_level(GUILD_ID, 1, 3)
+
+    async with xp.exclusive(GUILD_ID):
+        # Les gains en attente sont écrits avant le bloc
+        assert (await db.users.get(GUILD_ID, 1)).level == 3
+        await db.seasons.end(GUILD_ID, NOW)
+        # Gain arrivé pendant la fin de saison, niveau calculé sur l'ancien total
+        await xp.add(GUILD_ID, 1, 10, NOW)
+        xp.set_level(GUILD_ID, 1, 3)
+
+    user = await db.users.get(GUILD_ID, 1)
+    assert (user.xp, user.level) == (10, 0)
+    assert xp.stats() == {**xp.stats(), "members": 0, "pending": 0}
+
+
+@pytest.mark.asyncio
+async def test_idle_members_are_evicted_once_written(db):
+    xp = XPBuffer(db, idle_ttl=-1)
+    await xp.add(GUILD_ID, 1, 10, NOW)
+
+    xp._evict_idle()
+    assert xp.stats()["members"] == 1  # Gains pas encore écrits
+
+    await xp.flush()
+    assert xp.stats()["members"] == 0
+    assert (await xp.get(GUILD_ID, 1)).xp == 10